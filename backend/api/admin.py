@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends, Header, HTTPException
+from typing import List, Optional
+from services.profiling import profile_store, is_admin
+
+def require_admin(x_admin_token: Optional[str] = Header(default=None)):
+    # Fails closed: with no ADMIN_TOKEN configured nobody gets in
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+@router.get("/profiles", response_model=List[dict])
+def list_profiles():
+    """List captured request profiles, newest first"""
+    return profile_store.list()
+
+@router.get("/profiles/{profile_id}", response_model=dict)
+def get_profile(profile_id: str):
+    """Get SQL statements, N+1 candidates and CPU samples for one profile"""
+    session = profile_store.get(profile_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return session.detail()
+
+@router.delete("/profiles")
+def clear_profiles():
+    """Drop all captured profiles"""
+    profile_store.clear()
+    return {"message": "Profiles cleared"}
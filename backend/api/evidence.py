@@ -0,0 +1,241 @@
+import logging
+import uuid
+from urllib.parse import quote
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+from db.database import get_db
+from models.models import AuditLog, ComplianceChecklist, Evidence, EvidenceLink, IntakeRequest, generate_uuid
+from services.evidence_store import blob_store, parse_range, EvidenceTooLarge, CHUNK_SIZE
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+logger = logging.getLogger("aigrc.evidence")
+
+router = APIRouter()
+
+class EvidenceLinkRequest(BaseModel):
+    checklist_id: str
+    question_index: int = Field(ge=0)
+
+class EvidenceLinkBatchRequest(BaseModel):
+    links: List[EvidenceLinkRequest] = Field(min_length=1, max_length=200)
+
+class EvidenceLinkResponse(BaseModel):
+    checklist_id: str
+    question_index: int
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class EvidenceResponse(BaseModel):
+    id: str
+    request_id: str
+    sha256: str
+    size: int
+    filename: str
+    content_type: str
+    uploaded_by: Optional[str]
+    created_at: datetime
+    links: List[EvidenceLinkResponse] = []
+    # True when this request already had the same file; the existing record is returned
+    deduplicated: bool = False
+
+    class Config:
+        from_attributes = True
+
+def _check_links(db: Session, request_id: str, links: List[EvidenceLinkRequest]):
+    """Every linked checklist must belong to the request and have the question"""
+    if not links:
+        return
+    checklist_ids = {link.checklist_id for link in links}
+    checklists = {
+        c.id: c for c in db.query(ComplianceChecklist)
+        .filter(ComplianceChecklist.id.in_(checklist_ids), ComplianceChecklist.request_id == request_id)
+    }
+    for link in links:
+        checklist = checklists.get(link.checklist_id)
+        if checklist is None:
+            raise HTTPException(status_code=404, detail=f"Checklist {link.checklist_id} not found on this request")
+        if link.question_index >= len(checklist.questions or []):
+            raise HTTPException(status_code=400, detail=f"Checklist {link.checklist_id} has no question {link.question_index}")
+
+def _insert_links(db: Session, evidence_id: str, links: List[EvidenceLinkRequest]):
+    """One insert for all links the evidence does not have yet; the caller commits"""
+    wanted = {(link.checklist_id, link.question_index) for link in links}
+    if not wanted:
+        return
+    existing = set(
+        db.query(EvidenceLink.checklist_id, EvidenceLink.question_index)
+        .filter(EvidenceLink.evidence_id == evidence_id,
+                tuple_(EvidenceLink.checklist_id, EvidenceLink.question_index).in_(wanted))
+        .all()
+    )
+    rows = [dict(id=generate_uuid(), evidence_id=evidence_id, checklist_id=checklist_id, question_index=index)
+            for checklist_id, index in sorted(wanted - existing)]
+    if rows:
+        db.execute(insert(EvidenceLink), rows)
+
+def _check_targets(db: Session, request_id: str, links: List[EvidenceLinkRequest]):
+    if not db.query(IntakeRequest.id).filter(IntakeRequest.id == request_id).first():
+        raise HTTPException(status_code=404, detail="Request not found")
+    _check_links(db, request_id, links)
+
+def _audit_upload(db: Session, request_id: str, evidence_id: str, digest: str, size: int, uploaded_by: Optional[str]):
+    db.execute(insert(AuditLog), [dict(id=generate_uuid(), request_id=request_id, user_id=uploaded_by,
+                                       action="evidence_uploaded",
+                                       metadata_={"evidence_id": evidence_id, "sha256": digest, "size": size})])
+
+def _record_upload(db: Session, request_id: str, digest: str, created: bool, size: int, filename: str,
+                   content_type: str, uploaded_by: Optional[str], links: List[EvidenceLinkRequest]) -> EvidenceResponse:
+    try:
+        evidence_id, existing = _insert_upload(db, request_id, digest, size, filename, content_type,
+                                               uploaded_by, links)
+    except BaseException:
+        db.rollback()
+        if created:
+            # Not deleted here: a concurrent upload of the same bytes may be about to
+            # reference it. The evidence_sweep job removes it if nothing ever does.
+            logger.warning("Evidence blob %s was stored but not recorded; left to the orphan sweep", digest)
+        raise
+    evidence = db.query(Evidence).options(selectinload(Evidence.links)).filter(Evidence.id == evidence_id).one()
+    response = EvidenceResponse.model_validate(evidence)
+    response.deduplicated = bool(existing)
+    return response
+
+def _insert_upload(db: Session, request_id: str, digest: str, size: int, filename: str, content_type: str,
+                   uploaded_by: Optional[str], links: List[EvidenceLinkRequest]):
+    """Insert the evidence row (unless the request has the file), its links and the audit entry, and commit"""
+    existing = db.query(Evidence.id).filter(Evidence.request_id == request_id, Evidence.sha256 == digest).scalar()
+    evidence_id = existing or generate_uuid()
+    try:
+        if not existing:
+            db.execute(insert(Evidence), [dict(id=evidence_id, request_id=request_id, sha256=digest, size=size,
+                                               filename=filename, content_type=content_type, uploaded_by=uploaded_by)])
+        _insert_links(db, evidence_id, links)
+        _audit_upload(db, request_id, evidence_id, digest, size, uploaded_by)
+        db.commit()
+    except IntegrityError:
+        # A concurrent upload of the same file to this request won the insert
+        db.rollback()
+        existing = db.query(Evidence.id).filter(Evidence.request_id == request_id, Evidence.sha256 == digest).scalar()
+        if existing is None:
+            raise
+        evidence_id = existing
+        _insert_links(db, evidence_id, links)
+        _audit_upload(db, request_id, evidence_id, digest, size, uploaded_by)
+        db.commit()
+    return evidence_id, existing
+
+@router.post("/requests/{request_id}", response_model=EvidenceResponse, status_code=201)
+async def upload_evidence(
+    request_id: uuid.UUID,
+    http_request: Request,
+    filename: str = Query(min_length=1, max_length=255),
+    checklist_id: Optional[str] = None,
+    question_index: Optional[int] = Query(default=None, ge=0),
+    uploaded_by: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Stream the raw request body into the evidence store and attach it to a request"""
+    request_id = str(request_id)
+    declared = http_request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > blob_store.max_bytes:
+        raise HTTPException(status_code=413, detail=f"Evidence files are limited to {blob_store.max_bytes} bytes")
+    if (checklist_id is None) != (question_index is None):
+        raise HTTPException(status_code=400, detail="checklist_id and question_index go together")
+    links = [EvidenceLinkRequest(checklist_id=checklist_id, question_index=question_index)] if checklist_id else []
+    await run_in_threadpool(_check_targets, db, request_id, links)
+    # Don't hold a connection (on tuned SQLite, the writer) for the whole upload
+    await run_in_threadpool(db.rollback)
+
+    upload = await run_in_threadpool(blob_store.stage)
+    try:
+        # Coalesce the server's small receive chunks so disk writes happen CHUNK_SIZE at a time
+        buffer = bytearray()
+        async for chunk in http_request.stream():
+            buffer += chunk
+            if len(buffer) >= CHUNK_SIZE:
+                await run_in_threadpool(upload.write, buffer)
+                buffer.clear()
+        if buffer:
+            await run_in_threadpool(upload.write, buffer)
+        digest, created = await run_in_threadpool(blob_store.commit, upload)
+    except EvidenceTooLarge as exc:
+        upload.discard()
+        raise HTTPException(status_code=413, detail=str(exc))
+    except BaseException:
+        upload.discard()
+        raise
+
+    content_type = http_request.headers.get("content-type") or "application/octet-stream"
+    return await run_in_threadpool(_record_upload, db, request_id, digest, created, upload.size, filename,
+                                   content_type, uploaded_by, links)
+
+@router.get("/requests/{request_id}", response_model=List[EvidenceResponse])
+def list_evidence(request_id: uuid.UUID, checklist_id: Optional[str] = None, db: Session = Depends(get_db)):
+    """List a request's evidence, optionally only what is linked to one checklist"""
+    query = db.query(Evidence).options(selectinload(Evidence.links)).filter(Evidence.request_id == str(request_id))
+    if checklist_id:
+        query = query.filter(Evidence.links.any(EvidenceLink.checklist_id == checklist_id))
+    return query.order_by(Evidence.created_at, Evidence.id).all()
+
+@router.get("/{evidence_id}", response_model=EvidenceResponse)
+def get_evidence(evidence_id: uuid.UUID, db: Session = Depends(get_db)):
+    evidence = db.query(Evidence).options(selectinload(Evidence.links)).filter(Evidence.id == str(evidence_id)).first()
+    if not evidence:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    return evidence
+
+@router.post("/{evidence_id}/links", response_model=EvidenceResponse)
+def link_evidence(evidence_id: uuid.UUID, batch: EvidenceLinkBatchRequest, db: Session = Depends(get_db)):
+    """Attach evidence to checklist questions of its request in one insert"""
+    evidence = db.query(Evidence).filter(Evidence.id == str(evidence_id)).first()
+    if not evidence:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    _check_links(db, evidence.request_id, batch.links)
+    _insert_links(db, evidence.id, batch.links)
+    db.commit()
+    db.refresh(evidence)
+    return evidence
+
+@router.get("/{evidence_id}/content")
+def download_evidence(evidence_id: uuid.UUID, http_request: Request, db: Session = Depends(get_db)):
+    """Stream the file; honours single-range ``Range`` requests and ``If-Range``"""
+    evidence = db.query(Evidence).filter(Evidence.id == str(evidence_id)).first()
+    if not evidence:
+        raise HTTPException(status_code=404, detail="Evidence not found")
+    etag = f'"{evidence.sha256}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        # Content-addressed: the bytes behind an evidence id never change
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(evidence.filename)}",
+    }
+    if http_request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    range_header = http_request.headers.get("range")
+    if_range = http_request.headers.get("if-range")
+    if if_range is not None and if_range != etag:
+        range_header = None
+    try:
+        byte_range = parse_range(range_header, evidence.size)
+    except ValueError:
+        headers["Content-Range"] = f"bytes */{evidence.size}"
+        return Response(status_code=416, headers=headers)
+
+    if byte_range is None:
+        headers["Content-Length"] = str(evidence.size)
+        return StreamingResponse(blob_store.read(evidence.sha256), media_type=evidence.content_type, headers=headers)
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{evidence.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(blob_store.read(evidence.sha256, start, end), status_code=206,
+                             media_type=evidence.content_type, headers=headers)
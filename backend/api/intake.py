@@ -1,8 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
+from db.batching import write_batcher
 from db.database import get_db
-from models.models import IntakeRequest, IntakeRequestVersion, User
+from db.json_fields import json_text
+from models.models import IntakeRequest, IntakeRequestVersion, RiskScore, User
+from services.cache import response_cache, conditional_response, INTAKE
+from services.review_policy import route_request, AUTO_ROUTE_REVIEWS
 from pydantic import BaseModel
 from datetime import datetime
 import uuid
@@ -38,7 +42,7 @@ class IntakeRequestResponse(BaseModel):
         from_attributes = True
 
 @router.post("/", response_model=IntakeRequestResponse)
-def create_intake_request(request: IntakeRequestCreate, db: Session = Depends(get_db)):
+def create_intake_request(request: IntakeRequestCreate):
     # Extract known fields
     request_data = request.model_dump()
     title = request_data.pop("title")
@@ -54,25 +58,73 @@ def create_intake_request(request: IntakeRequestCreate, db: Session = Depends(ge
     details['requestor_name'] = requestor_name
     details['requestor_email'] = requestor_email
 
-    db_request = IntakeRequest(
-        title=title,
-        description=description,
-        requestor_id=requestor_id,
-        status="draft",
-        details=details
-    )
-    db.add(db_request)
-    db.commit()
-    db.refresh(db_request)
-    return db_request
+    def insert(db: Session):
+        db_request = IntakeRequest(
+            title=title,
+            description=description,
+            requestor_id=requestor_id,
+            status="draft",
+            details=details
+        )
+        db.add(db_request)
+        db.flush()
+        return IntakeRequestResponse.model_validate(db_request)
 
-@router.get("/{request_id}", response_model=IntakeRequestResponse)
-def get_intake_request(request_id: uuid.UUID, db: Session = Depends(get_db)):
+    # Group-committed with concurrent writes on the tuned SQLite profile
+    return write_batcher.run(insert)
+
+@router.post("/{request_id}/submit", response_model=IntakeRequestResponse)
+def submit_intake_request(request_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Submit a draft for review; routes it right away if it has already been scored"""
+    request_id = str(request_id)
     request = db.query(IntakeRequest).filter(IntakeRequest.id == request_id).first()
     if not request:
         raise HTTPException(status_code=404, detail="Request not found")
+    if request.status != "draft":
+        raise HTTPException(status_code=409, detail=f"Request is already {request.status}")
+    request.status = "submitted"
+    db.commit()
+    response_cache.invalidate(INTAKE, request_id)
+    if AUTO_ROUTE_REVIEWS:
+        risk_score = (
+            db.query(RiskScore)
+            .filter(RiskScore.request_id == request_id)
+            .order_by(RiskScore.created_at.desc())
+            .first()
+        )
+        if risk_score:
+            route_request(db, request, risk_score)
+    db.refresh(request)
     return request
 
+@router.get("/{request_id}", response_model=IntakeRequestResponse)
+def get_intake_request(request_id: uuid.UUID, http_request: Request, db: Session = Depends(get_db)):
+    request_id = str(request_id)
+    entry = response_cache.get(INTAKE, request_id)
+    hit = entry is not None
+    if not hit:
+        generation = response_cache.generation(INTAKE, request_id)
+        request = db.query(IntakeRequest).filter(IntakeRequest.id == request_id).first()
+        if not request:
+            raise HTTPException(status_code=404, detail="Request not found")
+        payload = IntakeRequestResponse.model_validate(request).model_dump(mode="json")
+        entry = response_cache.put(INTAKE, request_id, payload, request.updated_at, generation)
+    return conditional_response(http_request, entry, hit)
+
 @router.get("/", response_model=List[IntakeRequestResponse])
-def list_intake_requests(db: Session = Depends(get_db)):
-    return db.query(IntakeRequest).all()
+def list_intake_requests(
+    status: Optional[str] = None,
+    model_provider: Optional[str] = None,
+    deployment_type: Optional[str] = None,
+    requestor_email: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    query = db.query(IntakeRequest)
+    if status:
+        query = query.filter(IntakeRequest.status == status)
+    # Each details filter is served by its expression index
+    for key, value in (("model_provider", model_provider), ("deployment_type", deployment_type),
+                       ("requestor_email", requestor_email)):
+        if value:
+            query = query.filter(json_text(IntakeRequest.details, key) == value)
+    return query.all()
@@ -1,10 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import base64
+import binascii
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import tuple_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
-from db.database import get_db
+from db.batching import write_batcher
+from db.database import get_db, tenant_session
 from models.models import ReviewTask, Comment, User, IntakeRequest
-from pydantic import BaseModel
-from datetime import datetime
+from services.cache import response_cache, conditional_response, INTAKE, REVIEW_TASKS
+from services.assignment import assignment_scheduler, route_team, REVIEW_SLA_HOURS
+from services.review_policy import review_policy, route_backlog
+from pydantic import BaseModel, Field
+from datetime import datetime, timedelta
 
 router = APIRouter()
 
@@ -13,10 +21,28 @@ class ReviewActionRequest(BaseModel):
     team: str
     comments: str = ""
 
-class CommentRequest(BaseModel):
-    commenter_id: str
+class CreateTaskRequest(BaseModel):
+    # Either may be omitted: team is routed by the request's highest framework
+    # score and the reviewer is the least loaded one on that team
+    reviewer_id: Optional[str] = None
+    team: Optional[str] = None
+    comments: str = ""
+
+class CommentDraft(BaseModel):
     section: str
     text: str
+    anchor: Optional[str] = None
+    parent_id: Optional[str] = None
+    # Target task; defaults to the parent's task, then to the request's first task
+    task_id: Optional[str] = None
+    team: Optional[str] = None
+
+class CommentRequest(CommentDraft):
+    commenter_id: str
+
+class CommentBatchRequest(BaseModel):
+    commenter_id: str
+    comments: List[CommentDraft] = Field(min_length=1, max_length=200)
 
 class ReviewTaskResponse(BaseModel):
     id: str
@@ -34,18 +60,88 @@ class ReviewTaskResponse(BaseModel):
 class CommentResponse(BaseModel):
     id: str
     task_id: str
+    request_id: Optional[str]
+    parent_id: Optional[str]
     commenter_id: str
-    section: str
+    section: Optional[str]
+    anchor: Optional[str]
     text: str
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class CommentThreadResponse(CommentResponse):
+    replies: List["CommentThreadResponse"] = []
+
+class CommentPageResponse(BaseModel):
+    items: List[CommentThreadResponse]
+    next_cursor: Optional[str]
+
+def _encode_cursor(comment: Comment) -> str:
+    raw = f"{comment.created_at.isoformat()}|{comment.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str):
+    try:
+        created_at, comment_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(created_at), comment_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _build_comments(db: Session, request_id: str, commenter_id: str, drafts: List[CommentDraft]) -> List[Comment]:
+    """Resolve each draft's task and parent with two queries, however many drafts there are"""
+    tasks = (
+        db.query(ReviewTask)
+        .filter(ReviewTask.request_id == request_id)
+        .order_by(ReviewTask.created_at, ReviewTask.id)
+        .all()
+    )
+    if not tasks:
+        raise HTTPException(status_code=404, detail="Review task not found")
+    tasks_by_id = {t.id: t for t in tasks}
+    tasks_by_team = {}
+    for t in tasks:
+        tasks_by_team.setdefault(t.team, t)
+
+    parent_ids = {d.parent_id for d in drafts if d.parent_id}
+    parent_tasks = {}
+    if parent_ids:
+        parent_tasks = dict(
+            db.query(Comment.id, Comment.task_id)
+            .filter(Comment.id.in_(parent_ids), Comment.request_id == request_id)
+            .all()
+        )
+
+    comments = []
+    for draft in drafts:
+        if draft.parent_id and draft.parent_id not in parent_tasks:
+            raise HTTPException(status_code=404, detail="Parent comment not found")
+        if draft.task_id:
+            task = tasks_by_id.get(draft.task_id)
+        elif draft.team:
+            task = tasks_by_team.get(draft.team)
+        elif draft.parent_id:
+            task = tasks_by_id.get(parent_tasks[draft.parent_id])
+        else:
+            task = tasks[0]
+        if task is None:
+            raise HTTPException(status_code=404, detail="Review task not found")
+        comments.append(Comment(
+            task_id=task.id,
+            request_id=request_id,
+            parent_id=draft.parent_id,
+            commenter_id=commenter_id,
+            section=draft.section,
+            anchor=draft.anchor,
+            text=draft.text
+        ))
+    return comments
+
 @router.post("/{request_id}/create-task", response_model=ReviewTaskResponse)
 def create_review_task(
     request_id: str,
-    action: ReviewActionRequest,
+    action: CreateTaskRequest,
     db: Session = Depends(get_db)
 ):
     """Create a review task for a specific team"""
@@ -54,124 +150,119 @@ def create_review_task(
     if not intake_request:
         raise HTTPException(status_code=404, detail="Request not found")
     
+    # One task per team: a team that routing (or an earlier call) already gave a task keeps it
+    team = action.team or route_team(db, intake_request)
+    existing = _team_task(db, request_id, team)
+    if existing:
+        return existing
+    
     # Create review task
     task = ReviewTask(
         request_id=request_id,
         reviewer_id=action.reviewer_id,
-        team=action.team,
+        team=team,
         status='pending'
     )
-    db.add(task)
+    try:
+        with db.begin_nested():
+            db.add(task)
+    except IntegrityError:
+        # A concurrent call or the routing stage created it in the meantime
+        return _team_task(db, request_id, team)
+    if action.reviewer_id:
+        assignment_scheduler.record(action.reviewer_id, task.id, task.created_at)
+    else:
+        task.reviewer_id = assignment_scheduler.assign(db, task.team, task.id, task.created_at)
     
     # Update request status
     intake_request.status = 'reviewing'
     
-    db.commit()
+    try:
+        db.commit()
+    except Exception:
+        assignment_scheduler.release(task.id)
+        raise
     db.refresh(task)
+    response_cache.invalidate(REVIEW_TASKS, request_id)
+    response_cache.invalidate(INTAKE, request_id)
+    return task
+
+def _team_task(db: Session, request_id: str, team: str) -> Optional[ReviewTask]:
+    return db.query(ReviewTask).filter(ReviewTask.request_id == request_id, ReviewTask.team == team).first()
+
+def _decide(db: Session, request_id: str, action: ReviewActionRequest, status: str) -> ReviewTask:
+    """Record a reviewer's decision on their team's task, creating the task if there is none"""
+    task = _team_task(db, request_id, action.team)
+    if not task:
+        try:
+            with db.begin_nested():
+                db.add(ReviewTask(request_id=request_id, team=action.team))
+        except IntegrityError:
+            pass  # created concurrently; the decision applies to that task
+        task = _team_task(db, request_id, action.team)
+    task.status = status
+    task.comments = action.comments
+    task.reviewer_id = action.reviewer_id
+    db.flush()
     return task
 
 @router.post("/{request_id}/approve", response_model=dict)
 def approve_request(
     request_id: str,
-    action: ReviewActionRequest,
-    db: Session = Depends(get_db)
+    action: ReviewActionRequest
 ):
     """Approve a request"""
-    # Find the review task
-    task = db.query(ReviewTask).filter(
-        ReviewTask.request_id == request_id,
-        ReviewTask.team == action.team
-    ).first()
-    
-    if not task:
-        # Create a new task if it doesn't exist
-        task = ReviewTask(
-            request_id=request_id,
-            reviewer_id=action.reviewer_id,
-            team=action.team,
-            status='approved',
-            comments=action.comments
-        )
-        db.add(task)
-    else:
-        task.status = 'approved'
-        task.comments = action.comments
-        task.reviewer_id = action.reviewer_id
-    
-    # Check if all reviews are approved
-    all_tasks = db.query(ReviewTask).filter(ReviewTask.request_id == request_id).all()
-    if all(t.status == 'approved' for t in all_tasks):
-        intake_request = db.query(IntakeRequest).filter(IntakeRequest.id == request_id).first()
-        if intake_request:
-            intake_request.status = 'approved'
-    
-    db.commit()
-    return {"message": "Request approved", "task_id": task.id}
+    def apply(db: Session):
+        task = _decide(db, request_id, action, 'approved')
+        # Check if all reviews are approved
+        all_tasks = db.query(ReviewTask).filter(ReviewTask.request_id == request_id).all()
+        if all(t.status == 'approved' for t in all_tasks):
+            intake_request = db.query(IntakeRequest).filter(IntakeRequest.id == request_id).first()
+            if intake_request:
+                intake_request.status = 'approved'
+        return task.id
+
+    task_id = write_batcher.run(apply)
+    assignment_scheduler.release(task_id)
+    response_cache.invalidate(REVIEW_TASKS, request_id)
+    response_cache.invalidate(INTAKE, request_id)
+    return {"message": "Request approved", "task_id": task_id}
 
 @router.post("/{request_id}/reject", response_model=dict)
 def reject_request(
     request_id: str,
-    action: ReviewActionRequest,
-    db: Session = Depends(get_db)
+    action: ReviewActionRequest
 ):
     """Reject a request"""
-    task = db.query(ReviewTask).filter(
-        ReviewTask.request_id == request_id,
-        ReviewTask.team == action.team
-    ).first()
-    
-    if not task:
-        # Create a new task if it doesn't exist
-        task = ReviewTask(
-            request_id=request_id,
-            reviewer_id=action.reviewer_id,
-            team=action.team,
-            status='rejected',
-            comments=action.comments
-        )
-        db.add(task)
-    else:
-        task.status = 'rejected'
-        task.comments = action.comments
-        task.reviewer_id = action.reviewer_id
-    
-    # Update request status
-    intake_request = db.query(IntakeRequest).filter(IntakeRequest.id == request_id).first()
-    if intake_request:
-        intake_request.status = 'denied'
-    
-    db.commit()
-    return {"message": "Request rejected", "task_id": task.id}
+    def apply(db: Session):
+        task = _decide(db, request_id, action, 'rejected')
+        # Update request status
+        intake_request = db.query(IntakeRequest).filter(IntakeRequest.id == request_id).first()
+        if intake_request:
+            intake_request.status = 'denied'
+        return task.id
+
+    task_id = write_batcher.run(apply)
+    assignment_scheduler.release(task_id)
+    response_cache.invalidate(REVIEW_TASKS, request_id)
+    response_cache.invalidate(INTAKE, request_id)
+    return {"message": "Request rejected", "task_id": task_id}
 
 @router.post("/{request_id}/request-info", response_model=dict)
 def request_more_info(
     request_id: str,
-    action: ReviewActionRequest,
-    db: Session = Depends(get_db)
+    action: ReviewActionRequest
 ):
     """Request more information"""
-    task = db.query(ReviewTask).filter(
-        ReviewTask.request_id == request_id,
-        ReviewTask.team == action.team
-    ).first()
-    
-    if not task:
-        # Create a new task if it doesn't exist
-        task = ReviewTask(
-            request_id=request_id,
-            reviewer_id=action.reviewer_id,
-            team=action.team,
-            status='needs-info',
-            comments=action.comments
-        )
-        db.add(task)
-    else:
-        task.status = 'needs-info'
-        task.comments = action.comments
-        task.reviewer_id = action.reviewer_id
-    
-    db.commit()
-    return {"message": "Information requested", "task_id": task.id}
+    def apply(db: Session):
+        task = _decide(db, request_id, action, 'needs-info')
+        return task.id, task.reviewer_id, task.created_at
+
+    task_id, reviewer_id, created_at = write_batcher.run(apply)
+    # Still open, possibly under a new reviewer
+    assignment_scheduler.record(reviewer_id, task_id, created_at)
+    response_cache.invalidate(REVIEW_TASKS, request_id)
+    return {"message": "Information requested", "task_id": task_id}
 
 @router.post("/{request_id}/comment", response_model=CommentResponse)
 def add_comment(
@@ -180,35 +271,103 @@ def add_comment(
     db: Session = Depends(get_db)
 ):
     """Add a comment to a review"""
-    # Find or create task
-    task = db.query(ReviewTask).filter(
-        ReviewTask.request_id == request_id
-    ).first()
-    
-    if not task:
-        raise HTTPException(status_code=404, detail="Review task not found")
-    
-    comment = Comment(
-        task_id=task.id,
-        commenter_id=comment_req.commenter_id,
-        section=comment_req.section,
-        text=comment_req.text
-    )
+    comment = _build_comments(db, request_id, comment_req.commenter_id, [comment_req])[0]
     db.add(comment)
     db.commit()
     db.refresh(comment)
     return comment
 
+@router.post("/{request_id}/comments/batch", response_model=List[CommentResponse])
+def add_comments_batch(
+    request_id: str,
+    batch: CommentBatchRequest,
+    db: Session = Depends(get_db)
+):
+    """Add several section comments in one transaction"""
+    comments = _build_comments(db, request_id, batch.commenter_id, batch.comments)
+    db.add_all(comments)
+    db.flush()
+    # Serialize before commit so the response doesn't reload every row
+    payload = [CommentResponse.model_validate(c) for c in comments]
+    db.commit()
+    return payload
+
+@router.get("/{request_id}/comments", response_model=CommentPageResponse)
+def get_comments(
+    request_id: str,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Get comment threads for a request across all review tasks, oldest first"""
+    if not db.query(IntakeRequest.id).filter(IntakeRequest.id == request_id).first():
+        raise HTTPException(status_code=404, detail="Request not found")
+
+    query = (
+        db.query(Comment)
+        .filter(Comment.request_id == request_id, Comment.parent_id.is_(None))
+        # One IN query per reply depth, bounded by the page rather than the whole request
+        .options(selectinload(Comment.replies, recursion_depth=-1))
+        .order_by(Comment.created_at, Comment.id)
+    )
+    if cursor:
+        query = query.filter(tuple_(Comment.created_at, Comment.id) > tuple_(*_decode_cursor(cursor)))
+
+    roots = query.limit(limit + 1).all()
+    next_cursor = _encode_cursor(roots[limit - 1]) if len(roots) > limit else None
+    return {"items": roots[:limit], "next_cursor": next_cursor}
+
 @router.get("/{request_id}/tasks", response_model=List[ReviewTaskResponse])
 def get_review_tasks(
     request_id: str,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     """Get all review tasks for a request"""
-    tasks = db.query(ReviewTask).filter(ReviewTask.request_id == request_id).all()
-    return tasks
+    entry = response_cache.get(REVIEW_TASKS, request_id)
+    hit = entry is not None
+    if not hit:
+        generation = response_cache.generation(REVIEW_TASKS, request_id)
+        tasks = db.query(ReviewTask).filter(ReviewTask.request_id == request_id).all()
+        payload = [ReviewTaskResponse.model_validate(t).model_dump(mode="json") for t in tasks]
+        last_modified = max((t.updated_at for t in tasks if t.updated_at), default=None)
+        entry = response_cache.put(REVIEW_TASKS, request_id, payload, last_modified, generation)
+    return conditional_response(http_request, entry, hit)
 
 @router.get("/pending", response_model=List[ReviewTaskResponse])
 def list_pending_tasks(db: Session = Depends(get_db)):
     """List all pending review tasks"""
     return db.query(ReviewTask).filter(ReviewTask.status == "pending").all()
+
+@router.get("/workload", response_model=dict)
+def get_workload(db: Session = Depends(get_db)):
+    """Open tasks per reviewer, grouped by team"""
+    assignment_scheduler.refresh_if_stale(db)
+    return assignment_scheduler.workload()
+
+@router.post("/rebalance", response_model=dict)
+def rebalance_tasks(
+    sla_hours: float = Query(REVIEW_SLA_HOURS, gt=0),
+    db: Session = Depends(get_db)
+):
+    """Reassign open tasks past the SLA from overloaded reviewers"""
+    moves = assignment_scheduler.rebalance(db, datetime.utcnow() - timedelta(hours=sla_hours))
+    db.commit()
+    for request_id in {m["request_id"] for m in moves}:
+        response_cache.invalidate(REVIEW_TASKS, request_id)
+    return {"moved": moves}
+
+@router.get("/routing/policy", response_model=dict)
+def get_routing_policy():
+    """Review routing rules currently in effect"""
+    return review_policy.source
+
+@router.post("/routing/backlog", response_model=dict)
+def route_review_backlog(dry_run: bool = True):
+    """Evaluate every scored, undecided request against the routing policy; applies it when dry_run=false"""
+    # A dry run only reads, so it stays off the writer connection
+    db = tenant_session(read_only=dry_run)
+    try:
+        return route_backlog(db, dry_run=dry_run)
+    finally:
+        db.close()
@@ -1,11 +1,17 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from db.database import get_db
+from db.database import get_db, get_read_db
 from models.models import IntakeRequest, RiskScore
 from services.risk_scoring import RiskScoringEngine
-from pydantic import BaseModel
-from typing import Optional
+from services.cache import response_cache, conditional_response, INTAKE, SCORING
+from services.review_policy import route_request, AUTO_ROUTE_REVIEWS
+from services.score_history import request_history, score_trend, default_range, TREND_BUCKETS
+from services.simulation import score_matrix_cache, simulate
+from services.risk_scoring import FRAMEWORKS, HIGH_RISK_SCORE
+from pydantic import BaseModel, Field, field_validator
+from typing import Dict, List, Optional
 from datetime import datetime
+import math
 
 router = APIRouter()
 
@@ -23,6 +29,54 @@ class RiskScoreResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class RiskScoreHistoryResponse(BaseModel):
+    nist_score: Optional[int]
+    soc2_score: Optional[int]
+    sox_score: Optional[int]
+    owasp_score: Optional[int]
+    maestro_score: Optional[int]
+    total_score: Optional[int]
+    rule_version: int
+    recorded_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class WeightSet(BaseModel):
+    name: Optional[str] = None
+    weights: Dict[str, float]
+
+    @field_validator("weights")
+    @classmethod
+    def check_frameworks(cls, weights):
+        unknown = set(weights) - set(FRAMEWORKS)
+        if unknown:
+            raise ValueError(f"Unknown frameworks: {', '.join(sorted(unknown))}")
+        if not all(math.isfinite(w) for w in weights.values()):
+            raise ValueError("Weights must be finite numbers")
+        if any(w < 0 for w in weights.values()):
+            raise ValueError("Weights must not be negative")
+        return weights
+
+class SimulationRequest(BaseModel):
+    weight_sets: List[WeightSet] = Field(min_length=1, max_length=32)
+    threshold: int = Field(HIGH_RISK_SCORE, ge=0, le=100)
+    # Reload stored scores now instead of using the cached matrix
+    refresh: bool = False
+
+@router.post("/simulate", response_model=dict)
+def simulate_weights(
+    simulation: SimulationRequest,
+    db: Session = Depends(get_read_db)
+):
+    """Re-total every stored score under candidate weightings and compare with the current weights"""
+    matrix = score_matrix_cache.get(db, refresh=simulation.refresh)
+    result = simulate(matrix, [ws.weights for ws in simulation.weight_sets], RiskScoringEngine().weights,
+                      simulation.threshold)
+    for weight_set, candidate in zip(simulation.weight_sets, result["candidates"]):
+        candidate["name"] = weight_set.name
+    return result
+
 @router.post("/{request_id}/compute", response_model=RiskScoreResponse)
 def compute_risk_score(
     request_id: str,
@@ -35,20 +89,59 @@ def compute_risk_score(
     
     engine = RiskScoringEngine()
     risk_score = engine.calculate_total_score(request, db)
+    # request.risk_score/updated_at changed too
+    response_cache.invalidate(SCORING, request_id)
+    response_cache.invalidate(INTAKE, request_id)
+    if AUTO_ROUTE_REVIEWS:
+        route_request(db, request, risk_score)
     
     return risk_score
 
+@router.get("/trends", response_model=dict)
+def get_score_trends(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    bucket: str = Query("day", pattern="^(" + "|".join(TREND_BUCKETS) + ")$"),
+    request_id: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Downsampled score changes for the portfolio (or one request), one point per bucket"""
+    start, end = default_range(start, end)
+    points = score_trend(db, start, end, bucket, request_id)
+    return {"start": start, "end": end, "bucket": bucket, "points": points}
+
+@router.get("/{request_id}/history", response_model=List[RiskScoreHistoryResponse])
+def get_score_history(
+    request_id: str,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """Every recorded score change for a request, oldest first"""
+    if db.query(IntakeRequest.id).filter(IntakeRequest.id == request_id).first() is None:
+        raise HTTPException(status_code=404, detail="Request not found")
+    return request_history(db, request_id, start, end)
+
 @router.get("/{request_id}", response_model=RiskScoreResponse)
 def get_risk_score(
     request_id: str,
+    http_request: Request,
     db: Session = Depends(get_db)
 ):
     """Get risk scores for a request"""
-    risk_score = db.query(RiskScore).filter(
-        RiskScore.request_id == request_id
-    ).first()
+    entry = response_cache.get(SCORING, request_id)
+    hit = entry is not None
+    if not hit:
+        generation = response_cache.generation(SCORING, request_id)
+        risk_score = db.query(RiskScore).filter(
+            RiskScore.request_id == request_id
+        ).first()
+        
+        if not risk_score:
+            raise HTTPException(status_code=404, detail="Risk score not found. Compute it first using POST /{request_id}/compute")
+        
+        # RiskScore rows are updated in place without an updated_at, so only the ETag validates
+        payload = RiskScoreResponse.model_validate(risk_score).model_dump(mode="json")
+        entry = response_cache.put(SCORING, request_id, payload, generation=generation)
     
-    if not risk_score:
-        raise HTTPException(status_code=404, detail="Risk score not found. Compute it first using POST /{request_id}/compute")
-    
-    return risk_score
+    return conditional_response(http_request, entry, hit)
@@ -0,0 +1,138 @@
+"""
+Comment thread retrieval and batch posting for requests with thousands of comments.
+
+Requires pytest-benchmark (see benchmarks/requirements.txt):
+
+    cd backend && python -m pytest benchmarks/bench_comments.py \
+        --benchmark-json=benchmarks/results/comments.json
+"""
+import os
+import tempfile
+import uuid
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.datagen import SyntheticDataGenerator, SECTIONS, TEAMS
+from db.database import Base, get_db
+from main import app
+from models.models import Comment, IntakeRequest, ReviewTask
+
+COMMENTS_PER_TASK = 1000
+PAGE_SIZE = 50
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    """One request with a task per team and COMMENTS_PER_TASK comments on each"""
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/comments.db")
+    Base.metadata.create_all(bind=engine)
+    generator = SyntheticDataGenerator(seed=11)
+    request_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    with engine.begin() as conn:
+        conn.execute(insert(IntakeRequest), [dict(id=request_id, title="Busy request", status="reviewing",
+                                                   details={}, created_at=now, updated_at=now)])
+        tasks = [dict(id=str(uuid.uuid4()), request_id=request_id, team=team, status="pending",
+                      created_at=now, updated_at=now) for team in TEAMS]
+        conn.execute(insert(ReviewTask), tasks)
+        for task in tasks:
+            conn.execute(insert(Comment), generator.comment_rows(request_id, task["id"], task["team"],
+                                                                 COMMENTS_PER_TASK, now))
+
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    def override_get_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield engine, request_id
+    app.dependency_overrides.pop(get_db, None)
+    engine.dispose()
+
+
+@pytest.fixture(scope="module")
+def client(seeded):
+    return TestClient(app)
+
+
+def _count_queries(engine):
+    counter = {"n": 0}
+
+    def count(*args):
+        counter["n"] += 1
+
+    event.listen(engine, "before_cursor_execute", count)
+    return counter, lambda: event.remove(engine, "before_cursor_execute", count)
+
+
+def test_first_page(benchmark, seeded, client):
+    engine, request_id = seeded
+    counter, stop = _count_queries(engine)
+    try:
+        page = client.get(f"/review/{request_id}/comments", params={"limit": PAGE_SIZE}).json()
+    finally:
+        stop()
+    assert len(page["items"]) == PAGE_SIZE
+    # existence check + roots + one IN query per reply depth, never one per comment
+    assert counter["n"] < 15
+
+    benchmark(client.get, f"/review/{request_id}/comments", params={"limit": PAGE_SIZE})
+
+
+def test_walk_all_pages(benchmark, seeded, client):
+    _, request_id = seeded
+
+    def walk():
+        seen, cursor = 0, None
+        while True:
+            params = {"limit": 200}
+            if cursor:
+                params["cursor"] = cursor
+            page = client.get(f"/review/{request_id}/comments", params=params).json()
+            seen += _thread_size(page["items"])
+            cursor = page["next_cursor"]
+            if not cursor:
+                return seen
+
+    assert benchmark.pedantic(walk, rounds=3) == COMMENTS_PER_TASK * len(TEAMS)
+
+
+def test_batch_post(benchmark, seeded, client):
+    _, request_id = seeded
+    body = {
+        "commenter_id": "legal@example.com",
+        "comments": [{"section": SECTIONS[i % len(SECTIONS)], "text": "Needs a DPIA", "team": TEAMS[i % len(TEAMS)],
+                      "anchor": f"field-{i}"} for i in range(50)],
+    }
+    response = benchmark(client.post, f"/review/{request_id}/comments/batch", json=body)
+    assert response.status_code == 200
+
+
+def test_single_posts_for_comparison(benchmark, seeded, client):
+    _, request_id = seeded
+
+    def post_each():
+        for i in range(50):
+            client.post(f"/review/{request_id}/comment", json={
+                "commenter_id": "legal@example.com", "section": SECTIONS[i % len(SECTIONS)],
+                "text": "Needs a DPIA", "team": TEAMS[i % len(TEAMS)],
+            })
+
+    benchmark.pedantic(post_each, rounds=3)
+
+
+def _thread_size(items):
+    return sum(1 + _thread_size(item["replies"]) for item in items)
@@ -0,0 +1,70 @@
+"""
+Cost of Idempotency-Key handling on POST /intake/.
+
+A fresh key adds a claim write and a completion write to the request.
+Replays are answered by the middleware without reaching a handler: from the
+in-memory LRU, or from ``idempotency_keys`` when the retry lands on another
+worker.
+
+    cd backend && python -m pytest benchmarks/bench_idempotency.py \
+        --benchmark-json=benchmarks/results/idempotency.json
+"""
+import itertools
+import os
+import tempfile
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/idempotency.db")
+os.environ.setdefault("ADMISSION_ENABLED", "0")
+
+from fastapi.testclient import TestClient
+
+from db.database import Base, get_engine
+from main import app
+from services.idempotency import idempotency_store
+
+PAYLOAD = {
+    "title": "Idempotency bench",
+    "description": "",
+    "requestor_name": "Bench",
+    "requestor_email": "bench@example.com",
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    Base.metadata.create_all(bind=get_engine())
+    return TestClient(app)
+
+
+def test_without_key(benchmark, client):
+    benchmark(lambda: client.post("/intake/", json=PAYLOAD))
+
+
+def test_fresh_key(benchmark, client):
+    keys = (f"fresh-{i}" for i in itertools.count())
+    benchmark(lambda: client.post("/intake/", json=PAYLOAD, headers={"Idempotency-Key": next(keys)}))
+
+
+def test_replay_from_lru(benchmark, client):
+    headers = {"Idempotency-Key": "replay-lru"}
+    client.post("/intake/", json=PAYLOAD, headers=headers)
+
+    def replay():
+        assert client.post("/intake/", json=PAYLOAD, headers=headers).headers["idempotent-replayed"] == "true"
+
+    benchmark(replay)
+
+
+def test_replay_from_table(benchmark, client):
+    headers = {"Idempotency-Key": "replay-table"}
+    client.post("/intake/", json=PAYLOAD, headers=headers)
+
+    def replay():
+        idempotency_store.clear()
+        assert client.post("/intake/", json=PAYLOAD, headers=headers).headers["idempotent-replayed"] == "true"
+
+    benchmark(replay)
@@ -0,0 +1,98 @@
+"""
+Measures the per-request cost of the metrics subsystem.
+
+Drives a small FastAPI app directly through ASGI (no network, no test client)
+with and without MetricsMiddleware, and runs SQL statements with and without
+the SQLAlchemy cursor hooks, then prints the added latency per request/query.
+
+    cd backend && python -m benchmarks.bench_metrics_overhead
+"""
+import argparse
+import asyncio
+import statistics
+from time import perf_counter
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from services.metrics import MetricsMiddleware, install_db_hooks, remove_db_hooks
+
+
+def build_app(db_engine):
+    app = FastAPI()
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        with db_engine.connect() as conn:
+            conn.execute(text("SELECT 1")).scalar()
+        return {"id": item_id}
+
+    return app
+
+
+async def drive(app, iterations: int):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/items/1", "raw_path": b"/items/1",
+        "query_string": b"", "root_path": "", "headers": [], "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    timings = []
+    for _ in range(iterations):
+        start = perf_counter()
+        await app(dict(scope), receive, send)
+        timings.append(perf_counter() - start)
+    return timings
+
+
+def summarize(label, timings):
+    timings = sorted(timings)
+    mean = statistics.fmean(timings) * 1e6
+    p50 = timings[len(timings) // 2] * 1e6
+    p99 = timings[int(len(timings) * 0.99)] * 1e6
+    print(f"{label:<28} mean={mean:8.1f}us p50={p50:8.1f}us p99={p99:8.1f}us")
+    return mean
+
+
+def bench_queries(db_engine, iterations):
+    with db_engine.connect() as conn:
+        start = perf_counter()
+        for _ in range(iterations):
+            conn.execute(text("SELECT 1")).scalar()
+        return (perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    db_engine = create_engine("sqlite://")
+    app = build_app(db_engine)
+    instrumented = MetricsMiddleware(app)
+
+    # Warm up routing, pydantic and the DB connection on both paths
+    remove_db_hooks()
+    asyncio.run(drive(app, 200))
+    base = summarize("baseline", asyncio.run(drive(app, args.iterations)))
+    install_db_hooks()
+    asyncio.run(drive(instrumented, 200))
+    inst = summarize("metrics middleware + hooks", asyncio.run(drive(instrumented, args.iterations)))
+    print(f"{'overhead per request':<28} {inst - base:8.1f}us ({(inst - base) / base * 100:.1f}%)")
+
+    remove_db_hooks()
+    plain = bench_queries(db_engine, args.iterations)
+    install_db_hooks()
+    hooked = bench_queries(db_engine, args.iterations)
+    print(f"{'overhead per SQL statement':<28} {hooked - plain:8.1f}us ({plain:.1f}us -> {hooked:.1f}us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Microbenchmarks for RiskScoringEngine, review routing and response serialization.
+
+Requires pytest-benchmark (see benchmarks/requirements.txt):
+
+    cd backend && python -m pytest benchmarks/bench_scoring.py \
+        --benchmark-json=benchmarks/results/micro.json
+    python -m benchmarks.gate benchmarks/results/micro.json benchmarks/baselines/micro.json
+"""
+import os
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from api.intake import IntakeRequestResponse
+from api.review import ReviewTaskResponse
+from api.scoring import RiskScoreResponse
+from benchmarks.datagen import SyntheticDataGenerator
+from db.database import Base
+from models.models import IntakeRequest, ReviewTask, RiskScore
+from services.review_policy import review_policy
+from services.risk_scoring import RiskScoringEngine
+
+FRAMEWORKS = ["nist", "soc2", "sox", "owasp", "maestro"]
+
+
+@pytest.fixture(scope="module")
+def generator():
+    return SyntheticDataGenerator(seed=7)
+
+
+@pytest.fixture(scope="module")
+def intake_requests(generator):
+    return [SimpleNamespace(id=str(uuid.uuid4()), details=generator.intake_payload()) for _ in range(1000)]
+
+
+@pytest.fixture(scope="module")
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as session:
+        yield session
+
+
+@pytest.mark.parametrize("framework", FRAMEWORKS)
+def test_framework_scorer(benchmark, intake_requests, framework):
+    scorer = getattr(RiskScoringEngine(), f"calculate_{framework}_score")
+    benchmark(lambda: [scorer(r) for r in intake_requests])
+
+
+def test_calculate_total_score(benchmark, db, generator):
+    payload = generator.intake_payload()
+    request = IntakeRequest(title=payload.pop("title"), description=payload.pop("description"),
+                            requestor_id=payload["requestor_email"], details=payload)
+    db.add(request)
+    db.commit()
+    engine = RiskScoringEngine()
+    benchmark(engine.calculate_total_score, request, db)
+
+
+def _intake_rows(generator, n):
+    now = datetime.utcnow()
+    rows = []
+    for _ in range(n):
+        payload = generator.intake_payload()
+        rows.append(IntakeRequest(
+            id=str(uuid.uuid4()), title=payload.pop("title"), description=payload.pop("description"),
+            requestor_id=payload["requestor_email"], status="reviewing", details=payload,
+            created_at=now, updated_at=now,
+        ))
+    return rows
+
+
+def test_serialize_intake_list(benchmark, generator):
+    rows = _intake_rows(generator, 500)
+    benchmark(lambda: [IntakeRequestResponse.model_validate(r).model_dump(mode="json") for r in rows])
+
+
+def test_serialize_review_tasks(benchmark):
+    now = datetime.utcnow()
+    tasks = [
+        ReviewTask(id=str(uuid.uuid4()), request_id=str(uuid.uuid4()), team="Legal", status="pending",
+                   comments=None, reviewer_id="legal@example.com", created_at=now, updated_at=now)
+        for _ in range(500)
+    ]
+    benchmark(lambda: [ReviewTaskResponse.model_validate(t).model_dump(mode="json") for t in tasks])
+
+
+def test_serialize_risk_scores(benchmark, generator):
+    now = datetime.utcnow()
+    scores = [RiskScore(**generator.score_row(str(uuid.uuid4()), generator.intake_payload(), now)) for _ in range(500)]
+    benchmark(lambda: [RiskScoreResponse.model_validate(s).model_dump(mode="json") for s in scores])
+
+
+def test_review_policy_backlog(benchmark, generator):
+    now = datetime.utcnow()
+    rows = []
+    for _ in range(10000):
+        score = generator.score_row(str(uuid.uuid4()), generator.intake_payload(), now)
+        rows.append((score["request_id"], *(score[f"{c}_score"] for c in FRAMEWORKS), score["total_score"]))
+    benchmark(lambda: sum(1 for _ in review_policy.evaluate_many(rows)))
@@ -0,0 +1,68 @@
+"""
+What-if re-weighting over 1M stored scores.
+
+Two portfolios: ``synthetic`` resamples rows the real scorers produce for
+generated intake payloads (a few thousand distinct score combinations), and
+``all_distinct`` uses uniform random scores, the worst case for row
+deduplication. Both must simulate within a second.
+
+    cd backend && python -m pytest benchmarks/bench_simulation.py \
+        --benchmark-json=benchmarks/results/simulation.json
+"""
+import os
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from benchmarks.datagen import SyntheticDataGenerator
+from services.risk_scoring import DEFAULT_WEIGHTS, FRAMEWORKS
+from services.simulation import ScoreMatrix, simulate
+
+REQUESTS = 1_000_000
+BUDGET_SECONDS = 1.0
+
+
+@pytest.fixture(scope="module")
+def portfolios():
+    generator = SyntheticDataGenerator(seed=5)
+    now = datetime.utcnow()
+    sample = []
+    for _ in range(20000):
+        row = generator.score_row("bench", generator.intake_payload(), now)
+        sample.append([row[f"{framework}_score"] for framework in FRAMEWORKS])
+    rng = np.random.default_rng(5)
+    sample = np.array(sample, dtype=np.uint8)
+    return {
+        "synthetic": sample[rng.integers(0, len(sample), REQUESTS)],
+        "all_distinct": rng.integers(0, 101, (REQUESTS, len(FRAMEWORKS)), dtype=np.uint8),
+    }
+
+
+def _weight_sets(n):
+    rng = np.random.default_rng(n)
+    sets = []
+    for _ in range(n):
+        raw = rng.random(len(FRAMEWORKS))
+        sets.append(dict(zip(FRAMEWORKS, (raw / raw.sum()).tolist())))
+    return sets
+
+
+@pytest.mark.parametrize("portfolio", ["synthetic", "all_distinct"])
+def test_load_matrix(benchmark, portfolios, portfolio):
+    matrix = benchmark(ScoreMatrix, portfolios[portfolio])
+    assert len(matrix) == REQUESTS
+
+
+@pytest.mark.parametrize("portfolio", ["synthetic", "all_distinct"])
+@pytest.mark.parametrize("weightings", [1, 8, 16])
+def test_simulate(benchmark, portfolios, portfolio, weightings):
+    matrix = ScoreMatrix(portfolios[portfolio])
+    weight_sets = _weight_sets(weightings)
+    result = benchmark(simulate, matrix, weight_sets, DEFAULT_WEIGHTS)
+    assert result["requests"] == REQUESTS
+    assert benchmark.stats.stats.max < BUDGET_SECONDS
@@ -0,0 +1,88 @@
+"""
+Per-tenant query latency as the number of tenants on a shared database grows.
+
+Every tenant gets the same ROWS_PER_TENANT requests, so a tenant's queries
+should cost the same with 1 tenant or 100: the tenant filter is added by the
+session hook and ``tenant_id`` leads every index, so a query only ever
+touches its own tenant's slice of the index.
+
+    cd backend && python -m pytest benchmarks/bench_tenancy.py \
+        --benchmark-json=benchmarks/results/tenancy.json
+"""
+import os
+import tempfile
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.datagen import SyntheticDataGenerator
+from db.database import Base
+from db.tenancy import tenant_scope
+from models.models import IntakeRequest, ReviewTask
+
+ROWS_PER_TENANT = 500
+TENANT_COUNTS = (1, 10, 100)
+
+
+@pytest.fixture(scope="module", params=TENANT_COUNTS, ids=lambda n: f"{n}_tenants")
+def sessions(request):
+    engine = create_engine(f"sqlite:///{tempfile.mkdtemp()}/tenancy.db")
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    db = Session()
+    for i in range(request.param):
+        with tenant_scope(f"tenant{i}"):
+            # Same seed for every tenant: identical data, so only the tenant count varies
+            SyntheticDataGenerator(seed=3).populate(db, ROWS_PER_TENANT, comments_per_task=(0, 0))
+    db.close()
+    yield Session
+    engine.dispose()
+
+
+def _open_requests(db):
+    return (
+        db.query(IntakeRequest)
+        .filter(IntakeRequest.status == "reviewing")
+        .order_by(IntakeRequest.created_at.desc())
+        .limit(50)
+        .all()
+    )
+
+
+def _open_tasks(db):
+    return db.query(ReviewTask).filter(ReviewTask.status == "pending", ReviewTask.reviewer_id.isnot(None)).all()
+
+
+def test_query_plan_uses_tenant_index(sessions):
+    db = sessions()
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        with tenant_scope("tenant0"):
+            _open_requests(db)
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    statement, parameters = captured[0]
+    plan = " ".join(row[-1] for row in db.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters))
+    db.close()
+    assert "ix_intake_requests_tenant_status" in plan, plan
+
+
+@pytest.mark.parametrize("query", [_open_requests, _open_tasks], ids=["open_requests", "open_tasks"])
+def test_tenant_query(benchmark, sessions, query):
+    db = sessions()
+    with tenant_scope("tenant0"):
+        rows = benchmark(query, db)
+        assert rows and all(row.tenant_id == "tenant0" for row in rows)
+    db.close()
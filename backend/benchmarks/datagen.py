@@ -0,0 +1,173 @@
+"""
+Seeded synthetic data for benchmarks and load tests.
+
+Produces intake requests whose ``details`` follow the intake form's option
+lists, plus review tasks, comments and risk scores, at any scale. Rows are
+written with bulk INSERTs in batches so millions of rows load in minutes.
+
+    cd backend && python -m benchmarks.datagen --database-url sqlite:///bench.db --requests 50000
+"""
+import argparse
+import random
+import uuid
+from datetime import datetime, timedelta
+from time import perf_counter
+from types import SimpleNamespace
+from typing import Dict, Iterator, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from db.database import Base
+from models.models import IntakeRequest, ReviewTask, Comment, RiskScore
+from services.risk_scoring import RiskScoringEngine
+
+MODELS = ["GPT-4", "GPT-3.5", "Claude 3 Opus", "Claude 3 Sonnet", "Gemini Pro", "Custom Model", "Other"]
+PROVIDERS = ["OpenAI", "Anthropic", "Google", "AWS Bedrock", "Azure OpenAI", "Self-Hosted"]
+USE_CASES = ["Chatbot", "Content Generation", "Data Analysis", "Code Generation", "Translation", "Automation", "Other"]
+DEPLOYMENT_TYPES = ["Cloud", "On-Premise", "Hybrid"]
+DATA_TYPES = ["PII", "PHI", "Financial", "Intellectual Property", "Public Data"]
+DATA_VOLUMES = ["Small", "Medium", "Large", "Very Large"]
+USER_BASES = ["Internal", "Partners", "Public"]
+TEAMS = ["Governance", "Cybersecurity", "Legal", "Compliance", "Architecture"]
+TASK_STATUSES = ["pending", "pending", "needs-info", "approved", "approved", "rejected"]
+SECTIONS = ["overview", "model", "data", "deployment", "security", "privacy"]
+WORDS = (
+    "model data access review vendor retention encryption prompt output audit risk control "
+    "customer internal pipeline latency training evaluation bias monitoring incident policy"
+).split()
+
+
+class SyntheticDataGenerator:
+    """Deterministic generator for intake, review and scoring data"""
+
+    def __init__(self, seed: int = 42):
+        self.rng = random.Random(seed)
+        self.scoring = RiskScoringEngine()
+
+    def _sentence(self, words: int) -> str:
+        return " ".join(self.rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+    def intake_payload(self) -> dict:
+        """A POST /intake/ body as the intake form would send it"""
+        n = self.rng.randint(1, 1000000)
+        return {
+            "title": f"{self.rng.choice(USE_CASES)} pilot {n}",
+            "description": " ".join(self._sentence(self.rng.randint(6, 14)) for _ in range(self.rng.randint(1, 4))),
+            "requestor_name": f"User {n % 5000}",
+            "requestor_email": f"user{n % 5000}@example.com",
+            "model_used": self.rng.choice(MODELS),
+            "model_provider": self.rng.choice(PROVIDERS),
+            "use_case": self.rng.choice(USE_CASES),
+            "deployment_type": self.rng.choice(DEPLOYMENT_TYPES),
+            "data_types": self.rng.sample(DATA_TYPES, self.rng.randint(1, 3)),
+            "data_volume": self.rng.choice(DATA_VOLUMES),
+            "expected_user_base": self.rng.choice(USER_BASES),
+            "business_impact": self.rng.choice(["", "Revenue reporting", "Customer support", "Internal tooling"]),
+        }
+
+    def comment_text(self) -> str:
+        return " ".join(self._sentence(self.rng.randint(5, 20)) for _ in range(self.rng.randint(1, 3)))
+
+    def score_row(self, request_id: str, details: dict, created_at: datetime) -> dict:
+        request = SimpleNamespace(id=request_id, details=details)
+        scores = {
+            "nist_score": self.scoring.calculate_nist_score(request),
+            "soc2_score": self.scoring.calculate_soc2_score(request),
+            "sox_score": self.scoring.calculate_sox_score(request),
+            "owasp_score": self.scoring.calculate_owasp_score(request),
+            "maestro_score": self.scoring.calculate_maestro_score(request),
+        }
+        total = int(sum(scores[f"{name}_score"] * weight for name, weight in self.scoring.weights.items()))
+        return dict(id=str(uuid.uuid4()), request_id=request_id, total_score=total, created_at=created_at, **scores)
+
+    def comment_rows(self, request_id: str, task_id: str, team: str, count: int, start: datetime,
+                     reply_ratio: float = 0.3) -> List[dict]:
+        """``count`` comments on one task, about ``reply_ratio`` of them replies to an earlier one"""
+        rows = []
+        created_at = start
+        for _ in range(count):
+            created_at += timedelta(minutes=self.rng.randint(1, 120))
+            parent = self.rng.choice(rows) if rows and self.rng.random() < reply_ratio else None
+            rows.append(dict(
+                id=str(uuid.uuid4()), task_id=task_id, request_id=request_id,
+                parent_id=parent["id"] if parent else None, commenter_id=f"{team.lower()}@example.com",
+                section=parent["section"] if parent else self.rng.choice(SECTIONS),
+                anchor=None, text=self.comment_text(), created_at=created_at,
+            ))
+        return rows
+
+    def batches(self, requests: int, tasks_per_request=(0, 4), comments_per_task=(0, 5),
+                batch_size: int = 1000, start: datetime = None) -> Iterator[Dict[str, List[dict]]]:
+        """Yield row batches for each table, ``batch_size`` intake requests at a time"""
+        start = start or datetime.utcnow() - timedelta(days=365)
+        for offset in range(0, requests, batch_size):
+            rows = {"intake": [], "scores": [], "tasks": [], "comments": []}
+            for _ in range(min(batch_size, requests - offset)):
+                payload = self.intake_payload()
+                created_at = start + timedelta(seconds=self.rng.randint(0, 365 * 86400))
+                request_id = str(uuid.uuid4())
+                title = payload.pop("title")
+                description = payload.pop("description")
+                teams = self.rng.sample(TEAMS, self.rng.randint(*tasks_per_request))
+                statuses = [self.rng.choice(TASK_STATUSES) for _ in teams]
+                if not teams:
+                    status = "submitted"
+                elif "rejected" in statuses:
+                    status = "denied"
+                elif all(s == "approved" for s in statuses):
+                    status = "approved"
+                else:
+                    status = "reviewing"
+                score = self.score_row(request_id, payload, created_at)
+                rows["scores"].append(score)
+                rows["intake"].append(dict(
+                    id=request_id, title=title, description=description,
+                    requestor_id=payload["requestor_email"], status=status, details=payload,
+                    risk_score=score["total_score"], created_at=created_at, updated_at=created_at,
+                ))
+                for team, task_status in zip(teams, statuses):
+                    task_id = str(uuid.uuid4())
+                    rows["tasks"].append(dict(
+                        id=task_id, request_id=request_id, reviewer_id=f"{team.lower()}{self.rng.randint(1, 8)}@example.com",
+                        team=team, status=task_status, comments=None, created_at=created_at, updated_at=created_at,
+                    ))
+                    rows["comments"].extend(self.comment_rows(
+                        request_id, task_id, team, self.rng.randint(*comments_per_task), created_at
+                    ))
+            yield rows
+
+    def populate(self, db: Session, requests: int, **kwargs) -> Dict[str, int]:
+        """Bulk insert ``requests`` intake requests with their tasks, comments and scores"""
+        counts = {"intake": 0, "scores": 0, "tasks": 0, "comments": 0}
+        tables = {"intake": IntakeRequest, "scores": RiskScore, "tasks": ReviewTask, "comments": Comment}
+        for rows in self.batches(requests, **kwargs):
+            for name in ("intake", "scores", "tasks", "comments"):
+                if rows[name]:
+                    db.execute(insert(tables[name]), rows[name])
+                    counts[name] += len(rows[name])
+            db.commit()
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load seeded synthetic data into a database")
+    parser.add_argument("--database-url", default="sqlite:///bench.db")
+    parser.add_argument("--requests", type=int, default=10000)
+    parser.add_argument("--max-tasks", type=int, default=4)
+    parser.add_argument("--max-comments", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(bind=engine)
+    start = perf_counter()
+    with Session(engine) as db:
+        counts = SyntheticDataGenerator(args.seed).populate(
+            db, args.requests, tasks_per_request=(0, args.max_tasks), comments_per_task=(0, args.max_comments)
+        )
+    print(f"Inserted {counts} in {perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
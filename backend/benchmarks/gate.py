@@ -0,0 +1,103 @@
+"""
+Regression gate for benchmark results.
+
+Compares a result file against a stored JSON baseline and exits non-zero when
+any operation's p95 latency grows, or throughput drops, by more than the
+tolerance, or when the run's error rate is above ``--max-error-rate``
+(default 0: any failed request fails the gate). Understands both load_e2e.py output and pytest-benchmark
+``--benchmark-json`` output; baselines are stored in a compact normalized form.
+
+    python -m benchmarks.gate RESULT BASELINE [--tolerance 0.2] [--max-error-rate 0]
+    python -m benchmarks.gate RESULT BASELINE --update   # accept RESULT as the new baseline
+"""
+import argparse
+import json
+import sys
+from typing import Dict
+
+
+def _p95(values):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+
+def normalize(result: dict) -> Dict[str, dict]:
+    """Map a result file to {operation: {"p95_ms": ..., "throughput": ..., "error_rate": ...}}"""
+    if "metrics" in result:  # a baseline written by --update
+        return result["metrics"]
+    if "benchmarks" in result:  # pytest-benchmark
+        metrics = {}
+        for bench in result["benchmarks"]:
+            stats = bench["stats"]
+            p95 = _p95(stats["data"]) if stats.get("data") else stats["q3"]
+            metrics[bench["name"]] = {"p95_ms": p95 * 1000, "throughput": stats["ops"]}
+        return metrics
+
+    metrics = {name: {"p95_ms": stats["p95_ms"]} for name, stats in result["operations"].items()}
+    requests = result.get("requests") or sum(stats["count"] for stats in result["operations"].values())
+    error_rate = result.get("error_rate", result.get("errors", 0) / requests if requests else 0.0)
+    metrics["scenario"] = {"throughput": result["throughput"]["requests_per_s"], "error_rate": error_rate}
+    return metrics
+
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], tolerance: float, max_error_rate: float = 0.0):
+    failures, lines = [], []
+    # Errors are judged against an absolute limit: failed requests are fast, so a
+    # broken run can otherwise pass on latency and throughput alone
+    for name, now in sorted(current.items()):
+        if "error_rate" in now:
+            lines.append(f"{name:<40} err {now['error_rate']:10.2%}")
+            if now["error_rate"] > max_error_rate:
+                failures.append(f"{name}: error rate {now['error_rate']:.2%} above {max_error_rate:.2%}")
+    for name, base in sorted(baseline.items()):
+        if name not in current:
+            failures.append(f"{name}: missing from results")
+            continue
+        now = current[name]
+        if "p95_ms" in base:
+            change = now["p95_ms"] / base["p95_ms"] - 1 if base["p95_ms"] else 0.0
+            lines.append(f"{name:<40} p95 {base['p95_ms']:10.3f}ms -> {now['p95_ms']:10.3f}ms ({change:+.1%})")
+            if change > tolerance:
+                failures.append(f"{name}: p95 regressed {change:+.1%}")
+        if "throughput" in base:
+            change = now["throughput"] / base["throughput"] - 1 if base["throughput"] else 0.0
+            lines.append(f"{name:<40} thr {base['throughput']:10.2f}/s -> {now['throughput']:10.2f}/s ({change:+.1%})")
+            if change < -tolerance:
+                failures.append(f"{name}: throughput regressed {change:+.1%}")
+    return failures, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when benchmark results regress against a baseline")
+    parser.add_argument("result")
+    parser.add_argument("baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression (default 0.2)")
+    parser.add_argument("--max-error-rate", type=float, default=0.0,
+                        help="Allowed fraction of failed requests (default 0)")
+    parser.add_argument("--update", action="store_true", help="Overwrite the baseline with the result")
+    args = parser.parse_args()
+
+    with open(args.result) as f:
+        current = normalize(json.load(f))
+
+    if args.update:
+        metrics = {name: {k: round(v, 4) for k, v in values.items()} for name, values in current.items()}
+        with open(args.baseline, "w") as f:
+            json.dump({"metrics": metrics}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline {args.baseline} updated")
+        return
+
+    with open(args.baseline) as f:
+        baseline = normalize(json.load(f))
+
+    failures, lines = compare(current, baseline, args.tolerance, args.max_error_rate)
+    print("\n".join(lines))
+    if failures:
+        print("\nRegressions:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("\nNo regressions beyond {:.0%}".format(args.tolerance))
+
+
+if __name__ == "__main__":
+    main()
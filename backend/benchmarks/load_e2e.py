@@ -0,0 +1,191 @@
+"""
+End-to-end load scenario: intake -> score -> multi-team review -> approve.
+
+Starts the API under uvicorn in a background thread (against DATABASE_URL,
+SQLite by default) or targets ``--base-url``, then runs the scenario from
+``--workers`` concurrent clients for ``--duration`` seconds and writes
+per-operation latency percentiles and throughput as JSON.
+
+Requests stay drafts, which the routing stage never touches. The scenario
+creates each team's task itself, and every approve finds exactly one task.
+
+    cd backend && python -m benchmarks.load_e2e --duration 30 --out benchmarks/results/e2e.json
+    python -m benchmarks.gate benchmarks/results/e2e.json benchmarks/baselines/e2e_sqlite.json
+"""
+import argparse
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+import httpx
+
+REVIEW_TEAMS = ["Cybersecurity", "Legal", "Compliance", "Architecture"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ScenarioRunner:
+    """Runs the review lifecycle repeatedly and records latency per operation"""
+
+    def __init__(self, base_url: str, seed: int):
+        from benchmarks.datagen import SyntheticDataGenerator
+
+        self.base_url = base_url
+        self.seed = seed
+        self.generator_class = SyntheticDataGenerator
+        self.latencies = defaultdict(list)
+        self.requests = 0
+        self.errors = 0
+        self.scenarios = 0
+        self.failed_scenarios = 0
+        self._lock = threading.Lock()
+
+    def _call(self, client, name, method, url, **kwargs):
+        start = perf_counter()
+        try:
+            response = client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            # Timeouts and dropped connections fail the run like 4xx/5xx do
+            with self._lock:
+                self.requests += 1
+                self.errors += 1
+            raise
+        elapsed = (perf_counter() - start) * 1000
+        with self._lock:
+            self.requests += 1
+            self.latencies[name].append(elapsed)
+            if response.status_code >= 400:
+                self.errors += 1
+        response.raise_for_status()
+        return response
+
+    def scenario(self, client, generator):
+        request_id = self._call(client, "create_intake", "POST", "/intake/", json=generator.intake_payload()).json()["id"]
+        self._call(client, "compute_score", "POST", f"/scoring/{request_id}/compute")
+        for team in REVIEW_TEAMS:
+            self._call(client, "create_review_task", "POST", f"/review/{request_id}/create-task",
+                       json={"reviewer_id": f"{team.lower()}@example.com", "team": team})
+        self._call(client, "get_review_tasks", "GET", f"/review/{request_id}/tasks")
+        self._call(client, "add_comment", "POST", f"/review/{request_id}/comment",
+                   json={"commenter_id": "legal@example.com", "section": "data", "text": generator.comment_text()})
+        for team in REVIEW_TEAMS:
+            self._call(client, "approve", "POST", f"/review/{request_id}/approve",
+                       json={"reviewer_id": f"{team.lower()}@example.com", "team": team})
+        self._call(client, "get_intake", "GET", f"/intake/{request_id}")
+        self._call(client, "get_score", "GET", f"/scoring/{request_id}")
+
+    def worker(self, worker_id: int, deadline: float):
+        generator = self.generator_class(self.seed + worker_id)
+        with httpx.Client(base_url=self.base_url, timeout=30) as client:
+            while time.monotonic() < deadline:
+                failed = False
+                try:
+                    self.scenario(client, generator)
+                except httpx.HTTPError:
+                    failed = True
+                with self._lock:
+                    self.scenarios += 1
+                    self.failed_scenarios += failed
+
+    def run(self, workers: int, duration: float) -> dict:
+        deadline = time.monotonic() + duration
+        start = perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for worker_id in range(workers):
+                pool.submit(self.worker, worker_id, deadline)
+        elapsed = perf_counter() - start
+        # Throughput counts every request and scenario that ran, failed or not, so it
+        # measures load alone; failures are gated separately through error_rate
+        return {
+            "scenario": "intake_score_review_approve",
+            "workers": workers,
+            "duration_s": round(elapsed, 2),
+            "requests": self.requests,
+            "errors": self.errors,
+            "error_rate": round(self.errors / self.requests, 6) if self.requests else 0.0,
+            "failed_scenarios": self.failed_scenarios,
+            "throughput": {
+                "scenarios_per_s": round(self.scenarios / elapsed, 2),
+                "requests_per_s": round(self.requests / elapsed, 2),
+            },
+            "operations": {
+                name: {
+                    "count": len(values),
+                    "mean_ms": round(sum(values) / len(values), 3),
+                    "p50_ms": round(percentile(values, 50), 3),
+                    "p95_ms": round(percentile(values, 95), 3),
+                    "p99_ms": round(percentile(values, 99), 3),
+                }
+                for name, values in sorted(self.latencies.items())
+            },
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_local_server():
+    """Serve main:app on a free port from a daemon thread"""
+    import uvicorn
+
+    port = _free_port()
+    config = uvicorn.Config("main:app", host="127.0.0.1", port=port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the end-to-end review lifecycle load scenario")
+    parser.add_argument("--base-url", help="Target a running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="benchmarks/results/e2e.json")
+    args = parser.parse_args()
+
+    server = thread = None
+    base_url = args.base_url
+    if not base_url:
+        os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/load_e2e.db")
+        os.environ.setdefault("DB_AUTO_CREATE", "1")
+        # All workers share one client address; measure raw capacity, not the rate limits
+        os.environ.setdefault("ADMISSION_ENABLED", "0")
+        server, thread, base_url = start_local_server()
+
+    try:
+        result = ScenarioRunner(base_url, args.seed).run(args.workers, args.duration)
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join()
+
+    result["database"] = os.environ.get("DATABASE_URL", "").split(":", 1)[0] if not args.base_url else "remote"
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(json.dumps(result["throughput"]), f"errors={result['errors']}")
+    for name, stats in result["operations"].items():
+        print(f"  {name:<20} p50={stats['p50_ms']:8.2f}ms p95={stats['p95_ms']:8.2f}ms n={stats['count']}")
+
+
+if __name__ == "__main__":
+    main()
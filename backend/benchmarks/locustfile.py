@@ -0,0 +1,65 @@
+"""
+Locust version of the review lifecycle scenario, for distributed or long runs.
+
+    cd backend && PYTHONPATH=. locust -f benchmarks/locustfile.py --host http://localhost:8000 \
+        --users 50 --spawn-rate 10 --run-time 5m --headless --json > benchmarks/results/locust.json
+
+Readers (reviewers polling task lists) and writers (requestors submitting and
+teams approving) are separate user classes so their mix can be tuned. As in
+load_e2e, requests stay drafts, so auto-routing never adds tasks of its own.
+"""
+import random
+
+from locust import HttpUser, between, task
+
+from benchmarks.datagen import SyntheticDataGenerator
+from benchmarks.load_e2e import REVIEW_TEAMS
+
+
+class RequestorUser(HttpUser):
+    """Submits a request and drives it through scoring, review and approval"""
+
+    weight = 1
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        self.generator = SyntheticDataGenerator(random.randint(0, 1_000_000))
+        self.request_ids = []
+
+    @task
+    def review_lifecycle(self):
+        response = self.client.post("/intake/", json=self.generator.intake_payload(), name="/intake/")
+        if response.status_code != 200:
+            return
+        request_id = response.json()["id"]
+        self.request_ids.append(request_id)
+        self.client.post(f"/scoring/{request_id}/compute", name="/scoring/[id]/compute")
+        for team in REVIEW_TEAMS:
+            self.client.post(f"/review/{request_id}/create-task", name="/review/[id]/create-task",
+                             json={"reviewer_id": f"{team.lower()}@example.com", "team": team})
+        self.client.post(f"/review/{request_id}/comment", name="/review/[id]/comment",
+                         json={"commenter_id": "legal@example.com", "section": "data",
+                               "text": self.generator.comment_text()})
+        for team in REVIEW_TEAMS:
+            self.client.post(f"/review/{request_id}/approve", name="/review/[id]/approve",
+                             json={"reviewer_id": f"{team.lower()}@example.com", "team": team})
+
+
+class ReviewerUser(HttpUser):
+    """Polls the pending queue and opens requests, as the reviewer dashboard does"""
+
+    weight = 3
+    wait_time = between(1, 3)
+
+    @task(3)
+    def pending_queue(self):
+        response = self.client.get("/review/pending", name="/review/pending")
+        if response.status_code == 200 and response.json():
+            task_row = random.choice(response.json())
+            self.client.get(f"/intake/{task_row['request_id']}", name="/intake/[id]")
+            self.client.get(f"/review/{task_row['request_id']}/tasks", name="/review/[id]/tasks")
+            self.client.get(f"/scoring/{task_row['request_id']}", name="/scoring/[id]")
+
+    @task(1)
+    def list_requests(self):
+        self.client.get("/intake/", name="/intake/")
@@ -0,0 +1,61 @@
+"""
+Concurrent intake and review throughput of the SQLite profiles, side by side.
+
+Runs ``load_e2e`` once per profile, each in its own process on a fresh
+database file: the stock engine (``SQLITE_PROFILE=default``), the tuned
+profile without group commit, and the tuned profile with it. Then it
+prints overall throughput and the create_intake and approve latencies.
+
+    cd backend && python -m benchmarks.sqlite_profiles --workers 16 --duration 20
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+PROFILES = {
+    "default": {"SQLITE_PROFILE": "default"},
+    "tuned": {"SQLITE_PROFILE": "tuned", "WRITE_BATCHING": "0"},
+    "tuned+batching": {"SQLITE_PROFILE": "tuned", "WRITE_BATCHING": "1"},
+}
+WRITE_OPERATIONS = ("create_intake", "approve")
+
+
+def run_profile(name: str, overrides: dict, workers: int, duration: float, out_dir: str) -> dict:
+    workdir = tempfile.mkdtemp()
+    out = os.path.join(out_dir, f"sqlite_{name.replace('+', '_')}.json")
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{workdir}/profile.db", DB_AUTO_CREATE="1", **overrides)
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.load_e2e", "--workers", str(workers), "--duration", str(duration),
+         "--out", out],
+        env=env, check=True, stdout=subprocess.DEVNULL,
+    )
+    with open(out) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare load_e2e throughput across SQLite profiles")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--out-dir", default="benchmarks/results")
+    parser.add_argument("--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES))
+    args = parser.parse_args()
+    os.makedirs(args.out_dir, exist_ok=True)
+
+    results = {name: run_profile(name, PROFILES[name], args.workers, args.duration, args.out_dir)
+               for name in args.profiles}
+    baseline = results[args.profiles[0]]["throughput"]["requests_per_s"] or 1
+    print(f"{'profile':<16} {'req/s':>8} {'vs ' + args.profiles[0]:>12} {'errors':>7}"
+          + "".join(f" {op + ' p95':>20}" for op in WRITE_OPERATIONS))
+    for name, result in results.items():
+        rps = result["throughput"]["requests_per_s"]
+        p95s = [result["operations"].get(op, {}).get("p95_ms", 0.0) for op in WRITE_OPERATIONS]
+        print(f"{name:<16} {rps:>8.1f} {rps / baseline:>11.2f}x {result['errors']:>7}"
+              + "".join(f" {p95:>18.1f}ms" for p95 in p95s))
+
+
+if __name__ == "__main__":
+    main()
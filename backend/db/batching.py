@@ -0,0 +1,135 @@
+"""
+Group commit for the tuned SQLite profile.
+
+Handlers hand their writes to ``write_batcher.run(unit)`` as a function of a
+session instead of committing themselves. A single thread owns the writer
+connection; it takes every unit queued so far and runs each inside its own
+SAVEPOINT, all in one transaction. Then it commits once and wakes the
+callers. A failing unit rolls back to its savepoint and gets its own
+exception; the rest of the batch still commits. Nothing waits for a batch
+to fill: an idle server commits each unit alone, and under load the queue
+grows while the previous batch commits.
+
+Units run under the caller's contextvars (tenant included) and the identity
+map is cleared between them, so units never see each other's objects. They
+must return plain values, not ORM instances.
+
+Everywhere else (PostgreSQL, routed tenants, WRITE_BATCHING=0) ``run``
+executes the unit in a session of its own and commits.
+"""
+import contextvars
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, TypeVar
+
+from sqlalchemy.orm import Session
+
+from db import database, sqlite
+from db.tenancy import get_current_tenant
+
+logger = logging.getLogger("aigrc.batching")
+
+WRITE_BATCHING = os.getenv("WRITE_BATCHING", "1") == "1"
+WRITE_BATCH_MAX = int(os.getenv("WRITE_BATCH_MAX", "64"))
+
+T = TypeVar("T")
+
+
+class WriteBatcher:
+    def __init__(self, max_batch: int = WRITE_BATCH_MAX, enabled: bool = None):
+        self.max_batch = max_batch
+        self._enabled = enabled
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        if self._enabled is None:
+            self._enabled = WRITE_BATCHING and sqlite.is_tuned(database.DATABASE_URL)
+        return self._enabled
+
+    def run(self, unit: Callable[[Session], T]) -> T:
+        """Apply ``unit`` and commit; returns its result once the commit is durable"""
+        if not self.enabled or database.engine_registry.is_routed(get_current_tenant()):
+            return self._run_alone(unit)
+        future: Future = Future()
+        self._ensure_thread()
+        self._queue.put((contextvars.copy_context(), unit, future))
+        return future.result()
+
+    @staticmethod
+    def _run_alone(unit):
+        db = database.tenant_session()
+        try:
+            result = unit(db)
+            db.commit()
+            return result
+        except BaseException:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _ensure_thread(self):
+        # Started lazily, and again in a forked worker, which inherits no threads
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is None or self._pid != os.getpid():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._loop, name="write-batcher", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._commit(batch)
+
+    def _commit(self, batch):
+        try:
+            database.get_engine()
+            db = database.SessionLocal()
+        except BaseException as exc:
+            for _, _, future in batch:
+                future.set_exception(exc)
+            return
+        done = []
+        try:
+            for context, unit, future in batch:
+                try:
+                    done.append((future, context.run(self._apply, db, unit)))
+                except BaseException as exc:
+                    future.set_exception(exc)
+            db.commit()
+        except BaseException as exc:
+            logger.exception("Batched commit of %d units failed", len(done))
+            db.rollback()
+            for future, _ in done:
+                future.set_exception(exc)
+            return
+        finally:
+            db.close()
+        for future, result in done:
+            future.set_result(result)
+
+    @staticmethod
+    def _apply(db: Session, unit):
+        try:
+            with db.begin_nested():
+                return unit(db)
+        finally:
+            db.expunge_all()
+
+
+write_batcher = WriteBatcher()
@@ -0,0 +1,44 @@
+"""
+Text value of a top-level key in a JSON column, as one SQL expression on every dialect.
+
+``json_text(IntakeRequest.details, "model_provider")`` compiles to
+``json_extract(details, '$.model_provider')`` on SQLite (JSON1) and to
+``(details ->> 'model_provider')`` on PostgreSQL. The same construct is used
+in both the index definition and the query filter, so the two match
+exactly and the planner can use the expression index.
+"""
+import re
+
+from sqlalchemy import String
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import coercions, roles
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+_KEY = re.compile(r"^\w+$")
+
+
+class json_text(ColumnElement):
+    inherit_cache = True
+    type = String()
+    _traverse_internals = [
+        ("column", InternalTraversal.dp_clauseelement),
+        ("key", InternalTraversal.dp_string),
+    ]
+
+    def __init__(self, column, key: str):
+        # The key is inlined into the SQL (index expressions cannot take bound parameters)
+        if not _KEY.match(key):
+            raise ValueError(f"Invalid JSON key: {key!r}")
+        self.column = coercions.expect(roles.ExpressionElementRole, column)
+        self.key = key
+
+
+@compiles(json_text)
+def _compile_json_text(element, compiler, **kw):
+    return f"json_extract({compiler.process(element.column, **kw)}, '$.{element.key}')"
+
+
+@compiles(json_text, "postgresql")
+def _compile_json_text_postgresql(element, compiler, **kw):
+    return f"({compiler.process(element.column, **kw)} ->> '{element.key}')"
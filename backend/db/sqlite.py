@@ -0,0 +1,90 @@
+"""
+Tuned SQLite profile for edge and dev installs.
+
+With the stock engine every pooled connection may try to write, so
+concurrent writers collide on SQLite's single write lock and spin in
+busy-waits. Under the default rollback journal every commit also fsyncs.
+With SQLITE_PROFILE=tuned (the default for file databases):
+
+* WAL journal and ``synchronous=NORMAL``. Readers never block the writer
+  and a commit appends to the WAL without an fsync (checkpoints still
+  sync). A power cut can lose the last commits but never corrupts the
+  file.
+* mmap'd reads, a larger page cache and in-memory temp tables.
+* One writer connection (pool of 1) that opens every transaction with
+  ``BEGIN IMMEDIATE``. Writers queue on the pool in order, instead of
+  racing for the lock and failing with SQLITE_BUSY on upgrade.
+* A separate read pool of ``query_only`` connections for GET requests.
+  WAL gives each of them a consistent snapshot while the writer commits.
+
+SQLite's ``BEGIN`` is issued by SQLAlchemy rather than by the sqlite3 module
+(``isolation_level=None``), which is also what makes SAVEPOINTs usable for
+db/batching.py.
+"""
+import os
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "tuned").lower()
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_KIB = int(os.getenv("SQLITE_CACHE_KIB", "65536"))
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", "8"))
+# How long a writer waits for the single writer connection
+SQLITE_WRITER_TIMEOUT = float(os.getenv("SQLITE_WRITER_TIMEOUT", "30"))
+
+
+def is_tuned(url: str) -> bool:
+    """Tuned profile applies to file databases only; an in-memory DB cannot be shared by two pools"""
+    if SQLITE_PROFILE != "tuned":
+        return False
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return False
+    return parsed.database not in (None, "", ":memory:") and parsed.query.get("mode") != "memory"
+
+
+def _pragmas(read_only: bool):
+    pragmas = [
+        f"busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}",
+        "synchronous = NORMAL",
+        f"mmap_size = {SQLITE_MMAP_BYTES}",
+        f"cache_size = -{SQLITE_CACHE_KIB}",
+        "temp_store = MEMORY",
+    ]
+    # journal_mode is stored in the file; only the writer needs to switch it
+    return pragmas + ["query_only = ON"] if read_only else ["journal_mode = WAL"] + pragmas
+
+
+def _install(engine, read_only: bool):
+    pragmas = _pragmas(read_only)
+    begin = "BEGIN" if read_only else "BEGIN IMMEDIATE"
+
+    @event.listens_for(engine, "connect")
+    def _configure(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+    @event.listens_for(engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql(begin)
+
+    return engine
+
+
+def create_writer_engine(url: str):
+    return _install(create_engine(
+        url, pool_size=1, max_overflow=0, pool_timeout=SQLITE_WRITER_TIMEOUT,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+    ), read_only=False)
+
+
+def create_reader_engine(url: str):
+    return _install(create_engine(
+        url, pool_size=SQLITE_READ_POOL_SIZE, max_overflow=SQLITE_READ_POOL_SIZE,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+    ), read_only=True)
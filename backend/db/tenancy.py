@@ -0,0 +1,195 @@
+"""
+Tenant scoping for every ORM model.
+
+The current tenant lives in a contextvar, which TenantMiddleware sets for
+each request from an authenticated source only:
+
+* ``Authorization: Bearer <token>``, where the token carries the tenant as a
+  claim signed with TENANT_TOKEN_SECRET (see ``issue_tenant_token``).
+* The X-Tenant-ID header, but only from a peer listed in
+  TENANT_TRUSTED_PROXIES (a gateway that has already authenticated the
+  caller). From anyone else the header is rejected with 403.
+
+Requests with neither get DEFAULT_TENANT. Two session hooks then apply the
+tenant everywhere:
+
+* ``do_orm_execute`` adds ``with_loader_criteria(TenantScoped, tenant_id == t)``
+  to every ORM SELECT, UPDATE and DELETE, including relationship lazy loads.
+  Handlers never filter by tenant themselves.
+* ``before_flush`` stamps the tenant on new objects. Bulk ``insert(Model)``
+  rows get it from the column default, which reads the same contextvar.
+
+Periodic jobs run once per tenant inside ``tenant_scope``. Queries that
+really must span tenants opt out with the ``include_all_tenants`` execution
+option.
+"""
+import base64
+import hashlib
+import hmac
+import ipaddress
+import os
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import Column, String, event
+from sqlalchemy.orm import Session, with_loader_criteria
+
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT_ID", "default")
+TENANT_HEADER = os.getenv("TENANT_HEADER", "X-Tenant-ID")
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+# Signs tenant tokens; unset disables bearer tokens
+TENANT_TOKEN_SECRET = os.getenv("TENANT_TOKEN_SECRET") or None
+TENANT_TOKEN_TTL_SECONDS = int(os.getenv("TENANT_TOKEN_TTL_SECONDS", "3600"))
+# Comma-separated addresses or CIDRs allowed to assert the tenant header
+TENANT_TRUSTED_PROXIES = os.getenv("TENANT_TRUSTED_PROXIES", "")
+
+# Execution option that disables tenant filtering for one statement
+INCLUDE_ALL_TENANTS = "include_all_tenants"
+
+_current_tenant: ContextVar[str] = ContextVar("current_tenant", default=DEFAULT_TENANT)
+
+
+def get_current_tenant() -> str:
+    return _current_tenant.get()
+
+
+def set_current_tenant(tenant_id: str):
+    """Returns a token for ``reset_current_tenant``"""
+    return _current_tenant.set(tenant_id)
+
+
+def reset_current_tenant(token):
+    _current_tenant.reset(token)
+
+
+@contextmanager
+def tenant_scope(tenant_id: str):
+    token = _current_tenant.set(tenant_id)
+    try:
+        yield tenant_id
+    finally:
+        _current_tenant.reset(token)
+
+
+class TenantScoped:
+    """Mixin for tenant-owned tables; ``tenant_id`` must lead every index on them"""
+
+    tenant_id = Column(String, nullable=False, default=get_current_tenant)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _filter_by_tenant(execute_state):
+    if not (execute_state.is_select or execute_state.is_update or execute_state.is_delete):
+        return
+    # Column and relationship loads inherit the criteria from the statement that loaded the parent
+    if execute_state.is_column_load or execute_state.is_relationship_load:
+        return
+    if execute_state.execution_options.get(INCLUDE_ALL_TENANTS):
+        return
+    tenant_id = get_current_tenant()
+    execute_state.statement = execute_state.statement.options(
+        with_loader_criteria(TenantScoped, lambda cls: cls.tenant_id == tenant_id, include_aliases=True)
+    )
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_tenant(session, flush_context, instances):
+    tenant_id = get_current_tenant()
+    for obj in session.new:
+        if isinstance(obj, TenantScoped) and obj.tenant_id is None:
+            obj.tenant_id = tenant_id
+
+
+def _sign(secret: str, payload: str) -> str:
+    digest = hmac.new(secret.encode(), payload.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def issue_tenant_token(tenant_id: str, ttl: int = TENANT_TOKEN_TTL_SECONDS, secret: str = None) -> str:
+    """A bearer token whose tenant claim TenantMiddleware trusts: ``<tenant>.<expiry>.<signature>``"""
+    secret = secret or TENANT_TOKEN_SECRET
+    if not secret:
+        raise RuntimeError("TENANT_TOKEN_SECRET is not set")
+    if not TENANT_ID_PATTERN.match(tenant_id):
+        raise ValueError(f"Invalid tenant id: {tenant_id!r}")
+    payload = f"{tenant_id}.{int(time.time()) + ttl}"
+    return f"{payload}.{_sign(secret, payload)}"
+
+
+def verify_tenant_token(token: str, secret: str):
+    """The token's tenant, or None if it is malformed, forged or expired"""
+    try:
+        tenant_id, expires, signature = token.split(".")
+        expired = int(expires) < time.time()
+    except ValueError:
+        return None
+    if expired or not hmac.compare_digest(signature, _sign(secret, f"{tenant_id}.{expires}")):
+        return None
+    return tenant_id if TENANT_ID_PATTERN.match(tenant_id) else None
+
+
+def _parse_proxies(spec: str):
+    return [ipaddress.ip_network(entry.strip(), strict=False) for entry in spec.split(",") if entry.strip()]
+
+
+class TenantMiddleware:
+    """Pure ASGI middleware binding the request's authenticated tenant for its whole lifetime"""
+
+    def __init__(self, app, secret: str = TENANT_TOKEN_SECRET, trusted_proxies: str = TENANT_TRUSTED_PROXIES):
+        self.app = app
+        self.header = TENANT_HEADER.lower().encode()
+        self.secret = secret
+        self.trusted_proxies = _parse_proxies(trusted_proxies)
+
+    def _trusted_peer(self, scope) -> bool:
+        client = scope.get("client")
+        if not client or not self.trusted_proxies:
+            return False
+        try:
+            address = ipaddress.ip_address(client[0])
+        except ValueError:
+            return False
+        return any(address in network for network in self.trusted_proxies)
+
+    def _resolve(self, scope):
+        """(tenant, None), or (None, (status, detail)) when the request must be refused"""
+        asserted = bearer = None
+        for name, value in scope["headers"]:
+            if name == self.header:
+                asserted = value.decode("latin-1").strip()
+            elif name == b"authorization" and value[:7].lower() == b"bearer ":
+                bearer = value[7:].decode("latin-1").strip()
+
+        if bearer is not None and self.secret:
+            tenant_id = verify_tenant_token(bearer, self.secret)
+            if tenant_id is None:
+                return None, (401, "Invalid or expired tenant token")
+            if asserted is not None and asserted != tenant_id:
+                return None, (403, "Tenant header does not match the token")
+            return tenant_id, None
+        if asserted is not None:
+            if not self._trusted_peer(scope):
+                return None, (403, "Tenant header is only accepted from trusted proxies")
+            if not TENANT_ID_PATTERN.match(asserted):
+                return None, (400, "Invalid tenant id")
+            return asserted, None
+        return DEFAULT_TENANT, None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        tenant_id, refusal = self._resolve(scope)
+        if refusal is not None:
+            status, detail = refusal
+            await send({"type": "http.response.start", "status": status,
+                        "headers": [(b"content-type", b"application/json")]})
+            await send({"type": "http.response.body", "body": f'{{"detail":"{detail}"}}'.encode()})
+            return
+        token = set_current_tenant(tenant_id)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            reset_current_tenant(token)
@@ -1,13 +1,61 @@
-from fastapi import FastAPI
+import logging
+import math
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from api import intake, review, scoring, ai
-from db.database import engine, Base
+from api import intake, review, scoring, ai, admin, evidence
+from db.database import Base, get_engine, dispose_engine, check_database
+from db.tenancy import TenantMiddleware
+from services.admission import AdmissionMiddleware
+from services.cache import response_cache
+from services.idempotency import IdempotencyMiddleware
+from services.metrics import MetricsMiddleware, render_metrics
+from services.profiling import ProfilingMiddleware
+from services.periodic import scheduler
+
+logger = logging.getLogger("aigrc")
+
+# Schema is managed by Alembic (`alembic upgrade head`); DB_AUTO_CREATE=1 is for throwaway dev/test databases
+DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "0") == "1"
+# Leader-elected jobs (services/jobs.py); server.py turns this on
+ENABLE_PERIODIC_TASKS = os.getenv("ENABLE_PERIODIC_TASKS", "0") == "1"
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if DB_AUTO_CREATE:
+        await run_in_threadpool(Base.metadata.create_all, bind=get_engine())
+    # Warm one pooled connection, but never refuse to start: /ready reports the DB state
+    if not await run_in_threadpool(check_database):
+        logger.warning("Database is not reachable at startup; serving with /ready=503 until it is")
+    if ENABLE_PERIODIC_TASKS:
+        import services.jobs  # noqa: F401  registers the jobs
+        scheduler.start()
+    yield
+    scheduler.stop()
+    dispose_engine()
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+app = FastAPI(title="AI Intake Governance Platform", version="1.0.0", lifespan=lifespan)
 
-app = FastAPI(title="AI Intake Governance Platform", version="1.0.0")
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError):
+    """The default 422, except that NaN/Infinity inputs (the JSON decoder accepts them) are echoed as strings"""
+    encoder = {float: lambda value: value if math.isfinite(value) else str(value)}
+    return JSONResponse(status_code=422, content={"detail": jsonable_encoder(exc.errors(), custom_encoder=encoder)})
 
+# Inside admission so a rate-limited retry never touches the key table
+app.add_middleware(IdempotencyMiddleware)
+# Inside TenantMiddleware for the per-tenant tier, inside metrics so 429s are counted
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(TenantMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+# Added last, so outermost: 401/403/409/429/503 answered by the layers above carry CORS headers too
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -20,6 +68,8 @@ app.include_router(intake.router, prefix="/intake", tags=["intake"])
 app.include_router(review.router, prefix="/review", tags=["review"])
 app.include_router(scoring.router, prefix="/scoring", tags=["scoring"])
 app.include_router(ai.router, prefix="/ai", tags=["ai"])
+app.include_router(evidence.router, prefix="/evidence", tags=["evidence"])
+app.include_router(admin.router, prefix="/admin", tags=["admin"])
 
 @app.get("/")
 def read_root():
@@ -28,3 +78,25 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/live")
+def liveness():
+    """Process is up and serving; never touches the database"""
+    return {"status": "alive"}
+
+@app.get("/ready")
+def readiness(response: Response):
+    """Ready to take traffic only when the database answers"""
+    if not check_database():
+        response.status_code = 503
+        return {"status": "unavailable", "database": "unreachable"}
+    return {"status": "ready", "database": "ok"}
+
+@app.get("/cache/stats")
+def cache_stats():
+    return response_cache.stats()
+
+@app.get("/metrics")
+def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
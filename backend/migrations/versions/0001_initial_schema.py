@@ -0,0 +1,144 @@
+"""initial schema
+
+Matches the tables the app used to create with ``Base.metadata.create_all``
+at import time. Databases created that way (such as the checked-in
+``sql_app.db``, which predates ``compliance_checklists``) are upgraded with
+plain ``alembic upgrade head``: tables that already exist are left alone and
+only the missing ones are created.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19 00:25:37.409046
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _missing(table: str) -> bool:
+    # Offline (--sql) runs cannot inspect, and emit the full baseline
+    return context.is_offline_mode() or not sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _missing('audit_logs'):
+        op.create_table('audit_logs',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('request_id', sa.String(), nullable=True),
+        sa.Column('user_id', sa.String(), nullable=True),
+        sa.Column('action', sa.String(), nullable=False),
+        sa.Column('metadata', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing('users'):
+        op.create_table('users',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('role', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('email')
+        )
+    if _missing('intake_requests'):
+        op.create_table('intake_requests',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('requestor_id', sa.String(), nullable=True),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('details', sa.JSON(), nullable=True),
+        sa.Column('risk_score', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['requestor_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing('compliance_checklists'):
+        op.create_table('compliance_checklists',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('request_id', sa.String(), nullable=True),
+        sa.Column('framework', sa.String(), nullable=False),
+        sa.Column('questions', sa.JSON(), nullable=True),
+        sa.Column('completed', sa.Boolean(), nullable=True),
+        sa.Column('completed_by', sa.String(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['completed_by'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['request_id'], ['intake_requests.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing('intake_request_versions'):
+        op.create_table('intake_request_versions',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('request_id', sa.String(), nullable=True),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('json_data', sa.JSON(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['request_id'], ['intake_requests.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing('review_tasks'):
+        op.create_table('review_tasks',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('request_id', sa.String(), nullable=True),
+        sa.Column('reviewer_id', sa.String(), nullable=True),
+        sa.Column('team', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=True),
+        sa.Column('comments', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['request_id'], ['intake_requests.id'], ),
+        sa.ForeignKeyConstraint(['reviewer_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing('risk_scores'):
+        op.create_table('risk_scores',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('request_id', sa.String(), nullable=True),
+        sa.Column('nist_score', sa.Integer(), nullable=True),
+        sa.Column('soc2_score', sa.Integer(), nullable=True),
+        sa.Column('sox_score', sa.Integer(), nullable=True),
+        sa.Column('owasp_score', sa.Integer(), nullable=True),
+        sa.Column('maestro_score', sa.Integer(), nullable=True),
+        sa.Column('total_score', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['request_id'], ['intake_requests.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+    if _missing('comments'):
+        op.create_table('comments',
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('task_id', sa.String(), nullable=True),
+        sa.Column('commenter_id', sa.String(), nullable=True),
+        sa.Column('section', sa.String(), nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['commenter_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['task_id'], ['review_tasks.id'], ),
+        sa.PrimaryKeyConstraint('id')
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('comments')
+    op.drop_table('risk_scores')
+    op.drop_table('review_tasks')
+    op.drop_table('intake_request_versions')
+    op.drop_table('compliance_checklists')
+    op.drop_table('intake_requests')
+    op.drop_table('users')
+    op.drop_table('audit_logs')
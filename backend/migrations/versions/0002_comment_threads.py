@@ -0,0 +1,50 @@
+"""comment threads
+
+Adds ``parent_id`` and ``anchor`` to comments, denormalizes ``request_id``
+from the owning review task and indexes it for keyset pagination.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 01:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.add_column(sa.Column('request_id', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('parent_id', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('anchor', sa.String(), nullable=True))
+        batch_op.create_foreign_key('fk_comments_request_id', 'intake_requests', ['request_id'], ['id'])
+        batch_op.create_foreign_key('fk_comments_parent_id', 'comments', ['parent_id'], ['id'])
+
+    op.execute(
+        "UPDATE comments SET request_id = "
+        "(SELECT review_tasks.request_id FROM review_tasks WHERE review_tasks.id = comments.task_id)"
+    )
+    op.create_index('ix_comments_request_created', 'comments', ['request_id', 'created_at', 'id'])
+    op.create_index('ix_comments_parent_id', 'comments', ['parent_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_comments_parent_id', table_name='comments')
+    op.drop_index('ix_comments_request_created', table_name='comments')
+    with op.batch_alter_table('comments') as batch_op:
+        batch_op.drop_constraint('fk_comments_parent_id', type_='foreignkey')
+        batch_op.drop_constraint('fk_comments_request_id', type_='foreignkey')
+        batch_op.drop_column('anchor')
+        batch_op.drop_column('parent_id')
+        batch_op.drop_column('request_id')
@@ -0,0 +1,35 @@
+"""reviewer teams
+
+Adds ``users.team`` so the assignment scheduler knows each reviewer's team,
+and indexes open-task scans on ``review_tasks``.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 01:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.add_column(sa.Column('team', sa.String(), nullable=True))
+    op.create_index('ix_review_tasks_status_reviewer', 'review_tasks', ['status', 'reviewer_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_review_tasks_status_reviewer', table_name='review_tasks')
+    with op.batch_alter_table('users') as batch_op:
+        batch_op.drop_column('team')
@@ -0,0 +1,54 @@
+"""risk score history
+
+Append-only ``risk_score_history``, seeded with each request's current score
+as rule version 1.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 02:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('risk_score_history',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('request_id', sa.String(), nullable=False),
+    sa.Column('nist_score', sa.SmallInteger(), nullable=True),
+    sa.Column('soc2_score', sa.SmallInteger(), nullable=True),
+    sa.Column('sox_score', sa.SmallInteger(), nullable=True),
+    sa.Column('owasp_score', sa.SmallInteger(), nullable=True),
+    sa.Column('maestro_score', sa.SmallInteger(), nullable=True),
+    sa.Column('total_score', sa.SmallInteger(), nullable=True),
+    sa.Column('rule_version', sa.SmallInteger(), nullable=False),
+    sa.Column('recorded_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['request_id'], ['intake_requests.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_risk_score_history_request_recorded', 'risk_score_history', ['request_id', 'recorded_at'])
+    op.create_index('ix_risk_score_history_recorded', 'risk_score_history', ['recorded_at'])
+    op.execute(
+        "INSERT INTO risk_score_history "
+        "(request_id, nist_score, soc2_score, sox_score, owasp_score, maestro_score, total_score, rule_version, recorded_at) "
+        "SELECT request_id, nist_score, soc2_score, sox_score, owasp_score, maestro_score, total_score, 1, "
+        "COALESCE(created_at, CURRENT_TIMESTAMP) FROM risk_scores WHERE request_id IS NOT NULL"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_risk_score_history_recorded', table_name='risk_score_history')
+    op.drop_index('ix_risk_score_history_request_recorded', table_name='risk_score_history')
+    op.drop_table('risk_score_history')
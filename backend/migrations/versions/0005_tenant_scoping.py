@@ -0,0 +1,90 @@
+"""tenant scoping
+
+Adds ``tenant_id`` to every table (existing rows belong to the ``default``
+tenant), makes it the leading column of every secondary index, and scopes
+user email uniqueness to the tenant.
+
+Tenants routed to their own database (TENANT_DATABASES) need this run
+against that database as well.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 02:40:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = (
+    'users', 'intake_requests', 'intake_request_versions', 'review_tasks', 'comments',
+    'risk_scores', 'risk_score_history', 'compliance_checklists', 'audit_logs',
+)
+
+# (name, table, columns) before and after
+OLD_INDEXES = (
+    ('ix_review_tasks_status_reviewer', 'review_tasks', ['status', 'reviewer_id']),
+    ('ix_comments_request_created', 'comments', ['request_id', 'created_at', 'id']),
+    ('ix_comments_parent_id', 'comments', ['parent_id']),
+    ('ix_risk_score_history_request_recorded', 'risk_score_history', ['request_id', 'recorded_at']),
+    ('ix_risk_score_history_recorded', 'risk_score_history', ['recorded_at']),
+)
+NEW_INDEXES = (
+    ('ix_intake_requests_tenant_status', 'intake_requests', ['tenant_id', 'status', 'created_at']),
+    ('ix_intake_requests_tenant_created', 'intake_requests', ['tenant_id', 'created_at']),
+    ('ix_intake_request_versions_tenant_request', 'intake_request_versions', ['tenant_id', 'request_id']),
+    ('ix_review_tasks_tenant_status_reviewer', 'review_tasks', ['tenant_id', 'status', 'reviewer_id']),
+    ('ix_review_tasks_tenant_request', 'review_tasks', ['tenant_id', 'request_id']),
+    ('ix_comments_tenant_request_created', 'comments', ['tenant_id', 'request_id', 'created_at', 'id']),
+    ('ix_comments_tenant_parent', 'comments', ['tenant_id', 'parent_id']),
+    ('ix_risk_scores_tenant_request', 'risk_scores', ['tenant_id', 'request_id']),
+    ('ix_risk_score_history_tenant_request_recorded', 'risk_score_history', ['tenant_id', 'request_id', 'recorded_at']),
+    ('ix_risk_score_history_tenant_recorded', 'risk_score_history', ['tenant_id', 'recorded_at']),
+    ('ix_compliance_checklists_tenant_request', 'compliance_checklists', ['tenant_id', 'request_id']),
+    ('ix_audit_logs_tenant_created', 'audit_logs', ['tenant_id', 'created_at']),
+)
+
+
+def _email_unique_name() -> str:
+    # 0001 left the constraint unnamed: PostgreSQL names it users_email_key, and
+    # on SQLite batch mode reflects it under the naming convention passed below
+    return 'users_email_key' if op.get_bind().dialect.name == 'postgresql' else 'uq_users_email'
+
+
+_BATCH_CONVENTION = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('tenant_id', sa.String(), nullable=False, server_default='default'))
+    with op.batch_alter_table('users', naming_convention=_BATCH_CONVENTION) as batch_op:
+        batch_op.drop_constraint(_email_unique_name(), type_='unique')
+        batch_op.create_unique_constraint('uq_users_tenant_email', ['tenant_id', 'email'])
+    for name, table, _ in OLD_INDEXES:
+        op.drop_index(name, table_name=table)
+    for name, table, columns in NEW_INDEXES:
+        op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(NEW_INDEXES):
+        op.drop_index(name, table_name=table)
+    for name, table, columns in OLD_INDEXES:
+        op.create_index(name, table, columns)
+    with op.batch_alter_table('users', naming_convention=_BATCH_CONVENTION) as batch_op:
+        batch_op.drop_constraint('uq_users_tenant_email', type_='unique')
+        batch_op.create_unique_constraint(_email_unique_name(), ['email'])
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column('tenant_id')
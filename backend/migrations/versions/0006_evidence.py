@@ -0,0 +1,61 @@
+"""evidence
+
+Adds ``evidence`` (metadata for content-addressed files in the blob store)
+and ``evidence_links`` (evidence attached to compliance checklist questions).
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 03:10:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('evidence',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('request_id', sa.String(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('content_type', sa.String(), nullable=False),
+    sa.Column('uploaded_by', sa.String(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['request_id'], ['intake_requests.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'request_id', 'sha256', name='uq_evidence_tenant_request_sha256')
+    )
+    op.create_index('ix_evidence_tenant_sha256', 'evidence', ['tenant_id', 'sha256'])
+    op.create_table('evidence_links',
+    sa.Column('id', sa.String(), nullable=False),
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('evidence_id', sa.String(), nullable=False),
+    sa.Column('checklist_id', sa.String(), nullable=False),
+    sa.Column('question_index', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['evidence_id'], ['evidence.id'], ),
+    sa.ForeignKeyConstraint(['checklist_id'], ['compliance_checklists.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('tenant_id', 'evidence_id', 'checklist_id', 'question_index', name='uq_evidence_links_tenant_question')
+    )
+    op.create_index('ix_evidence_links_tenant_checklist', 'evidence_links', ['tenant_id', 'checklist_id', 'question_index'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_evidence_links_tenant_checklist', table_name='evidence_links')
+    op.drop_table('evidence_links')
+    op.drop_index('ix_evidence_tenant_sha256', table_name='evidence')
+    op.drop_table('evidence')
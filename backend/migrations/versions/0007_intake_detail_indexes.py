@@ -0,0 +1,42 @@
+"""intake detail indexes
+
+Expression indexes on the ``details`` keys that the intake list filters on.
+They use JSON1 ``json_extract`` on SQLite and ``->>`` on PostgreSQL.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 04:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DETAIL_KEYS = ('model_provider', 'deployment_type', 'requestor_email')
+
+
+def _detail(key: str):
+    # Must compile to the same text as db.json_fields.json_text, or the planner won't match it
+    if op.get_bind().dialect.name == 'postgresql':
+        return sa.text(f"(details ->> '{key}')")
+    return sa.text(f"json_extract(details, '$.{key}')")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for key in DETAIL_KEYS:
+        op.create_index(f'ix_intake_requests_tenant_{key}', 'intake_requests', ['tenant_id', _detail(key)])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for key in DETAIL_KEYS:
+        op.drop_index(f'ix_intake_requests_tenant_{key}', table_name='intake_requests')
@@ -0,0 +1,43 @@
+"""idempotency keys
+
+Adds ``idempotency_keys``: each tenant's Idempotency-Key values and the
+stored responses that retries get back. The retention job deletes rows
+past ``expires_at``.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 05:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, Sequence[str], None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('idempotency_keys',
+    sa.Column('tenant_id', sa.String(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('fingerprint', sa.String(length=64), nullable=False),
+    sa.Column('status_code', sa.SmallInteger(), nullable=True),
+    sa.Column('content_type', sa.String(), nullable=True),
+    sa.Column('body', sa.LargeBinary(), nullable=True),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('tenant_id', 'key', name='pk_idempotency_keys')
+    )
+    op.create_index('ix_idempotency_keys_tenant_expires', 'idempotency_keys', ['tenant_id', 'expires_at'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_idempotency_keys_tenant_expires', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,59 @@
+"""one review task per team
+
+Adds a unique constraint on ``review_tasks (tenant_id, request_id, team)``
+so concurrent routing of the same request cannot create duplicate tasks.
+Duplicates already in the table are merged first: the oldest task of each
+team is kept, and comments on the others are moved onto it.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19 11:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, Sequence[str], None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+review_tasks = sa.table(
+    'review_tasks',
+    sa.column('id', sa.String), sa.column('tenant_id', sa.String), sa.column('request_id', sa.String),
+    sa.column('team', sa.String), sa.column('created_at', sa.DateTime),
+)
+comments = sa.table('comments', sa.column('task_id', sa.String))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    conn = op.get_bind()
+    duplicates = conn.execute(
+        sa.select(review_tasks.c.tenant_id, review_tasks.c.request_id, review_tasks.c.team)
+        .group_by(review_tasks.c.tenant_id, review_tasks.c.request_id, review_tasks.c.team)
+        .having(sa.func.count() > 1)
+    ).all()
+    for tenant_id, request_id, team in duplicates:
+        ids = conn.execute(
+            sa.select(review_tasks.c.id)
+            .where(review_tasks.c.tenant_id == tenant_id, review_tasks.c.request_id == request_id,
+                   review_tasks.c.team == team)
+            .order_by(review_tasks.c.created_at, review_tasks.c.id)
+        ).scalars().all()
+        keep, merged = ids[0], ids[1:]
+        conn.execute(comments.update().where(comments.c.task_id.in_(merged)).values(task_id=keep))
+        conn.execute(review_tasks.delete().where(review_tasks.c.id.in_(merged)))
+
+    with op.batch_alter_table('review_tasks') as batch_op:
+        batch_op.create_unique_constraint('uq_review_tasks_tenant_request_team', ['tenant_id', 'request_id', 'team'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('review_tasks') as batch_op:
+        batch_op.drop_constraint('uq_review_tasks_tenant_request_team', type_='unique')
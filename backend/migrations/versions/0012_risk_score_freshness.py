@@ -0,0 +1,37 @@
+"""risk score freshness
+
+Adds ``rule_version`` and ``scored_at`` to ``risk_scores`` so the rescore job
+can find scores made under older rules or before the request last changed.
+Existing scores are backfilled as version 1, scored when they were created.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-19 15:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, Sequence[str], None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('risk_scores') as batch_op:
+        batch_op.add_column(sa.Column('rule_version', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('scored_at', sa.DateTime(), nullable=True))
+    op.execute("UPDATE risk_scores SET rule_version = 1, scored_at = created_at")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('risk_scores') as batch_op:
+        batch_op.drop_column('scored_at')
+        batch_op.drop_column('rule_version')
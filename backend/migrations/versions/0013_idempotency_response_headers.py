@@ -0,0 +1,61 @@
+"""idempotency response headers
+
+Replaces ``idempotency_keys.content_type`` with ``headers``, every response
+header except hop-by-hop ones, so a replay carries the same headers as the
+original response. Stored content types are carried over.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-19 16:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, Sequence[str], None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+idempotency_keys = sa.table(
+    'idempotency_keys',
+    sa.column('tenant_id', sa.String()),
+    sa.column('key', sa.String()),
+    sa.column('content_type', sa.String()),
+    sa.column('headers', sa.JSON()),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('idempotency_keys') as batch_op:
+        batch_op.add_column(sa.Column('headers', sa.JSON(), nullable=True))
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(idempotency_keys.c.tenant_id, idempotency_keys.c.key, idempotency_keys.c.content_type)
+                        .where(idempotency_keys.c.content_type.isnot(None))).all()
+    for tenant_id, key, content_type in rows:
+        conn.execute(idempotency_keys.update()
+                     .where(idempotency_keys.c.tenant_id == tenant_id, idempotency_keys.c.key == key)
+                     .values(headers=[["content-type", content_type]]))
+    with op.batch_alter_table('idempotency_keys') as batch_op:
+        batch_op.drop_column('content_type')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('idempotency_keys') as batch_op:
+        batch_op.add_column(sa.Column('content_type', sa.String(), nullable=True))
+    conn = op.get_bind()
+    rows = conn.execute(sa.select(idempotency_keys.c.tenant_id, idempotency_keys.c.key, idempotency_keys.c.headers)
+                        .where(idempotency_keys.c.headers.isnot(None))).all()
+    for tenant_id, key, headers in rows:
+        content_type = next((value for name, value in headers if name.lower() == 'content-type'), None)
+        conn.execute(idempotency_keys.update()
+                     .where(idempotency_keys.c.tenant_id == tenant_id, idempotency_keys.c.key == key)
+                     .values(content_type=content_type))
+    with op.batch_alter_table('idempotency_keys') as batch_op:
+        batch_op.drop_column('headers')
@@ -1,19 +1,25 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Boolean, Text
+from sqlalchemy import Column, Integer, BigInteger, SmallInteger, String, ForeignKey, DateTime, JSON, Boolean, Text, Index, UniqueConstraint, LargeBinary, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 import uuid
 from datetime import datetime
 from db.database import Base
+from db.json_fields import json_text
+from db.tenancy import TenantScoped
 
 def generate_uuid():
     return str(uuid.uuid4())
 
-class User(Base):
+class User(TenantScoped, Base):
     __tablename__ = "users"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "email", name="uq_users_tenant_email"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     name = Column(String, nullable=False)
-    email = Column(String, unique=True, nullable=False)
+    email = Column(String, nullable=False)
     role = Column(String, nullable=False) # requestor, reviewer, admin
+    team = Column(String, nullable=True) # review team for reviewers: Governance, Cybersecurity, Legal, Compliance, Architecture
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
@@ -21,8 +27,12 @@ class User(Base):
     review_tasks = relationship("ReviewTask", back_populates="reviewer")
     comments = relationship("Comment", back_populates="commenter")
 
-class IntakeRequest(Base):
+class IntakeRequest(TenantScoped, Base):
     __tablename__ = "intake_requests"
+    __table_args__ = (
+        Index("ix_intake_requests_tenant_status", "tenant_id", "status", "created_at"),
+        Index("ix_intake_requests_tenant_created", "tenant_id", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     title = Column(String, nullable=False)
@@ -39,8 +49,16 @@ class IntakeRequest(Base):
     review_tasks = relationship("ReviewTask", back_populates="request")
     risk_scores = relationship("RiskScore", back_populates="request")
 
-class IntakeRequestVersion(Base):
+# Intake list filters on these free-form fields of ``details``
+INTAKE_DETAIL_FILTERS = ("model_provider", "deployment_type", "requestor_email")
+for _key in INTAKE_DETAIL_FILTERS:
+    Index(f"ix_intake_requests_tenant_{_key}", IntakeRequest.tenant_id, json_text(IntakeRequest.details, _key))
+
+class IntakeRequestVersion(TenantScoped, Base):
     __tablename__ = "intake_request_versions"
+    __table_args__ = (
+        Index("ix_intake_request_versions_tenant_request", "tenant_id", "request_id"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     request_id = Column(String, ForeignKey("intake_requests.id"))
@@ -50,8 +68,15 @@ class IntakeRequestVersion(Base):
 
     request = relationship("IntakeRequest", back_populates="versions")
 
-class ReviewTask(Base):
+class ReviewTask(TenantScoped, Base):
     __tablename__ = "review_tasks"
+    __table_args__ = (
+        # Open-task scans for reviewer workload and rebalancing
+        Index("ix_review_tasks_tenant_status_reviewer", "tenant_id", "status", "reviewer_id"),
+        Index("ix_review_tasks_tenant_request", "tenant_id", "request_id"),
+        # One task per team on a request; routing inserts with ON CONFLICT DO NOTHING
+        UniqueConstraint("tenant_id", "request_id", "team", name="uq_review_tasks_tenant_request_team"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     request_id = Column(String, ForeignKey("intake_requests.id"))
@@ -66,21 +91,35 @@ class ReviewTask(Base):
     reviewer = relationship("User", back_populates="review_tasks")
     task_comments = relationship("Comment", back_populates="task")
 
-class Comment(Base):
+class Comment(TenantScoped, Base):
     __tablename__ = "comments"
+    __table_args__ = (
+        # Keyset pagination of a request's threads: WHERE request_id = ? AND (created_at, id) > (?, ?)
+        Index("ix_comments_tenant_request_created", "tenant_id", "request_id", "created_at", "id"),
+        Index("ix_comments_tenant_parent", "tenant_id", "parent_id"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     task_id = Column(String, ForeignKey("review_tasks.id"))
+    # Denormalized from the task so all comments on a request are one index range scan
+    request_id = Column(String, ForeignKey("intake_requests.id"))
+    parent_id = Column(String, ForeignKey("comments.id"), nullable=True)
     commenter_id = Column(String, ForeignKey("users.id"))
     section = Column(String)
+    anchor = Column(String, nullable=True) # field or paragraph within the section, e.g. "data.retention"
     text = Column(Text, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     task = relationship("ReviewTask", back_populates="task_comments")
     commenter = relationship("User", back_populates="comments")
+    parent = relationship("Comment", remote_side=[id], back_populates="replies")
+    replies = relationship("Comment", back_populates="parent", order_by=lambda: (Comment.created_at, Comment.id))
 
-class RiskScore(Base):
+class RiskScore(TenantScoped, Base):
     __tablename__ = "risk_scores"
+    __table_args__ = (
+        Index("ix_risk_scores_tenant_request", "tenant_id", "request_id"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     request_id = Column(String, ForeignKey("intake_requests.id"))
@@ -90,12 +129,37 @@ class RiskScore(Base):
     owasp_score = Column(Integer)
     maestro_score = Column(Integer)
     total_score = Column(Integer)
+    # Rules version and time of the last scoring, so stale scores can be found and redone
+    rule_version = Column(Integer, nullable=True)
+    scored_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     request = relationship("IntakeRequest", back_populates="risk_scores")
 
-class ComplianceChecklist(Base):
+class RiskScoreHistory(TenantScoped, Base):
+    """Append-only score changes; a row is written only when a score or the rule version changes"""
+    __tablename__ = "risk_score_history"
+    __table_args__ = (
+        Index("ix_risk_score_history_tenant_request_recorded", "tenant_id", "request_id", "recorded_at"),
+        Index("ix_risk_score_history_tenant_recorded", "tenant_id", "recorded_at"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    request_id = Column(String, ForeignKey("intake_requests.id"), nullable=False)
+    nist_score = Column(SmallInteger)
+    soc2_score = Column(SmallInteger)
+    sox_score = Column(SmallInteger)
+    owasp_score = Column(SmallInteger)
+    maestro_score = Column(SmallInteger)
+    total_score = Column(SmallInteger)
+    rule_version = Column(SmallInteger, nullable=False)
+    recorded_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class ComplianceChecklist(TenantScoped, Base):
     __tablename__ = "compliance_checklists"
+    __table_args__ = (
+        Index("ix_compliance_checklists_tenant_request", "tenant_id", "request_id"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     request_id = Column(String, ForeignKey("intake_requests.id"))
@@ -109,8 +173,65 @@ class ComplianceChecklist(Base):
     request = relationship("IntakeRequest", backref="checklists")
     completer = relationship("User", foreign_keys=[completed_by])
 
-class AuditLog(Base):
+class Evidence(TenantScoped, Base):
+    """An uploaded evidence file; the bytes live in the blob store under ``sha256``"""
+    __tablename__ = "evidence"
+    __table_args__ = (
+        # Re-uploading the same file to a request returns the existing row
+        UniqueConstraint("tenant_id", "request_id", "sha256", name="uq_evidence_tenant_request_sha256"),
+        Index("ix_evidence_tenant_sha256", "tenant_id", "sha256"),
+    )
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    request_id = Column(String, ForeignKey("intake_requests.id"), nullable=False)
+    sha256 = Column(String(64), nullable=False)
+    size = Column(BigInteger, nullable=False)
+    filename = Column(String, nullable=False)
+    content_type = Column(String, nullable=False)
+    uploaded_by = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    links = relationship("EvidenceLink", back_populates="evidence", order_by="EvidenceLink.created_at")
+
+class EvidenceLink(TenantScoped, Base):
+    """Evidence attached to one question of a compliance checklist"""
+    __tablename__ = "evidence_links"
+    __table_args__ = (
+        UniqueConstraint("tenant_id", "evidence_id", "checklist_id", "question_index", name="uq_evidence_links_tenant_question"),
+        Index("ix_evidence_links_tenant_checklist", "tenant_id", "checklist_id", "question_index"),
+    )
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    evidence_id = Column(String, ForeignKey("evidence.id"), nullable=False)
+    checklist_id = Column(String, ForeignKey("compliance_checklists.id"), nullable=False)
+    question_index = Column(Integer, nullable=False)  # position in ComplianceChecklist.questions
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    evidence = relationship("Evidence", back_populates="links")
+
+class IdempotencyKey(TenantScoped, Base):
+    """A client's Idempotency-Key and the response it got; ``status_code`` is NULL while the first request runs"""
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        PrimaryKeyConstraint("tenant_id", "key", name="pk_idempotency_keys"),
+        Index("ix_idempotency_keys_tenant_expires", "tenant_id", "expires_at"),
+    )
+
+    key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path, query and body
+    status_code = Column(SmallInteger, nullable=True)
+    headers = Column(JSON, nullable=True)  # [name, value] pairs to replay, hop-by-hop headers left out
+    body = Column(LargeBinary, nullable=True)  # NULL on a completed key: the response was too large to keep
+    # Random token of the request holding the claim; only it may extend, complete or release it
+    owner = Column(String(32), nullable=True)
+    # While running: when the claim counts as abandoned; once done: when the response is forgotten
+    expires_at = Column(DateTime, nullable=False)
+
+class AuditLog(TenantScoped, Base):
     __tablename__ = "audit_logs"
+    __table_args__ = (
+        Index("ix_audit_logs_tenant_created", "tenant_id", "created_at"),
+    )
 
     id = Column(String, primary_key=True, default=generate_uuid)
     request_id = Column(String, nullable=True)
@@ -118,3 +239,10 @@ class AuditLog(Base):
     action = Column(String, nullable=False)
     metadata_ = Column("metadata", JSON) # metadata is reserved in SQLAlchemy
     created_at = Column(DateTime, default=datetime.utcnow)
+
+class JobRun(Base):
+    """When each periodic job last finished, cluster-wide, so a new leader keeps the schedule"""
+    __tablename__ = "job_runs"
+
+    name = Column(String, primary_key=True)
+    last_run_at = Column(DateTime, nullable=False)
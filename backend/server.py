@@ -0,0 +1,162 @@
+"""
+Production entry point: a preforking supervisor around uvicorn.
+
+The master process imports the app once (routers, compliance catalogs,
+scoring engine), freezes those objects out of the garbage collector and then
+forks ``--workers`` children that all accept on one inherited socket. Because
+the immutable data was loaded before ``fork`` and ``gc.freeze()`` keeps the
+collector from writing to it, workers share those pages copy-on-write instead
+of each holding a private copy.
+
+Shared across workers: response cache invalidation counters (so one worker's
+write invalidates every worker's private LRU), rate limit buckets (unless
+RATE_LIMIT_BACKEND=redis already shares them) and Prometheus samples
+(PROMETHEUS_MULTIPROC_DIR). Periodic jobs are enabled in every worker but
+gated by cluster-wide leader election, so they run exactly once.
+
+    python server.py --workers 4 --port 8000
+"""
+import argparse
+import gc
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+
+logger = logging.getLogger("aigrc.server")
+
+RESTART_BACKOFF_SECONDS = 1.0
+
+
+def _prepare_environment():
+    # Must happen before prometheus_client is imported by the app
+    if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="aigrc-metrics-")
+    else:
+        shutil.rmtree(os.environ["PROMETHEUS_MULTIPROC_DIR"], ignore_errors=True)
+        os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+    os.environ.setdefault("ENABLE_PERIODIC_TASKS", "1")
+
+
+def preload():
+    """Load the app and its read-only data in the master so workers inherit it"""
+    import main
+    from db.database import dispose_engine
+    from services import compliance_frameworks, jobs  # noqa: F401
+    from services import admission
+    from services.cache import SharedGenerations, response_cache
+
+    response_cache.generations = SharedGenerations()
+    if isinstance(admission.rate_limiter, admission.LocalTokenBuckets):
+        admission.rate_limiter = admission.SharedTokenBuckets()
+    # Connections must never be shared across fork; workers open their own lazily
+    dispose_engine()
+    return main.app
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, args):
+    import uvicorn
+
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    config = uvicorn.Config(
+        app,
+        log_level=args.log_level,
+        # X-Forwarded-For is honoured only from FORWARDED_ALLOW_IPS (uvicorn reads the env var)
+        proxy_headers=True,
+        timeout_graceful_shutdown=args.graceful_timeout,
+    )
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Supervisor:
+    """Forks workers, restarts the ones that die and shuts them all down on SIGTERM"""
+
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers = {}
+        self.stopping = False
+
+    def spawn(self, slot: int):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                run_worker(self.app, self.sock, self.args)
+            except Exception:
+                logger.exception("Worker %s crashed", slot)
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = (slot, time.monotonic())
+        logger.info("Started worker %s (pid %s)", slot, pid)
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for slot in range(self.args.workers):
+            self.spawn(slot)
+
+        from prometheus_client import multiprocess
+
+        while self.workers:
+            try:
+                pid, status = os.wait()
+            except ChildProcessError:
+                break
+            slot, started = self.workers.pop(pid, (None, 0))
+            multiprocess.mark_process_dead(pid)
+            if self.stopping or slot is None:
+                continue
+            logger.warning("Worker %s (pid %s) exited with status %s; restarting", slot, pid, status)
+            if time.monotonic() - started < RESTART_BACKOFF_SECONDS:
+                time.sleep(RESTART_BACKOFF_SECONDS)
+            self.spawn(slot)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with preforked uvicorn workers")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--backlog", type=int, default=2048)
+    parser.add_argument("--graceful-timeout", type=int, default=30)
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(levelname)s [%(name)s] %(message)s")
+    _prepare_environment()
+    app = preload()
+    sock = bind_socket(args.host, args.port, args.backlog)
+    gc.collect()
+    gc.freeze()
+    Supervisor(app, sock, args).run()
+    sock.close()
+    sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+"""
+Admission control: rate limits and a priority concurrency gate.
+
+``AdmissionMiddleware`` runs two checks before a request reaches a handler:
+
+1. Token buckets. Every write a client sends draws from that client's own
+   bucket. The client is its address, whatever tenant it names, so a
+   caller cannot get fresh buckets by switching tenants. (Behind a proxy,
+   run uvicorn with ``--proxy-headers`` so the address is the caller's.)
+   The expensive routes in ROUTE_RULES (bulk intake, scoring, simulation,
+   batch comments, uploads) also draw from a per-client, per-route bucket
+   with a tighter rate. A second tier caps each tenant's writes from all
+   of its clients together. The narrowest bucket is drawn first, and a
+   request turned away by any check gets its tokens back, so rejected
+   requests do not use up quota. An empty bucket answers 429, with
+   Retry-After set to the time until the next token.
+2. A concurrency gate sized below the DB pool. At most
+   ADMISSION_MAX_CONCURRENCY requests per worker run at once; the rest
+   queue in two lanes. Interactive requests (reads and review actions)
+   always go ahead of batch requests (bulk writes, or any request sent
+   with ``X-Priority: batch``). Batch requests never hold more than
+   ADMISSION_BATCH_SHARE of the slots. A request that cannot get a slot
+   within ADMISSION_QUEUE_TIMEOUT, or arrives to a full queue, is shed
+   with 429 and an estimated Retry-After. Streaming evidence uploads and
+   downloads (``gated=False`` rules) skip the gate: they hold a request open
+   for as long as the transfer takes but a DB connection only briefly, and
+   a few slow clients would otherwise take every slot.
+
+Bucket state is pluggable (RATE_LIMIT_BACKEND):
+
+* ``local``: per process. Under the prefork server it is replaced before the
+  fork by ``SharedTokenBuckets``, so every worker on the host draws from the
+  same buckets.
+* ``redis``: shared by every host, through an atomic Lua script.
+* ``none``: rate limits off; the gate still applies.
+"""
+import asyncio
+import json
+import math
+import mmap
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+from typing import Optional, Sequence, Tuple
+
+from prometheus_client import Counter
+
+from db.tenancy import get_current_tenant
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "1") == "1"
+# Per worker; keep it at or below the DB pool size plus overflow (5 + 10 by default)
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "12"))
+ADMISSION_BATCH_SHARE = float(os.getenv("ADMISSION_BATCH_SHARE", "0.5"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "local").lower()
+# Budget for all of one client's writes, in requests per second and burst size
+RATE_LIMIT_CLIENT_RATE = float(os.getenv("RATE_LIMIT_CLIENT_RATE", "20"))
+RATE_LIMIT_CLIENT_BURST = float(os.getenv("RATE_LIMIT_CLIENT_BURST", "100"))
+# Budget for all writes of one tenant, across every client
+RATE_LIMIT_TENANT_RATE = float(os.getenv("RATE_LIMIT_TENANT_RATE", "200"))
+RATE_LIMIT_TENANT_BURST = float(os.getenv("RATE_LIMIT_TENANT_BURST", "1000"))
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITY_HEADER = b"x-priority"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+# Probes, scrapes and docs are never limited or queued
+EXEMPT_PATHS = ("/health", "/live", "/ready", "/metrics", "/cache/stats", "/docs", "/redoc", "/openapi.json")
+
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests answered 429 by admission control",
+    ["reason", "lane"],
+)
+
+
+class RouteRule:
+    """A per-client bucket (and lane) for requests matching ``method`` and ``pattern``"""
+
+    __slots__ = ("name", "method", "pattern", "rate", "burst", "lane", "gated")
+
+    def __init__(self, name: str, method: str, pattern: str, rate: Optional[float], burst: float = 0,
+                 lane: str = BATCH, gated: bool = True):
+        self.name = name
+        self.method = method
+        self.pattern = re.compile(pattern)
+        self.rate = rate
+        self.burst = burst
+        self.lane = lane
+        self.gated = gated
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.method is None or self.method == method) and self.pattern.fullmatch(path) is not None
+
+
+# First match wins. rate=None only assigns a lane.
+ROUTE_RULES = (
+    RouteRule("intake_create", "POST", r"/intake/?", rate=5, burst=50),
+    RouteRule("score_compute", "POST", r"/scoring/[^/]+/compute", rate=5, burst=50),
+    RouteRule("score_simulate", "POST", r"/scoring/simulate", rate=0.5, burst=5),
+    RouteRule("routing_backlog", "POST", r"/review/routing/backlog", rate=0.2, burst=5),
+    RouteRule("comment_batch", "POST", r"/review/[^/]+/comments/batch", rate=2, burst=20),
+    RouteRule("evidence_upload", "POST", r"/evidence/requests/[^/]+", rate=2, burst=20, gated=False),
+    RouteRule("evidence_download", "GET", r"/evidence/[^/]+/content", rate=None, lane=INTERACTIVE, gated=False),
+    RouteRule("review", None, r"/review/.*", rate=None, lane=INTERACTIVE),
+)
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: float) -> float:
+    # updated == 0 marks a bucket that was never used (or was evicted): it starts full
+    return burst if updated == 0 else min(burst, tokens + (now - updated) * rate)
+
+
+def _take(tokens: float, rate: float, cost: float) -> Tuple[bool, float, float]:
+    """Returns (allowed, tokens left, seconds until ``cost`` tokens are available)"""
+    if tokens >= cost:
+        return True, tokens - cost, 0.0
+    return False, tokens, (cost - tokens) / rate
+
+
+class LocalTokenBuckets:
+    """Per-process buckets, bounded to the most recently used keys"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (0.0, 0.0))
+            allowed, tokens, retry_after = _take(_refill(tokens, updated, now, rate, burst), rate, cost)
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return allowed, retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class SharedTokenBuckets:
+    """
+    Buckets in an anonymous shared mapping, created by the prefork server
+    before it forks so every worker on the host draws from the same buckets.
+    Keys hash into a fixed number of (tokens, updated) slots; two clients
+    that collide share one budget.
+    """
+
+    def __init__(self, slots: int = 65536):
+        self.slots = slots
+        self._map = mmap.mmap(-1, slots * 16)
+        self._state = memoryview(self._map).cast("d")
+        self._lock = multiprocessing.Lock()
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        i = 2 * (zlib.crc32(key.encode()) % self.slots)
+        # CLOCK_MONOTONIC is system-wide, so timestamps compare across workers
+        now = time.monotonic()
+        with self._lock:
+            tokens = _refill(self._state[i], self._state[i + 1], now, rate, burst)
+            allowed, self._state[i], retry_after = _take(tokens, rate, cost)
+            self._state[i + 1] = now
+        return allowed, retry_after
+
+    def clear(self):
+        with self._lock:
+            self._map[:] = bytes(len(self._map))
+
+
+# KEYS[1] bucket; ARGV rate, burst, cost. Uses the server clock so hosts need not agree on time.
+_REDIS_TAKE = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate, burst, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = burst
+if state[1] then tokens = math.min(burst, tonumber(state[1]) + (now - tonumber(state[2])) * rate) end
+local allowed = 0
+local retry = 0
+if tokens >= cost then tokens = tokens - cost; allowed = 1 else retry = (cost - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry)}
+"""
+
+
+class RedisTokenBuckets:
+    """Buckets shared by every host through a Redis-compatible server"""
+
+    def __init__(self, url: str, prefix: str = "aigrc:ratelimit:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._take = self.client.register_script(_REDIS_TAKE)
+
+    def take(self, key: str, rate: float, burst: float, cost: float = 1.0) -> Tuple[bool, float]:
+        allowed, retry_after = self._take(keys=[self.prefix + key], args=[rate, burst, cost])
+        return bool(allowed), float(retry_after)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+
+class NullTokenBuckets:
+    """Backend used when rate limiting is disabled"""
+
+    def take(self, key, rate, burst, cost=1.0):
+        return True, 0.0
+
+    def clear(self):
+        pass
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class ConcurrencyGate:
+    """
+    Bounded slots with two priority lanes, for one worker's event loop.
+
+    A freed slot goes to the oldest interactive waiter; batch waiters only
+    get one when no interactive request is waiting and batch holds fewer
+    than ``batch_limit`` slots.
+    """
+
+    def __init__(self, limit: int = ADMISSION_MAX_CONCURRENCY, batch_share: float = ADMISSION_BATCH_SHARE,
+                 max_queue: int = ADMISSION_MAX_QUEUE, timeout: float = ADMISSION_QUEUE_TIMEOUT):
+        self.limit = limit
+        self.batch_limit = max(1, int(limit * batch_share))
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = {INTERACTIVE: 0, BATCH: 0}
+        self.waiters = {INTERACTIVE: deque(), BATCH: deque()}
+        # Moving average of how long a request holds a slot, for Retry-After estimates
+        self.service_seconds = 0.05
+
+    def _can_run(self, lane: str) -> bool:
+        if self.active[INTERACTIVE] + self.active[BATCH] >= self.limit:
+            return False
+        if lane == BATCH:
+            return self.active[BATCH] < self.batch_limit and not self.waiters[INTERACTIVE]
+        return True
+
+    def retry_after(self) -> float:
+        queued = len(self.waiters[INTERACTIVE]) + len(self.waiters[BATCH])
+        return self.service_seconds * (queued + 1) / self.limit
+
+    async def acquire(self, lane: str):
+        if not self.waiters[lane] and self._can_run(lane):
+            self.active[lane] += 1
+            return
+        if len(self.waiters[INTERACTIVE]) + len(self.waiters[BATCH]) >= self.max_queue:
+            raise Overloaded(self.retry_after(), "queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self.waiters[lane].append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.timeout)
+        except asyncio.TimeoutError:
+            raise Overloaded(self.retry_after(), "queue_timeout")
+        except asyncio.CancelledError:
+            # Client went away; if the slot was already handed over, pass it on
+            if waiter.done() and not waiter.cancelled():
+                self.release(lane, 0.0)
+            raise
+        finally:
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    self.waiters[lane].remove(waiter)
+                except ValueError:
+                    pass
+
+    def release(self, lane: str, held_seconds: float):
+        self.active[lane] -= 1
+        self.service_seconds += 0.1 * (held_seconds - self.service_seconds)
+        self._wake()
+
+    def _wake(self):
+        for lane in (INTERACTIVE, BATCH):
+            queue = self.waiters[lane]
+            while queue and self._can_run(lane):
+                waiter = queue.popleft()
+                if waiter.done():
+                    continue
+                # The slot is handed over here, before the waiter resumes
+                self.active[lane] += 1
+                waiter.set_result(None)
+
+
+def _retry_header(seconds: float) -> bytes:
+    return str(max(1, math.ceil(seconds))).encode()
+
+
+class AdmissionMiddleware:
+    """Pure ASGI middleware applying the rate limits and the concurrency gate"""
+
+    def __init__(self, app, buckets=None, gate: ConcurrencyGate = None, rules: Sequence[RouteRule] = ROUTE_RULES,
+                 client_rate: float = RATE_LIMIT_CLIENT_RATE, client_burst: float = RATE_LIMIT_CLIENT_BURST,
+                 tenant_rate: float = RATE_LIMIT_TENANT_RATE, tenant_burst: float = RATE_LIMIT_TENANT_BURST,
+                 enabled: bool = ADMISSION_ENABLED):
+        self.app = app
+        self.buckets = buckets
+        self.gate = gate or ConcurrencyGate()
+        self.rules = rules
+        self.client_rate = client_rate
+        self.client_burst = client_burst
+        self.tenant_rate = tenant_rate
+        self.tenant_burst = tenant_burst
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["path"].startswith(EXEMPT_PATHS) \
+                or scope["path"].startswith("/admin/"):
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        rule = next((r for r in self.rules if r.matches(method, path)), None)
+        lane = rule.lane if rule is not None else (INTERACTIVE if method in SAFE_METHODS else BATCH)
+        if dict(scope["headers"]).get(PRIORITY_HEADER, b"").lower() == b"batch":
+            # Clients may only lower their own priority
+            lane = BATCH
+
+        buckets = self.buckets if self.buckets is not None else rate_limiter
+        client = f"client:{scope['client'][0] if scope.get('client') else 'unknown'}"
+        charged = []
+        if method not in SAFE_METHODS:
+            limits = [(f"tenant:{get_current_tenant()}", self.tenant_rate, self.tenant_burst),
+                      (client, self.client_rate, self.client_burst)]
+            if rule is not None and rule.rate is not None:
+                limits.insert(0, (f"{client}:{rule.name}", rule.rate, rule.burst))
+            for limit in limits:
+                allowed, retry_after = buckets.take(*limit)
+                if not allowed:
+                    self._refund(buckets, charged)
+                    await self._reject(send, "rate_limited", lane, retry_after, "Rate limit exceeded")
+                    return
+                charged.append(limit)
+
+        if rule is not None and not rule.gated:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await self.gate.acquire(lane)
+        except Overloaded as exc:
+            self._refund(buckets, charged)
+            await self._reject(send, exc.reason, lane, exc.retry_after, "Server busy, retry later")
+            return
+        start = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.gate.release(lane, time.monotonic() - start)
+
+    @staticmethod
+    def _refund(buckets, charged):
+        # A negative cost puts the token back; the next refill caps the bucket at its burst
+        for key, rate, burst in charged:
+            buckets.take(key, rate, burst, -1.0)
+
+    @staticmethod
+    async def _reject(send, reason: str, lane: str, retry_after: float, detail: str):
+        ADMISSION_REJECTIONS.labels(reason=reason, lane=lane).inc()
+        await send({"type": "http.response.start", "status": 429, "headers": [
+            (b"content-type", b"application/json"),
+            (b"retry-after", _retry_header(retry_after)),
+        ]})
+        await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+
+def build_rate_limiter():
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisTokenBuckets(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    if RATE_LIMIT_BACKEND in ("none", "off", "disabled"):
+        return NullTokenBuckets()
+    return LocalTokenBuckets()
+
+
+rate_limiter = build_rate_limiter()
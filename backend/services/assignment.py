@@ -0,0 +1,315 @@
+"""
+Reviewer assignment and workload balancing.
+
+Each team keeps a min-heap of its reviewers keyed by (open tasks, -oldest
+open task), so the next task goes to the reviewer with the fewest open tasks
+and, on a tie, the one whose queue is least behind on SLA. Load changes push
+a fresh heap entry and mark the old one dead (lazy deletion), so assigning
+and releasing are O(log n) in the team's reviewer count (plus O(log k) in
+the reviewer's open tasks to keep their oldest task current).
+
+The heaps are rebuilt from ``review_tasks`` every ASSIGNMENT_REFRESH_SECONDS.
+That picks up new reviewers, and it corrects drift between prefork workers,
+which each keep their own copy. Assignments made while a rebuild is querying
+are journalled and replayed onto the rebuilt state, so none are lost. Every tenant has its own set of heaps, so
+reviewers are only ever picked from the current tenant.
+"""
+import heapq
+import itertools
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from db.tenancy import get_current_tenant
+from models.models import IntakeRequest, ReviewTask, RiskScore, User
+from services.risk_scoring import RiskScoringEngine
+
+ASSIGNMENT_REFRESH_SECONDS = float(os.getenv("ASSIGNMENT_REFRESH_SECONDS", "60"))
+# Open tasks older than this are candidates for rebalancing
+REVIEW_SLA_HOURS = float(os.getenv("REVIEW_SLA_HOURS", "72"))
+
+OPEN_STATUSES = ("pending", "needs-info")
+
+# Team that owns each framework when it is the request's dominant risk
+FRAMEWORK_TEAMS = {
+    "owasp": "Cybersecurity",
+    "maestro": "Architecture",
+    "soc2": "Compliance",
+    "sox": "Compliance",
+    "nist": "Governance",
+}
+
+_REMOVED = None
+
+
+def route_team(db: Session, request: IntakeRequest) -> str:
+    """Team owning the request's highest framework score (scored in memory if never scored)"""
+    score = (
+        db.query(RiskScore)
+        .filter(RiskScore.request_id == request.id)
+        .order_by(RiskScore.created_at.desc())
+        .first()
+    )
+    if score is not None:
+        scores = {framework: getattr(score, f"{framework}_score") for framework in FRAMEWORK_TEAMS}
+    else:
+        engine = RiskScoringEngine()
+        scores = {framework: getattr(engine, f"calculate_{framework}_score")(request) for framework in FRAMEWORK_TEAMS}
+    return team_for_scores(scores)
+
+
+def team_for_scores(scores: Dict[str, Optional[int]]) -> str:
+    """Team owning the highest of ``scores`` (framework -> score, None counts as 0)"""
+    # max() keeps the first of equal scores, so ties follow FRAMEWORK_TEAMS order
+    return FRAMEWORK_TEAMS[max(FRAMEWORK_TEAMS, key=lambda framework: scores.get(framework) or 0)]
+
+
+class ReviewerLoad:
+    """
+    One reviewer's open tasks. ``oldest`` is read on every heap update, so the
+    creation times also sit in a min-heap: removing a task only drops it from
+    the dict, and its heap entry is discarded once it reaches the top, which
+    keeps add, remove and ``oldest`` O(log k) amortized in the reviewer's tasks.
+    """
+    __slots__ = ("reviewer_id", "team", "open_tasks", "_by_age")
+
+    def __init__(self, reviewer_id: str, team: str):
+        self.reviewer_id = reviewer_id
+        self.team = team
+        self.open_tasks: Dict[str, float] = {}  # task id -> created_at timestamp
+        self._by_age = []  # (created_at timestamp, task id), may hold removed tasks
+
+    def add(self, task_id: str, created_at: float):
+        self.open_tasks[task_id] = created_at
+        heapq.heappush(self._by_age, (created_at, task_id))
+        if len(self._by_age) > 2 * len(self.open_tasks) + 64:
+            self._by_age = [(t, task) for task, t in self.open_tasks.items()]
+            heapq.heapify(self._by_age)
+
+    def remove(self, task_id: str) -> bool:
+        return self.open_tasks.pop(task_id, None) is not None
+
+    @property
+    def oldest(self) -> float:
+        heap = self._by_age
+        # An entry is live only while its task is still open with that timestamp
+        while heap and self.open_tasks.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else float("inf")
+
+    def sort_key(self):
+        return (len(self.open_tasks), -self.oldest)
+
+
+class TeamQueue:
+    """Min-heap of one team's reviewers with lazy deletion"""
+
+    def __init__(self):
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, load: ReviewerLoad):
+        old = self._entries.pop(load.reviewer_id, None)
+        if old is not None:
+            old[-1] = _REMOVED
+        entry = [*load.sort_key(), next(self._counter), load.reviewer_id]
+        self._entries[load.reviewer_id] = entry
+        heapq.heappush(self._heap, entry)
+        # Dead entries only cost memory; compact once they outnumber live ones
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [e for e in self._heap if e[-1] is not _REMOVED]
+            heapq.heapify(self._heap)
+
+    def peek(self) -> Optional[str]:
+        while self._heap and self._heap[0][-1] is _REMOVED:
+            heapq.heappop(self._heap)
+        return self._heap[0][-1] if self._heap else None
+
+
+class TenantAssignments:
+    """One tenant's team queues, reviewer loads and task owners"""
+
+    def __init__(self, loads=None, queues=None, task_owner=None, built_at=None):
+        self.loads: Dict[str, ReviewerLoad] = loads or {}
+        self.queues: Dict[str, TeamQueue] = queues or {}
+        self.task_owner: Dict[str, str] = task_owner or {}
+        self.built_at = built_at
+
+
+class AssignmentScheduler:
+    """Thread-safe reviewer picker shared by all requests in a worker"""
+
+    def __init__(self, refresh_seconds: float = ASSIGNMENT_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.Lock()
+        self._tenants: Dict[str, TenantAssignments] = {}
+        # While a tenant is being rebuilt its changes are also journalled, so the
+        # rebuilt state can replay whatever happened after its queries ran
+        self._rebuilding: Dict[str, int] = {}
+        self._journals: Dict[str, list] = {}
+
+    def _state(self) -> TenantAssignments:
+        tenant_id = get_current_tenant()
+        state = self._tenants.get(tenant_id)
+        if state is None:
+            state = self._tenants.setdefault(tenant_id, TenantAssignments())
+        return state
+
+    def rebuild(self, db: Session):
+        """Reload the current tenant's reviewers and their open tasks from the database"""
+        tenant_id = get_current_tenant()
+        with self._lock:
+            self._rebuilding[tenant_id] = self._rebuilding.get(tenant_id, 0) + 1
+            journal = self._journals.setdefault(tenant_id, [])
+            start = len(journal)
+        try:
+            state = self._load(db)
+        except Exception:
+            with self._lock:
+                self._end_rebuild(tenant_id)
+            raise
+        with self._lock:
+            for op, task_id, reviewer_id, created_at in journal[start:]:
+                self._remove(state, task_id)
+                if op == "record" and reviewer_id in state.loads:
+                    self._add(state, reviewer_id, task_id, created_at)
+            self._tenants[tenant_id] = state
+            self._end_rebuild(tenant_id)
+
+    def _end_rebuild(self, tenant_id: str):
+        self._rebuilding[tenant_id] -= 1
+        if not self._rebuilding[tenant_id]:
+            del self._rebuilding[tenant_id]
+            del self._journals[tenant_id]
+
+    def _journal(self, op: str, task_id: str, reviewer_id: Optional[str] = None, created_at: datetime = None):
+        """Called under the lock by every change, so a rebuild in progress can replay it"""
+        journal = self._journals.get(get_current_tenant())
+        if journal is not None:
+            journal.append((op, task_id, reviewer_id, created_at))
+
+    def _load(self, db: Session) -> TenantAssignments:
+        reviewers = db.query(User.id, User.team).filter(User.role == "reviewer", User.team.isnot(None)).all()
+        open_tasks = (
+            db.query(ReviewTask.id, ReviewTask.reviewer_id, ReviewTask.created_at)
+            .filter(ReviewTask.status.in_(OPEN_STATUSES), ReviewTask.reviewer_id.isnot(None))
+            .all()
+        )
+        loads = {reviewer_id: ReviewerLoad(reviewer_id, team) for reviewer_id, team in reviewers}
+        owners = {}
+        for task_id, reviewer_id, created_at in open_tasks:
+            load = loads.get(reviewer_id)
+            if load is not None:
+                load.add(task_id, _timestamp(created_at))
+                owners[task_id] = reviewer_id
+        queues: Dict[str, TeamQueue] = {}
+        for load in loads.values():
+            queues.setdefault(load.team, TeamQueue()).update(load)
+
+        return TenantAssignments(loads, queues, owners, time.monotonic())
+
+    def refresh_if_stale(self, db: Session):
+        built_at = self._state().built_at
+        if built_at is None or time.monotonic() - built_at > self.refresh_seconds:
+            self.rebuild(db)
+
+    def assign(self, db: Session, team: str, task_id: str, created_at: datetime = None) -> Optional[str]:
+        """Pick the least loaded reviewer on ``team`` and count the task against them"""
+        self.refresh_if_stale(db)
+        with self._lock:
+            state = self._state()
+            queue = state.queues.get(team)
+            reviewer_id = queue.peek() if queue else None
+            if reviewer_id is not None:
+                self._add(state, reviewer_id, task_id, created_at)
+                self._journal("record", task_id, reviewer_id, created_at)
+            return reviewer_id
+
+    def record(self, reviewer_id: Optional[str], task_id: str, created_at: datetime = None):
+        """Count an explicitly assigned open task; moves it if it had another owner"""
+        with self._lock:
+            state = self._state()
+            self._remove(state, task_id)
+            if reviewer_id in state.loads:
+                self._add(state, reviewer_id, task_id, created_at)
+            self._journal("record", task_id, reviewer_id, created_at)
+
+    def release(self, task_id: str):
+        """Stop counting a task (approved, rejected or reassigned)"""
+        with self._lock:
+            self._remove(self._state(), task_id)
+            self._journal("release", task_id)
+
+    def rebalance(self, db: Session, stale_before: datetime, min_gap: int = 2) -> List[dict]:
+        """
+        Move stale open tasks to the least loaded reviewer on their team when
+        that narrows the gap by at least ``min_gap`` tasks; also assigns stale
+        unassigned tasks. The caller commits.
+        """
+        self.rebuild(db)
+        stale = (
+            db.query(ReviewTask)
+            .filter(ReviewTask.status.in_(OPEN_STATUSES), ReviewTask.created_at < stale_before)
+            .order_by(ReviewTask.created_at)
+            .all()
+        )
+        moves = []
+        with self._lock:
+            state = self._state()
+            for task in stale:
+                queue = state.queues.get(task.team)
+                target = queue.peek() if queue else None
+                if target is None or target == task.reviewer_id:
+                    continue
+                current = state.loads.get(task.reviewer_id)
+                if current is not None and len(current.open_tasks) - len(state.loads[target].open_tasks) < min_gap:
+                    continue
+                self._remove(state, task.id)
+                self._add(state, target, task.id, task.created_at)
+                self._journal("record", task.id, target, task.created_at)
+                moves.append({"task_id": task.id, "request_id": task.request_id,
+                              "from": task.reviewer_id, "to": target})
+                task.reviewer_id = target
+        return moves
+
+    def workload(self) -> Dict[str, List[dict]]:
+        with self._lock:
+            teams: Dict[str, List[dict]] = {}
+            for load in sorted(self._state().loads.values(), key=lambda l: (l.team, l.sort_key())):
+                oldest = load.oldest
+                teams.setdefault(load.team, []).append({
+                    "reviewer_id": load.reviewer_id,
+                    "open_tasks": len(load.open_tasks),
+                    "oldest_open_at": datetime.fromtimestamp(oldest, timezone.utc).replace(tzinfo=None).isoformat() if load.open_tasks else None,
+                })
+            return teams
+
+    @staticmethod
+    def _add(state: TenantAssignments, reviewer_id: str, task_id: str, created_at: Optional[datetime]):
+        load = state.loads[reviewer_id]
+        load.add(task_id, _timestamp(created_at))
+        state.task_owner[task_id] = reviewer_id
+        state.queues[load.team].update(load)
+
+    @staticmethod
+    def _remove(state: TenantAssignments, task_id: str):
+        reviewer_id = state.task_owner.pop(task_id, None)
+        load = state.loads.get(reviewer_id)
+        if load is not None and load.remove(task_id):
+            state.queues[load.team].update(load)
+
+
+def _timestamp(created_at: Optional[datetime]) -> float:
+    # created_at columns hold naive UTC datetimes
+    return (created_at or datetime.utcnow()).replace(tzinfo=timezone.utc).timestamp()
+
+
+assignment_scheduler = AssignmentScheduler()
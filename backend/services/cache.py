@@ -0,0 +1,338 @@
+"""
+Response cache for the read-heavy GET endpoints.
+
+Entries are keyed by tenant, resource and id (prefixed with a schema version
+so a payload shape change never serves stale JSON) and carry a content ETag plus
+Last-Modified taken from the row's updated_at. Write paths call
+``response_cache.invalidate`` after they commit.
+"""
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Sized
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+from db.tenancy import get_current_tenant
+
+# Bump when a cached response model changes shape
+CACHE_SCHEMA_VERSION = 1
+
+INTAKE = "intake"
+SCORING = "scoring"
+REVIEW_TASKS = "review_tasks"
+
+
+class InMemoryLRUCache:
+    """Process-local LRU cache with per-entry TTL"""
+
+    shared = False
+
+    def __init__(self, max_entries: int = 10000, default_ttl: int = 300):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict, ttl: Optional[int] = None):
+        expires_at = time.monotonic() + (ttl or self.default_ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """Cache backed by a Redis-compatible server (Redis, Valkey, KeyDB, ...)"""
+
+    # Deletes are visible to every process, so entries need no generation check
+    shared = True
+
+    def __init__(self, url: str, default_ttl: int = 300, prefix: str = "aigrc:"):
+        import redis  # optional dependency, only needed for this backend
+
+        self.client = redis.Redis.from_url(url)
+        self.default_ttl = default_ttl
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[dict]:
+        raw = self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key: str, value: dict, ttl: Optional[int] = None):
+        self.client.set(self.prefix + key, json.dumps(value, separators=(",", ":")), ex=ttl or self.default_ttl)
+
+    def delete(self, keys: Iterable[str]):
+        keys = [self.prefix + k for k in keys]
+        if keys:
+            self.client.delete(*keys)
+
+    def clear(self):
+        for key in self.client.scan_iter(match=self.prefix + "*"):
+            self.client.delete(key)
+
+    # No __len__: counting our keys means a SCAN of the whole keyspace, far too
+    # slow for every metrics scrape, so stats() reports entries as unknown
+
+
+class NullCache:
+    """Backend used when caching is disabled"""
+
+    shared = True
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None):
+        pass
+
+    def delete(self, keys):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class LocalGenerations:
+    """Per-process invalidation counters, bounded to the most recently bumped keys"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._counters: "OrderedDict[str, int]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def bump(self, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._counters[key] = self._counters.pop(key, 0) + 1
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class SharedGenerations:
+    """
+    Invalidation counters in an anonymous shared mapping.
+
+    Created by the prefork server before it forks, so an invalidation in one
+    worker is seen by every worker's private cache on its next lookup. Keys
+    hash into a fixed number of slots; a collision only costs an extra miss.
+    """
+
+    def __init__(self, slots: int = 65536):
+        self.slots = slots
+        self._map = mmap.mmap(-1, slots * 8)
+        self._counters = memoryview(self._map).cast("Q")
+        self._lock = multiprocessing.Lock()
+
+    def _slot(self, key: str) -> int:
+        return zlib.crc32(key.encode()) % self.slots
+
+    def get(self, key: str) -> int:
+        return self._counters[self._slot(key)]
+
+    def bump(self, keys: Iterable[str]):
+        slots = {self._slot(key) for key in keys}
+        with self._lock:
+            for slot in slots:
+                self._counters[slot] += 1
+
+    def clear(self):
+        # Counters only need to change, never reset; clearing would resurrect stale entries
+        pass
+
+
+class ResponseCache:
+    """
+    Versioned response cache with hit/miss accounting.
+
+    Every invalidation bumps a per-key generation and entries remember the
+    generation they were filled at, so an entry invalidated elsewhere (another
+    worker) reads as a miss. A reader that missed passes the generation it saw
+    back to ``put``; if a writer invalidated the key in the meantime the fill
+    is dropped instead of caching a stale read.
+    """
+
+    def __init__(self, backend, ttl: int = 300, generations=None):
+        self.backend = backend
+        self.ttl = ttl
+        self.generations = generations or LocalGenerations()
+        self._hits: Dict[str, int] = {}
+        self._misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(resource: str, resource_id) -> str:
+        return f"v{CACHE_SCHEMA_VERSION}:{get_current_tenant()}:{resource}:{resource_id}"
+
+    def generation(self, resource: str, resource_id) -> int:
+        return self.generations.get(self.key(resource, resource_id))
+
+    def get(self, resource: str, resource_id) -> Optional[dict]:
+        key = self.key(resource, resource_id)
+        entry = self.backend.get(key)
+        if entry is not None and not self.backend.shared and entry.get("generation", 0) != self.generations.get(key):
+            entry = None
+        counter = self._hits if entry is not None else self._misses
+        with self._lock:
+            counter[resource] = counter.get(resource, 0) + 1
+        return entry
+
+    def put(self, resource: str, resource_id, payload, last_modified: Optional[datetime] = None,
+            generation: Optional[int] = None) -> dict:
+        """Build an entry for ``payload`` and store it unless invalidated since ``generation``"""
+        body = json.dumps(payload, separators=(",", ":"), sort_keys=True, default=str)
+        entry = {
+            "payload": payload,
+            "etag": '"%s"' % hashlib.sha1(body.encode()).hexdigest(),
+            "last_modified": _http_date(last_modified) if last_modified else None,
+        }
+        current = self.generation(resource, resource_id)
+        if generation is None or generation == current:
+            entry["generation"] = current
+            self.backend.set(self.key(resource, resource_id), entry, self.ttl)
+        return entry
+
+    def invalidate(self, resource: str, *resource_ids):
+        keys = [self.key(resource, rid) for rid in resource_ids]
+        self.generations.bump(keys)
+        self.backend.delete(keys)
+
+    def stats(self) -> dict:
+        with self._lock:
+            resources = set(self._hits) | set(self._misses)
+            per_resource = {}
+            for resource in sorted(resources):
+                hits = self._hits.get(resource, 0)
+                misses = self._misses.get(resource, 0)
+                per_resource[resource] = {
+                    "hits": hits,
+                    "misses": misses,
+                    "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+                }
+            hits = sum(self._hits.values())
+            misses = sum(self._misses.values())
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.backend) if isinstance(self.backend, Sized) else None,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "resources": per_resource,
+        }
+
+    def clear(self):
+        self.backend.clear()
+        self.generations.clear()
+        with self._lock:
+            self._hits.clear()
+            self._misses.clear()
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, entry: dict) -> bool:
+    """Evaluate If-None-Match / If-Modified-Since against a cache entry"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, entry["etag"])
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and entry.get("last_modified"):
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            modified = parsedate_to_datetime(entry["last_modified"])
+        except (TypeError, ValueError):
+            return False
+        return modified <= since
+    return False
+
+
+def conditional_response(request: Request, entry: dict, hit: bool) -> Response:
+    """Return 304 when the client's validators match, otherwise the cached JSON"""
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": "private, no-cache",
+        "X-Cache": "HIT" if hit else "MISS",
+    }
+    if entry.get("last_modified"):
+        headers["Last-Modified"] = entry["last_modified"]
+    if is_not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(entry["payload"], headers=headers)
+
+
+def build_cache() -> ResponseCache:
+    backend_name = os.getenv("CACHE_BACKEND", "memory").lower()
+    ttl = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+    if backend_name == "redis":
+        backend = RedisCache(os.getenv("REDIS_URL", "redis://localhost:6379/0"), default_ttl=ttl)
+    elif backend_name in ("none", "off", "disabled"):
+        backend = NullCache()
+    else:
+        backend = InMemoryLRUCache(max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "10000")), default_ttl=ttl)
+    return ResponseCache(backend, ttl=ttl)
+
+
+response_cache = build_cache()
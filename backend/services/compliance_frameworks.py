@@ -1,6 +1,7 @@
 """
 Compliance framework question sets for different standards
 """
+from types import MappingProxyType
 
 NIST_AI_RMF_CHECKLIST = [
     {
@@ -207,16 +208,18 @@ MAESTRO_CHECKLIST = [
     }
 ]
 
+# Read-only so the catalog can be loaded once and shared by forked workers (see server.py)
+FRAMEWORK_CHECKLISTS = MappingProxyType({
+    'NIST': NIST_AI_RMF_CHECKLIST,
+    'SOC2': SOC2_CHECKLIST,
+    'OWASP': OWASP_LLM_CHECKLIST,
+    'SOX': SOX_CHECKLIST,
+    'MAESTRO': MAESTRO_CHECKLIST,
+})
+
 def get_checklist_for_framework(framework: str):
     """Get checklist questions for a specific framework"""
-    frameworks = {
-        'NIST': NIST_AI_RMF_CHECKLIST,
-        'SOC2': SOC2_CHECKLIST,
-        'OWASP': OWASP_LLM_CHECKLIST,
-        'SOX': SOX_CHECKLIST,
-        'MAESTRO': MAESTRO_CHECKLIST,
-    }
-    return frameworks.get(framework, [])
+    return FRAMEWORK_CHECKLISTS.get(framework, [])
 
 def get_all_frameworks():
     """Get list of all available frameworks"""
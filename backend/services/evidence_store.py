@@ -0,0 +1,217 @@
+"""
+Content-addressed blob storage for evidence files.
+
+Uploads are streamed to a staging file while their SHA-256 is computed, then
+moved to a path derived from the digest, so identical files are stored once
+however many requests, checklists or tenants attach them. Blobs are
+immutable; only the ``evidence`` rows that point at them are tenant-scoped.
+A blob whose rows never landed (a failed insert) is left in place and removed
+by the ``evidence_sweep`` job once it is older than a grace period and no
+tenant references it; re-uploading an existing local blob refreshes its mtime.
+
+Backends:
+
+* ``local`` (default): files under EVIDENCE_ROOT, fanned out as ``ab/cd/<digest>``.
+* ``s3``: an S3-compatible bucket (AWS, MinIO, ...) via boto3; set
+  EVIDENCE_S3_BUCKET and, for a local stand-in, EVIDENCE_S3_ENDPOINT_URL.
+"""
+import hashlib
+import os
+import tempfile
+from typing import Iterator, Optional, Tuple
+
+EVIDENCE_ROOT = os.getenv("EVIDENCE_ROOT", "./evidence")
+EVIDENCE_MAX_BYTES = int(os.getenv("EVIDENCE_MAX_BYTES", str(512 * 1024 * 1024)))
+# Read and write unit for uploads and downloads; the most a transfer holds in memory
+CHUNK_SIZE = 1024 * 1024
+
+
+class EvidenceTooLarge(Exception):
+    pass
+
+
+class StagedUpload:
+    """An upload in progress: a temp file plus the running digest of what was written"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix="upload-")
+        self._file = os.fdopen(fd, "wb")
+        self._hash = hashlib.sha256()
+        self.max_bytes = max_bytes
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        self.size += len(chunk)
+        if self.size > self.max_bytes:
+            raise EvidenceTooLarge(f"Evidence files are limited to {self.max_bytes} bytes")
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def finish(self) -> str:
+        self._file.close()
+        return self._hash.hexdigest()
+
+    def discard(self):
+        if not self._file.closed:
+            self._file.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class LocalBlobStore:
+    def __init__(self, root: str = EVIDENCE_ROOT, max_bytes: int = EVIDENCE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.staging = os.path.join(root, "tmp")
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def stage(self) -> StagedUpload:
+        return StagedUpload(self.staging, self.max_bytes)
+
+    def commit(self, upload: StagedUpload) -> Tuple[str, bool]:
+        """Move a finished upload into place; returns (digest, whether the blob is new)"""
+        digest = upload.finish()
+        target = self.path(digest)
+        if os.path.exists(target):
+            upload.discard()
+            # Restart the orphan grace period; a row for it is about to be inserted
+            os.utime(target)
+            return digest, False
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Same filesystem as the staging dir, so this is an atomic rename; a
+        # concurrent upload of the same bytes just replaces identical content
+        os.replace(upload.path, target)
+        return digest, True
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def delete(self, digest: str):
+        try:
+            os.unlink(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+    def list_blobs(self) -> Iterator[Tuple[str, float]]:
+        """(digest, last modified timestamp) of every stored blob"""
+        for directory, subdirs, files in os.walk(self.root):
+            if directory == self.root:
+                subdirs[:] = [d for d in subdirs if os.path.join(directory, d) != self.staging]
+            for name in files:
+                if len(name) == 64:
+                    try:
+                        yield name, os.stat(os.path.join(directory, name)).st_mtime
+                    except FileNotFoundError:
+                        continue
+
+    def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Yield bytes ``start``..``end`` (inclusive) of a blob, CHUNK_SIZE at a time"""
+        with open(self.path(digest), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+
+class S3BlobStore:
+    """Blobs in an S3-compatible bucket; uploads are staged on local disk until hashed"""
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str] = None, prefix: str = "evidence/",
+                 staging: str = EVIDENCE_ROOT, max_bytes: int = EVIDENCE_MAX_BYTES):
+        import boto3  # optional dependency, only needed for this backend
+
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.staging = os.path.join(staging, "tmp")
+
+    def key(self, digest: str) -> str:
+        return f"{self.prefix}{digest[:2]}/{digest[2:4]}/{digest}"
+
+    def stage(self) -> StagedUpload:
+        return StagedUpload(self.staging, self.max_bytes)
+
+    def commit(self, upload: StagedUpload) -> Tuple[str, bool]:
+        digest = upload.finish()
+        try:
+            if self.exists(digest):
+                return digest, False
+            # upload_file streams from disk, switching to multipart for large files
+            self.client.upload_file(upload.path, self.bucket, self.key(digest))
+            return digest, True
+        finally:
+            upload.discard()
+
+    def exists(self, digest: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self.key(digest))
+            return True
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def delete(self, digest: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.key(digest))
+
+    def list_blobs(self) -> Iterator[Tuple[str, float]]:
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", ()):
+                yield obj["Key"].rsplit("/", 1)[-1], obj["LastModified"].timestamp()
+
+    def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        body = self.client.get_object(Bucket=self.bucket, Key=self.key(digest), Range=byte_range)["Body"]
+        try:
+            yield from body.iter_chunks(CHUNK_SIZE)
+        finally:
+            body.close()
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Resolve a single ``bytes=`` range against ``size``. Returns None to serve
+    the whole file (no header, or a form we do not split such as multiple
+    ranges) and raises ValueError when the range cannot be satisfied.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, sep, last = header[len("bytes="):].strip().partition("-")
+    try:
+        start = int(first) if first else None
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if not sep or (start is None and end is None) or (end is not None and start is not None and end < start):
+        return None
+    if start is None:
+        # Suffix range: the last ``end`` bytes
+        if end == 0 or size == 0:
+            raise ValueError("Unsatisfiable range")
+        return max(size - end, 0), size - 1
+    if start >= size:
+        raise ValueError("Unsatisfiable range")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def build_blob_store():
+    backend = os.getenv("EVIDENCE_BACKEND", "local").lower()
+    if backend == "s3":
+        return S3BlobStore(os.environ["EVIDENCE_S3_BUCKET"], endpoint_url=os.getenv("EVIDENCE_S3_ENDPOINT_URL"))
+    return LocalBlobStore()
+
+
+blob_store = build_blob_store()
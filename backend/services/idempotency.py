@@ -0,0 +1,402 @@
+"""
+Idempotency-Key support for every POST endpoint.
+
+A client that retries a POST with the same ``Idempotency-Key`` header gets
+the first attempt's response back instead of running the write again. The
+response is replayed, with all its headers except hop-by-hop ones, plus
+``Idempotent-Replayed: true``. Keys are per tenant. Reusing a key for a
+different request (another method, path, query or body) is answered 422,
+also while the first request is still running.
+
+* Completed responses are kept in ``idempotency_keys`` for
+  IDEMPOTENCY_TTL_HOURS. The retention job deletes expired rows. The
+  IDEMPOTENCY_LRU_SIZE most recent ones are also held in memory, so a
+  retry that lands on the same worker never reaches the database.
+* Concurrent duplicates are coalesced. In one worker, the later copies wait
+  on the first one's future. Across workers, the first request inserts a
+  row with a NULL status and a random owner token (its claim). The others
+  poll that row for up to IDEMPOTENCY_WAIT_SECONDS, then answer 409. While
+  the request runs, its worker extends the claim every third of
+  IDEMPOTENCY_LOCK_SECONDS, however long the request takes. A claim that
+  stops being extended belongs to a worker that died, and the next request
+  takes it over with a new owner token. Completing or releasing a claim
+  only touches the row while it still carries the caller's own token.
+* Only responses below 500 are stored, except 409 and 429. A server error,
+  an exception or a disconnect drops the claim, so a retry runs again.
+  A response larger than IDEMPOTENCY_MAX_RESPONSE_BYTES still completes the
+  key, but without its body (NULL ``body``). Retries of it get 410 rather
+  than running the write again.
+
+Bodies up to IDEMPOTENCY_MAX_FINGERPRINT_BYTES are buffered and hashed into
+the fingerprint. Longer or chunked bodies (evidence uploads) stream through
+untouched, and only their Content-Length is hashed.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from prometheus_client import Counter
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from db.batching import write_batcher
+from db.tenancy import get_current_tenant
+from models.models import IdempotencyKey
+
+logger = logging.getLogger("aigrc.idempotency")
+
+IDEMPOTENCY_ENABLED = os.getenv("IDEMPOTENCY_ENABLED", "1") == "1"
+IDEMPOTENCY_TTL_HOURS = float(os.getenv("IDEMPOTENCY_TTL_HOURS", "24"))
+IDEMPOTENCY_LOCK_SECONDS = float(os.getenv("IDEMPOTENCY_LOCK_SECONDS", "60"))
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))
+IDEMPOTENCY_POLL_SECONDS = float(os.getenv("IDEMPOTENCY_POLL_SECONDS", "0.05"))
+IDEMPOTENCY_LRU_SIZE = int(os.getenv("IDEMPOTENCY_LRU_SIZE", "10000"))
+IDEMPOTENCY_MAX_RESPONSE_BYTES = int(os.getenv("IDEMPOTENCY_MAX_RESPONSE_BYTES", str(256 * 1024)))
+IDEMPOTENCY_MAX_FINGERPRINT_BYTES = int(os.getenv("IDEMPOTENCY_MAX_FINGERPRINT_BYTES", str(1024 * 1024)))
+
+KEY_HEADER = b"idempotency-key"
+# Not replayed: hop-by-hop headers belong to the original connection, and
+# content-length is recomputed from the stored body
+UNREPLAYED_HEADERS = frozenset((
+    b"connection", b"keep-alive", b"proxy-authenticate", b"proxy-authorization", b"te", b"trailer",
+    b"transfer-encoding", b"upgrade", b"content-length",
+))
+MAX_KEY_LENGTH = 255
+IDEMPOTENT_METHODS = ("POST",)
+# Outcomes a retry should not be pinned to
+UNSTORED_STATUSES = (409, 429)
+
+IDEMPOTENCY_REQUESTS = Counter(
+    "idempotency_requests_total",
+    "POST requests carrying an Idempotency-Key, by outcome",
+    ["outcome"],
+)
+
+
+class StoredResponse:
+    __slots__ = ("fingerprint", "status_code", "headers", "body", "expires_at")
+
+    def __init__(self, fingerprint: str, status_code: int, headers: Optional[List[List[str]]], body: bytes,
+                 expires_at: datetime):
+        self.fingerprint = fingerprint
+        self.status_code = status_code
+        self.headers = headers  # [name, value] pairs, latin-1 decoded
+        self.body = body
+        self.expires_at = expires_at
+
+
+# claim() results when another request holds the key, with the same or a different fingerprint
+IN_PROGRESS = "in_progress"
+MISMATCH = "mismatch"
+
+
+class IdempotencyStore:
+    """Key-to-response mappings in ``idempotency_keys`` behind an in-memory LRU"""
+
+    def __init__(self, lru_size: int = IDEMPOTENCY_LRU_SIZE, ttl: float = IDEMPOTENCY_TTL_HOURS * 3600,
+                 lock_seconds: float = IDEMPOTENCY_LOCK_SECONDS):
+        self.lru_size = lru_size
+        self.ttl = timedelta(seconds=ttl)
+        self.lock = timedelta(seconds=lock_seconds)
+        self._hot: "OrderedDict[Tuple[str, str], StoredResponse]" = OrderedDict()
+        self._hot_lock = threading.Lock()
+
+    def cached(self, tenant_id: str, key: str) -> Optional[StoredResponse]:
+        with self._hot_lock:
+            stored = self._hot.get((tenant_id, key))
+            if stored is None:
+                return None
+            if stored.expires_at <= datetime.utcnow():
+                del self._hot[(tenant_id, key)]
+                return None
+            self._hot.move_to_end((tenant_id, key))
+            return stored
+
+    def _remember(self, tenant_id: str, key: str, stored: StoredResponse):
+        with self._hot_lock:
+            self._hot[(tenant_id, key)] = stored
+            self._hot.move_to_end((tenant_id, key))
+            while len(self._hot) > self.lru_size:
+                self._hot.popitem(last=False)
+
+    def clear(self):
+        with self._hot_lock:
+            self._hot.clear()
+
+    def _owned(self, db: Session, key: str, owner: str):
+        return db.query(IdempotencyKey).filter(
+            IdempotencyKey.key == key, IdempotencyKey.owner == owner, IdempotencyKey.status_code.is_(None))
+
+    def claim(self, key: str, fingerprint: str):
+        """
+        The stored response if the key has one, IN_PROGRESS if another request
+        holds it (MISMATCH if that request has a different fingerprint), else
+        the owner token of a new claim for this request
+        """
+        owner = secrets.token_hex(16)
+
+        def apply(db: Session):
+            now = datetime.utcnow()
+            row = db.query(IdempotencyKey).filter(IdempotencyKey.key == key).first()
+            if row is None:
+                db.add(IdempotencyKey(key=key, fingerprint=fingerprint, owner=owner, expires_at=now + self.lock))
+                db.flush()
+                return owner
+            if row.expires_at > now:
+                if row.status_code is None:
+                    return IN_PROGRESS if row.fingerprint == fingerprint else MISMATCH
+                return StoredResponse(row.fingerprint, row.status_code, row.headers, row.body, row.expires_at)
+            # An abandoned claim or a forgotten response: start over
+            row.fingerprint = fingerprint
+            row.status_code = row.headers = row.body = None
+            row.owner = owner
+            row.expires_at = now + self.lock
+            db.flush()
+            return owner
+
+        try:
+            outcome = write_batcher.run(apply)
+        except IntegrityError:
+            # Another worker inserted the claim first
+            return IN_PROGRESS
+        if isinstance(outcome, StoredResponse):
+            self._remember(get_current_tenant(), key, outcome)
+        return outcome
+
+    def extend(self, key: str, owner: str) -> bool:
+        """Push back the claim's expiry; False once the claim is no longer this owner's"""
+        expires_at = datetime.utcnow() + self.lock
+        return bool(write_batcher.run(lambda db: self._owned(db, key, owner).update(
+            {"expires_at": expires_at}, synchronize_session=False)))
+
+    def complete(self, key: str, owner: str, fingerprint: str, status_code: int,
+                 headers: Optional[List[List[str]]], body: Optional[bytes]) -> bool:
+        """Store the response on the caller's claim; False if the claim was taken over meanwhile"""
+        stored = StoredResponse(fingerprint, status_code, headers, body, datetime.utcnow() + self.ttl)
+        updated = write_batcher.run(lambda db: self._owned(db, key, owner).update({
+            "fingerprint": fingerprint,
+            "status_code": status_code,
+            "headers": headers,
+            "body": body,
+            "expires_at": stored.expires_at,
+        }, synchronize_session=False))
+        if updated:
+            self._remember(get_current_tenant(), key, stored)
+        return bool(updated)
+
+    def release(self, key: str, owner: str):
+        """Drop the caller's unfinished claim so the next retry runs the request"""
+        write_batcher.run(lambda db: self._owned(db, key, owner).delete(synchronize_session=False))
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for header, value in scope["headers"]:
+        if header == name:
+            return value
+    return None
+
+
+class IdempotencyMiddleware:
+    """Pure ASGI middleware replaying and coalescing POSTs that carry an Idempotency-Key"""
+
+    def __init__(self, app, store: IdempotencyStore = None, enabled: bool = IDEMPOTENCY_ENABLED,
+                 wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS):
+        self.app = app
+        self.store = store
+        self.enabled = enabled
+        self.wait_seconds = wait_seconds
+        # (tenant, key) -> (future resolved when this worker's running copy finishes, its fingerprint)
+        self._inflight = {}
+
+    async def __call__(self, scope, receive, send):
+        if not self.enabled or scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+        raw_key = _header(scope, KEY_HEADER)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        key = raw_key.decode("latin-1").strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await self._respond(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+            return
+
+        store = self.store if self.store is not None else idempotency_store
+        receive, fingerprint = await self._fingerprint(scope, receive)
+        tenant_id = get_current_tenant()
+
+        while True:
+            stored = store.cached(tenant_id, key)
+            if stored is not None:
+                await self._replay(send, stored, fingerprint)
+                return
+            inflight = self._inflight.get((tenant_id, key))
+            if inflight is None:
+                break
+            running, running_fingerprint = inflight
+            # A different request under a key in use is refused now, not after the first one finishes
+            if running_fingerprint != fingerprint:
+                await self._mismatch(send)
+                return
+            # A future from another event loop can't be awaited here; the DB claim coalesces instead
+            if running.get_loop() is not asyncio.get_running_loop():
+                break
+            IDEMPOTENCY_REQUESTS.labels(outcome="coalesced").inc()
+            await asyncio.shield(running)
+
+        done = asyncio.get_running_loop().create_future()
+        self._inflight[(tenant_id, key)] = (done, fingerprint)
+        try:
+            await self._run_once(scope, receive, send, store, key, fingerprint)
+        finally:
+            inflight = self._inflight.get((tenant_id, key))
+            if inflight is not None and inflight[0] is done:
+                del self._inflight[(tenant_id, key)]
+            done.set_result(None)
+
+    async def _run_once(self, scope, receive, send, store: IdempotencyStore, key: str, fingerprint: str):
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            outcome = await run_in_threadpool(store.claim, key, fingerprint)
+            if isinstance(outcome, StoredResponse):
+                await self._replay(send, outcome, fingerprint)
+                return
+            if outcome is MISMATCH:
+                await self._mismatch(send)
+                return
+            if outcome is not IN_PROGRESS:
+                owner = outcome
+                break
+            if time.monotonic() >= deadline:
+                IDEMPOTENCY_REQUESTS.labels(outcome="busy").inc()
+                await self._respond(send, 409, "A request with this Idempotency-Key is still in progress",
+                                    retry_after=True)
+                return
+            await asyncio.sleep(IDEMPOTENCY_POLL_SECONDS)
+
+        IDEMPOTENCY_REQUESTS.labels(outcome="executed").inc()
+        response = {"status": None, "headers": [], "body": bytearray(), "retained": True}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = [[name.decode("latin-1"), value.decode("latin-1")]
+                                       for name, value in message.get("headers", [])
+                                       if name.lower() not in UNREPLAYED_HEADERS]
+            elif message["type"] == "http.response.body" and response["retained"]:
+                response["body"] += message.get("body", b"")
+                if len(response["body"]) > IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                    response["retained"] = False
+                    response["body"] = bytearray()
+            await send(message)
+
+        heartbeat = asyncio.ensure_future(self._heartbeat(store, key, owner))
+        try:
+            await self.app(scope, receive, capture)
+        except BaseException:
+            heartbeat.cancel()
+            await run_in_threadpool(store.release, key, owner)
+            raise
+        heartbeat.cancel()
+        status = response["status"]
+        if status is not None and status < 500 and status not in UNSTORED_STATUSES:
+            # Too large to keep: record that the request ran, so a retry can't run it again
+            headers, body = (response["headers"], bytes(response["body"])) if response["retained"] else (None, None)
+            if not await run_in_threadpool(store.complete, key, owner, fingerprint, status, headers, body):
+                logger.warning("Idempotency-Key %r was taken over before its request finished", key)
+        else:
+            await run_in_threadpool(store.release, key, owner)
+
+    @staticmethod
+    async def _heartbeat(store: IdempotencyStore, key: str, owner: str):
+        """Keep the claim alive for as long as the request runs"""
+        interval = store.lock.total_seconds() / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await run_in_threadpool(store.extend, key, owner):
+                    logger.warning("Lost the claim on Idempotency-Key %r while its request was running", key)
+                    return
+            except Exception:
+                # Transient DB trouble; the next beat tries again before the claim lapses
+                logger.exception("Could not extend the claim on Idempotency-Key %r", key)
+
+    @staticmethod
+    async def _fingerprint(scope, receive):
+        digest = hashlib.sha256()
+        digest.update(f"{scope['method']} {scope['path']}?{scope.get('query_string', b'').decode('latin-1')}\n".encode())
+        length = _header(scope, b"content-length")
+        if length is None or not length.isdigit() or int(length) > IDEMPOTENCY_MAX_FINGERPRINT_BYTES:
+            digest.update(b"length:" + (length or b"chunked"))
+            return receive, digest.hexdigest()
+
+        chunks = []
+        more_body = True
+        while more_body:
+            message = await receive()
+            if message["type"] != "http.request":
+                # Disconnected before the body arrived; let the app see it
+                chunks = None
+                pending = message
+                break
+            chunks.append(message.get("body", b""))
+            more_body = message.get("more_body", False)
+        if chunks is None:
+            async def disconnected():
+                return pending
+            return disconnected, digest.hexdigest()
+
+        body = b"".join(chunks)
+        digest.update(body)
+        replayed = False
+
+        async def replay_body():
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        return replay_body, digest.hexdigest()
+
+    @staticmethod
+    async def _replay(send, stored: StoredResponse, fingerprint: str):
+        if stored.fingerprint != fingerprint:
+            await IdempotencyMiddleware._mismatch(send)
+            return
+        if stored.body is None:
+            IDEMPOTENCY_REQUESTS.labels(outcome="not_retained").inc()
+            await IdempotencyMiddleware._respond(
+                send, 410, f"The request with this Idempotency-Key already completed with status "
+                           f"{stored.status_code}; its response was too large to retain")
+            return
+        IDEMPOTENCY_REQUESTS.labels(outcome="replayed").inc()
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in stored.headers or []]
+        headers += [(b"idempotent-replayed", b"true"), (b"content-length", str(len(stored.body)).encode())]
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body})
+
+    @staticmethod
+    async def _mismatch(send):
+        IDEMPOTENCY_REQUESTS.labels(outcome="mismatch").inc()
+        await IdempotencyMiddleware._respond(send, 422, "Idempotency-Key was already used for a different request")
+
+    @staticmethod
+    async def _respond(send, status: int, detail: str, retry_after: bool = False):
+        headers = [(b"content-type", b"application/json")]
+        if retry_after:
+            headers.append((b"retry-after", b"1"))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": json.dumps({"detail": detail}).encode()})
+
+
+idempotency_store = IdempotencyStore()
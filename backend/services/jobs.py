@@ -0,0 +1,134 @@
+"""
+Cluster-wide periodic jobs: re-scoring, portfolio rollups, retention,
+reviewer rebalancing and the orphaned evidence sweep.
+
+Importing this module registers the jobs on ``services.periodic.scheduler``.
+"""
+import os
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal, engine_registry
+from db.tenancy import INCLUDE_ALL_TENANTS
+from models.models import AuditLog, Evidence, IdempotencyKey, IntakeRequest, ReviewTask, RiskScore
+from services.assignment import assignment_scheduler, REVIEW_SLA_HOURS
+from services.cache import response_cache, INTAKE, REVIEW_TASKS, SCORING
+from services.evidence_store import blob_store
+from services.periodic import scheduler
+from services.review_policy import route_request, AUTO_ROUTE_REVIEWS
+from services.risk_scoring import RiskScoringEngine, RULES_VERSION
+
+RESCORE_INTERVAL_SECONDS = float(os.getenv("RESCORE_INTERVAL_SECONDS", "300"))
+RESCORE_BATCH_SIZE = int(os.getenv("RESCORE_BATCH_SIZE", "500"))
+ROLLUP_INTERVAL_SECONDS = float(os.getenv("ROLLUP_INTERVAL_SECONDS", "3600"))
+RETENTION_INTERVAL_SECONDS = float(os.getenv("RETENTION_INTERVAL_SECONDS", "86400"))
+AUDIT_RETENTION_DAYS = int(os.getenv("AUDIT_RETENTION_DAYS", "365"))
+REBALANCE_INTERVAL_SECONDS = float(os.getenv("REBALANCE_INTERVAL_SECONDS", "900"))
+EVIDENCE_SWEEP_INTERVAL_SECONDS = float(os.getenv("EVIDENCE_SWEEP_INTERVAL_SECONDS", "3600"))
+# An unreferenced blob younger than this may belong to an upload still inserting its row
+EVIDENCE_ORPHAN_GRACE_SECONDS = float(os.getenv("EVIDENCE_ORPHAN_GRACE_SECONDS", "86400"))
+EVIDENCE_SWEEP_BATCH_SIZE = 500
+
+
+@scheduler.job("rescore", RESCORE_INTERVAL_SECONDS)
+def rescore_stale_requests(db: Session) -> dict:
+    """
+    Score requests that have no RiskScore yet, whose score predates the current
+    RULES_VERSION, or that changed after they were last scored, a batch at a time
+    """
+    pending = (
+        db.query(IntakeRequest)
+        .outerjoin(RiskScore, RiskScore.request_id == IntakeRequest.id)
+        .filter(or_(
+            RiskScore.id.is_(None),
+            RiskScore.rule_version.is_(None),
+            RiskScore.rule_version < RULES_VERSION,
+            RiskScore.scored_at.is_(None),
+            IntakeRequest.updated_at > RiskScore.scored_at,
+        ))
+        .limit(RESCORE_BATCH_SIZE)
+        .all()
+    )
+    engine = RiskScoringEngine()
+    for request in pending:
+        risk_score = engine.calculate_total_score(request, db)
+        response_cache.invalidate(SCORING, request.id)
+        response_cache.invalidate(INTAKE, request.id)
+        if AUTO_ROUTE_REVIEWS:
+            route_request(db, request, risk_score)
+    return {"rescored": len(pending)}
+
+
+@scheduler.job("portfolio_rollup", ROLLUP_INTERVAL_SECONDS)
+def portfolio_rollup(db: Session) -> dict:
+    """Snapshot portfolio counts into the audit log for the analytics dashboard"""
+    by_status = dict(db.query(IntakeRequest.status, func.count(IntakeRequest.id)).group_by(IntakeRequest.status).all())
+    pending_by_team = dict(
+        db.query(ReviewTask.team, func.count(ReviewTask.id))
+        .filter(ReviewTask.status.in_(["pending", "needs-info"]))
+        .group_by(ReviewTask.team)
+        .all()
+    )
+    avg_risk = db.query(func.avg(IntakeRequest.risk_score)).scalar()
+    rollup = {
+        "requests_by_status": by_status,
+        "open_tasks_by_team": pending_by_team,
+        "average_risk_score": round(float(avg_risk), 2) if avg_risk is not None else None,
+    }
+    db.add(AuditLog(action="portfolio_rollup", metadata_=rollup))
+    return rollup
+
+
+@scheduler.job("retention", RETENTION_INTERVAL_SECONDS)
+def apply_retention(db: Session) -> dict:
+    """Delete audit log rows older than AUDIT_RETENTION_DAYS and expired idempotency keys"""
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=AUDIT_RETENTION_DAYS)
+    deleted = db.query(AuditLog).filter(AuditLog.created_at < cutoff).delete(synchronize_session=False)
+    keys_deleted = db.query(IdempotencyKey).filter(IdempotencyKey.expires_at < now).delete(synchronize_session=False)
+    return {"audit_logs_deleted": deleted, "idempotency_keys_deleted": keys_deleted}
+
+
+@scheduler.job("rebalance_reviews", REBALANCE_INTERVAL_SECONDS)
+def rebalance_reviews(db: Session) -> dict:
+    """Move open tasks past the review SLA off overloaded reviewers"""
+    moves = assignment_scheduler.rebalance(db, datetime.utcnow() - timedelta(hours=REVIEW_SLA_HOURS))
+    # Invalidate only once the moves are visible, or a reader could re-cache the old owner
+    db.commit()
+    for request_id in {m["request_id"] for m in moves}:
+        response_cache.invalidate(REVIEW_TASKS, request_id)
+    return {"tasks_moved": len(moves)}
+
+
+def _referenced_digests(db: Session, digests: list) -> set:
+    """Which of ``digests`` an evidence row points at, on the shared database or any routed tenant's"""
+    sessions = [db] + [SessionLocal(bind=engine_registry.get(tenant_id))
+                       for tenant_id in sorted(set(engine_registry.databases) | set(engine_registry.schemas))]
+    found = set()
+    try:
+        for session in sessions:
+            found.update(digest for (digest,) in (
+                session.query(Evidence.sha256).filter(Evidence.sha256.in_(digests)).distinct()
+                .execution_options(**{INCLUDE_ALL_TENANTS: True})
+            ))
+    finally:
+        for session in sessions[1:]:
+            session.close()
+    return found
+
+
+@scheduler.job("evidence_sweep", EVIDENCE_SWEEP_INTERVAL_SECONDS, per_tenant=False)
+def sweep_orphaned_evidence(db: Session) -> dict:
+    """Delete blobs past the grace period that no tenant's evidence row references"""
+    cutoff = time.time() - EVIDENCE_ORPHAN_GRACE_SECONDS
+    candidates = [digest for digest, modified in blob_store.list_blobs() if modified < cutoff]
+    deleted = 0
+    for i in range(0, len(candidates), EVIDENCE_SWEEP_BATCH_SIZE):
+        batch = candidates[i:i + EVIDENCE_SWEEP_BATCH_SIZE]
+        for digest in set(batch) - _referenced_digests(db, batch):
+            blob_store.delete(digest)
+            deleted += 1
+    return {"blobs_checked": len(candidates), "blobs_deleted": deleted}
@@ -0,0 +1,126 @@
+"""
+Cluster-wide leader election for periodic jobs.
+
+On PostgreSQL the leader holds a session-level advisory lock
+(``pg_try_advisory_lock``) on a dedicated connection. If the leader dies its
+connection drops, the server releases the lock, and the next worker to poll
+takes over. Other databases (SQLite installs) fall back to an exclusive
+``flock`` on a local file, which covers every worker on the host.
+"""
+import fcntl
+import logging
+import os
+import tempfile
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+from db.database import get_engine
+
+logger = logging.getLogger("aigrc.leader")
+
+# Any 64-bit key works as long as every pod uses the same one
+LEADER_LOCK_ID = int(os.getenv("LEADER_LOCK_ID", "7243110031"))
+LEADER_LOCK_FILE = os.getenv("LEADER_LOCK_FILE", os.path.join(tempfile.gettempdir(), "aigrc-leader.lock"))
+
+
+class AdvisoryLockLeader:
+    """Leadership backed by a PostgreSQL advisory lock"""
+
+    def __init__(self, engine, lock_id: int = LEADER_LOCK_ID):
+        self.engine = engine
+        self.lock_id = lock_id
+        self._conn = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._conn is not None
+
+    def acquire(self) -> bool:
+        """Try to become (or confirm still being) the leader; never blocks"""
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT 1"))
+                self._conn.commit()
+                return True
+            except DBAPIError:
+                logger.warning("Lost leader connection; giving up leadership")
+                self._close()
+
+        try:
+            conn = self.engine.connect()
+        except DBAPIError:
+            logger.warning("Leader election could not connect", exc_info=True)
+            return False
+        try:
+            acquired = conn.execute(text("SELECT pg_try_advisory_lock(:id)"), {"id": self.lock_id}).scalar()
+            # Session-level locks survive commit; this just avoids idling in a transaction
+            conn.commit()
+        except DBAPIError:
+            logger.warning("Leader election query failed", exc_info=True)
+            # The lock may have been taken before the failure; never return this connection to the pool
+            conn.invalidate()
+            conn.close()
+            return False
+        if acquired:
+            self._conn = conn
+            logger.info("Acquired leadership (advisory lock %s)", self.lock_id)
+            return True
+        conn.close()
+        return False
+
+    def release(self):
+        if self._conn is None:
+            return
+        try:
+            self._conn.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": self.lock_id})
+            self._conn.commit()
+        except DBAPIError:
+            pass
+        self._close()
+
+    def _close(self):
+        try:
+            # Invalidating drops the server session (and any lock it held) instead of pooling it
+            self._conn.invalidate()
+            self._conn.close()
+        finally:
+            self._conn = None
+
+
+class FileLockLeader:
+    """Leadership backed by an exclusive flock, for single-host deployments"""
+
+    def __init__(self, path: str = LEADER_LOCK_FILE):
+        self.path = path
+        self._fd = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._fd is not None
+
+    def acquire(self) -> bool:
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o600)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        logger.info("Acquired leadership (lock file %s)", self.path)
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+def build_leader_election():
+    engine = get_engine()
+    if engine.dialect.name == "postgresql":
+        return AdvisoryLockLeader(engine)
+    return FileLockLeader()
@@ -0,0 +1,224 @@
+"""
+Prometheus metrics for the API.
+
+Request latency and in-flight gauges come from ``MetricsMiddleware`` (a plain
+ASGI middleware, so there is no extra task per request). Per-request DB query
+counts and time are collected through SQLAlchemy cursor events into a
+context-local counter; those same events are the only query timer in the app,
+and other modules (profiling) receive each timing through
+``add_query_observer``. Pool and response cache figures are read at scrape time
+by ``StateCollector`` so they cost nothing on the request path.
+
+Under the prefork server (server.py) PROMETHEUS_MULTIPROC_DIR is set and
+/metrics aggregates every worker's samples; pool and cache gauges still
+describe the worker that answered the scrape.
+"""
+import os
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Callable, List, Optional
+
+from prometheus_client import REGISTRY, Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being served",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "db_queries_per_request",
+    "SQL statements executed while serving a request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 250),
+)
+DB_TIME_PER_REQUEST = Histogram(
+    "db_query_seconds_per_request",
+    "Total time spent in SQL statements while serving a request",
+    ["route"],
+    buckets=LATENCY_BUCKETS,
+)
+DB_QUERIES = Counter(
+    "db_queries_total",
+    "SQL statements executed, including outside of requests",
+)
+SCORING_DURATION = Histogram(
+    "scoring_framework_duration_seconds",
+    "Time to score one request against one framework",
+    ["framework"],
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestStats:
+    __slots__ = ("queries", "query_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.query_seconds = 0.0
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current_request_stats() -> Optional[RequestStats]:
+    return _request_stats.get()
+
+
+# Each is called as observer(statement, parameters, rowcount, elapsed_seconds)
+_query_observers: List[Callable] = []
+
+
+def add_query_observer(observer: Callable):
+    """Receive the timing of every SQL statement from the shared cursor hooks"""
+    if observer not in _query_observers:
+        _query_observers.append(observer)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, which is discarded with the statement even when it fails
+    context._query_start = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - context._query_start
+    DB_QUERIES.inc()
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.query_seconds += elapsed
+    for observer in _query_observers:
+        observer(statement, parameters, cursor.rowcount, elapsed)
+
+
+def install_db_hooks():
+    """Attach query timing to every Engine, including ones created later"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def remove_db_hooks():
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _route_template(scope) -> str:
+    # Newer FastAPI keeps included routers nested, so scope["route"] lacks the prefix
+    effective = scope.get("fastapi", {}).get("effective_route_context")
+    if effective is not None:
+        return effective.path
+    route = scope.get("route")
+    return getattr(route, "path", UNMATCHED_ROUTE) if route is not None else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Records latency, in-flight count and DB usage for every HTTP request"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - start
+            in_progress.dec()
+            _request_stats.reset(token)
+            route = _route_template(scope)
+            REQUEST_LATENCY.labels(method, route, str(status_code)).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(route).observe(stats.queries)
+            DB_TIME_PER_REQUEST.labels(route).observe(stats.query_seconds)
+
+
+class StateCollector:
+    """Scrape-time gauges for the connection pool and the response cache"""
+
+    def describe(self):
+        # Keeps registration from calling collect() (and touching the DB) at import time
+        return []
+
+    def collect(self):
+        from db import database
+        from services.cache import response_cache
+
+        # "shared" plus one pool per tenant routed to its own database or schema
+        pools = {"shared": database.get_engine().pool}
+        # The tuned SQLite profile reads through a pool of its own
+        if database.get_read_engine() is not database.get_engine():
+            pools["shared_read"] = database.get_read_engine().pool
+        pools.update({tenant: engine.pool for tenant, engine in database.engine_registry.engines().items()})
+        pool_metrics = (
+            ("db_pool_size", "Configured connection pool size", "size"),
+            ("db_pool_checked_out", "Connections currently checked out", "checkedout"),
+            ("db_pool_checked_in", "Idle connections in the pool", "checkedin"),
+            ("db_pool_overflow", "Connections opened beyond the pool size", "overflow"),
+        )
+        for name, documentation, attr in pool_metrics:
+            family = GaugeMetricFamily(name, documentation, labels=["pool"])
+            for label, pool in pools.items():
+                if hasattr(pool, attr):
+                    family.add_metric([label], getattr(pool, attr)())
+            yield family
+
+        stats = response_cache.stats()
+        hits = CounterMetricFamily("response_cache_hits", "Response cache hits", labels=["resource"])
+        misses = CounterMetricFamily("response_cache_misses", "Response cache misses", labels=["resource"])
+        ratio = GaugeMetricFamily("response_cache_hit_ratio", "Response cache hit ratio", labels=["resource"])
+        for resource, values in stats["resources"].items():
+            hits.add_metric([resource], values["hits"])
+            misses.add_metric([resource], values["misses"])
+            ratio.add_metric([resource], values["hit_ratio"])
+        yield hits
+        yield misses
+        yield ratio
+        if stats["entries"] is not None:
+            yield GaugeMetricFamily("response_cache_entries", "Entries held by the response cache", value=stats["entries"])
+
+
+_state_collector = StateCollector()
+REGISTRY.register(_state_collector)
+install_db_hooks()
+
+
+def render_metrics():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import CollectorRegistry, multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_state_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
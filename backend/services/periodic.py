@@ -0,0 +1,170 @@
+"""
+Periodic background jobs that run exactly once per cluster.
+
+Every worker runs a ``PeriodicScheduler`` thread, but only the one holding
+leadership (see services/leader.py) executes jobs; the rest just poll for
+the lock so a new leader takes over within one tick if the current one dies.
+Jobs are registered with ``@scheduler.job(...)`` in services/jobs.py.
+
+When each job last finished is kept in the ``job_runs`` table rather than in
+the leader's memory, so a worker that takes over leadership waits out the
+remaining interval instead of running every job again straight away. Only
+successful runs are recorded, so a failed job is retried on the next tick.
+
+A job runs once per tenant, inside ``tenant_scope`` and with a session on
+that tenant's database, in its own transaction, so it sees and writes only
+that tenant's rows and one tenant's failure does not roll back the others.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from db.database import SessionLocal, engine_registry, get_engine, tenant_session
+from db.tenancy import DEFAULT_TENANT, INCLUDE_ALL_TENANTS, tenant_scope
+from models.models import IntakeRequest, JobRun, User
+from services.leader import build_leader_election
+
+logger = logging.getLogger("aigrc.periodic")
+
+LEADER_POLL_SECONDS = float(os.getenv("LEADER_POLL_SECONDS", "15"))
+
+
+class PeriodicJob:
+    def __init__(self, name: str, interval: float, func: Callable[[Session], object], per_tenant: bool = True):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.per_tenant = per_tenant
+
+    def due(self, now: datetime, last_run: Optional[datetime]) -> bool:
+        return last_run is None or (now - last_run).total_seconds() >= self.interval
+
+
+class PeriodicScheduler:
+    """Leader-gated runner for registered jobs"""
+
+    def __init__(self, tick: float = LEADER_POLL_SECONDS, leader_factory=build_leader_election):
+        self.tick = tick
+        self.leader_factory = leader_factory
+        self.jobs: List[PeriodicJob] = []
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._leader = None
+
+    def job(self, name: str, interval: float, per_tenant: bool = True):
+        """
+        Decorator registering ``func(db)`` to run every ``interval`` seconds on
+        the leader; with ``per_tenant=False`` it runs once, on the shared database.
+        """
+        def register(func):
+            self.jobs.append(PeriodicJob(name, interval, func, per_tenant))
+            return func
+        return register
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name="periodic-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._leader is not None:
+            self._leader.release()
+            self._leader = None
+
+    def run_pending(self):
+        """Run every due job once, if this process is the leader"""
+        if self._leader is None:
+            self._leader = self.leader_factory()
+        if not self._leader.acquire():
+            return
+        last_runs = self.last_runs()
+        now = datetime.utcnow()
+        for job in self.jobs:
+            if job.due(now, last_runs.get(job.name)):
+                self._run_job(job)
+
+    def last_runs(self) -> Dict[str, datetime]:
+        """When each job last finished, on any worker"""
+        get_engine()
+        db = SessionLocal()
+        try:
+            return dict(db.query(JobRun.name, JobRun.last_run_at))
+        finally:
+            db.close()
+
+    def _record_run(self, job: PeriodicJob):
+        db = SessionLocal()
+        try:
+            db.merge(JobRun(name=job.name, last_run_at=datetime.utcnow()))
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Could not record the run of periodic job %s", job.name)
+        finally:
+            db.close()
+
+    def tenants(self) -> List[str]:
+        """Tenants with users or requests on the shared database, plus every routed tenant"""
+        get_engine()
+        db = SessionLocal()
+        try:
+            found = set()
+            for column in (IntakeRequest.tenant_id, User.tenant_id):
+                found.update(t for (t,) in db.query(column).distinct().execution_options(**{INCLUDE_ALL_TENANTS: True}))
+        finally:
+            db.close()
+        found.update(engine_registry.databases, engine_registry.schemas)
+        return sorted(found or {DEFAULT_TENANT})
+
+    def _run_job(self, job: PeriodicJob):
+        """Run ``job`` for every tenant; only a run where all of them succeeded is recorded"""
+        start = time.monotonic()
+        try:
+            tenants = self.tenants() if job.per_tenant else [DEFAULT_TENANT]
+            succeeded = [self._run_for_tenant(job, tenant_id) for tenant_id in tenants]
+        except Exception:
+            logger.exception("Periodic job %s failed", job.name)
+            return
+        if not all(succeeded):
+            # Left unrecorded, the job is due again on the next tick
+            logger.warning("Periodic job %s failed for some tenants; retrying next tick", job.name)
+            return
+        logger.info("Periodic job %s finished in %.2fs", job.name, time.monotonic() - start)
+        self._record_run(job)
+
+    def _run_for_tenant(self, job: PeriodicJob, tenant_id: str) -> bool:
+        with tenant_scope(tenant_id):
+            db = tenant_session(tenant_id)
+            try:
+                result = job.func(db)
+                db.commit()
+                logger.info("Periodic job %s for tenant %s: %s", job.name, tenant_id, result)
+                return True
+            except Exception:
+                db.rollback()
+                logger.exception("Periodic job %s failed for tenant %s", job.name, tenant_id)
+                return False
+            finally:
+                db.close()
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Periodic scheduler tick failed")
+            self._stop_event.wait(self.tick)
+
+
+scheduler = PeriodicScheduler()
@@ -0,0 +1,257 @@
+"""
+Opt-in request profiling and slow query capture.
+
+A request is profiled when it carries ``X-Profile: 1`` together with a valid
+``X-Admin-Token``, or is picked by ``PROFILE_SAMPLE_RATE``. With ADMIN_TOKEN
+unset the header is ignored and ``/admin`` answers 403. While it runs, every SQL statement it issues is
+recorded with timing and row count, and a background thread samples the
+Python stacks of the threads serving it (the event loop plus any worker
+thread that executes SQL for the request). Finished profiles land in a bounded
+ring buffer browsed through ``/admin/profiles``.
+
+Statements slower than ``SLOW_QUERY_MS`` are always logged, profiled or not,
+with their bound parameters redacted.
+"""
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime
+from time import perf_counter
+from typing import List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from services.metrics import add_query_observer
+
+logger = logging.getLogger("aigrc.profiling")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "200"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5")) / 1000
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+# Unset means nobody is an admin: /admin and on-demand profiling stay closed
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN") or None
+
+MAX_STACK_DEPTH = 64
+TOP_STACKS = 50
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ProfileSession:
+    """SQL statements and stack samples collected for one request"""
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = datetime.utcnow()
+        self.status_code: Optional[int] = None
+        self.duration_ms = 0.0
+        self.statements: List[dict] = []
+        self.thread_ids = {threading.get_ident()}
+        self.samples: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def record_statement(self, statement: str, duration_ms: float, rowcount: int):
+        self.thread_ids.add(threading.get_ident())
+        with self._lock:
+            self.statements.append({
+                "statement": _WHITESPACE.sub(" ", statement).strip(),
+                "duration_ms": round(duration_ms, 3),
+                "rowcount": rowcount,
+            })
+
+    def repeated_statements(self) -> List[dict]:
+        """Identical statements issued N_PLUS_ONE_THRESHOLD or more times (likely N+1 loads)"""
+        counts = Counter(s["statement"] for s in self.statements)
+        totals = Counter()
+        for s in self.statements:
+            totals[s["statement"]] += s["duration_ms"]
+        return [
+            {"statement": statement, "count": count, "total_ms": round(totals[statement], 3)}
+            for statement, count in counts.most_common()
+            if count >= N_PLUS_ONE_THRESHOLD
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "reason": self.reason,
+            "status_code": self.status_code,
+            "started_at": self.started_at.isoformat(),
+            "duration_ms": round(self.duration_ms, 3),
+            "query_count": len(self.statements),
+            "query_ms": round(sum(s["duration_ms"] for s in self.statements), 3),
+            "n_plus_one": len(self.repeated_statements()) > 0,
+        }
+
+    def detail(self) -> dict:
+        result = self.summary()
+        result["statements"] = self.statements
+        result["repeated_statements"] = self.repeated_statements()
+        result["cpu_samples"] = sum(self.samples.values())
+        # Collapsed-stack format, ready for flamegraph.pl / speedscope
+        result["cpu_profile"] = [
+            {"stack": stack, "samples": count} for stack, count in self.samples.most_common(TOP_STACKS)
+        ]
+        return result
+
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of a session's threads at a fixed interval"""
+
+    def __init__(self, session: ProfileSession, interval: float = PROFILE_SAMPLE_INTERVAL):
+        super().__init__(name=f"profiler-{session.id[:8]}", daemon=True)
+        self.session = session
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id in tuple(self.session.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.session.samples[";".join(reversed(stack))] += 1
+
+    def stop(self, wait: bool = True):
+        self._stop_event.set()
+        if wait:
+            self.join()
+
+
+class ProfileStore:
+    """Bounded ring buffer of finished profiles"""
+
+    def __init__(self, maxlen: int = PROFILE_BUFFER_SIZE):
+        self._profiles = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def add(self, session: ProfileSession):
+        with self._lock:
+            self._profiles.append(session)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            sessions = list(self._profiles)
+        return [s.summary() for s in reversed(sessions)]
+
+    def get(self, profile_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            for session in self._profiles:
+                if session.id == profile_id:
+                    return session
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+profile_store = ProfileStore()
+
+_current_session: ContextVar[Optional[ProfileSession]] = ContextVar("profile_session", default=None)
+
+
+def redact_parameters(parameters):
+    """Replace bound values with their type names so logs never carry data"""
+    if isinstance(parameters, dict):
+        return {key: f"<{type(value).__name__}>" for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            return f"<{len(parameters)} parameter sets>"
+        return [f"<{type(value).__name__}>" for value in parameters]
+    return "<redacted>"
+
+
+def _observe_query(statement, parameters, rowcount, elapsed):
+    elapsed_ms = elapsed * 1000
+    session = _current_session.get()
+    if session is not None:
+        session.record_statement(statement, elapsed_ms, rowcount)
+    if elapsed_ms >= SLOW_QUERY_MS:
+        logger.warning(
+            "Slow query (%.1f ms, rowcount=%s): %s parameters=%s",
+            elapsed_ms, rowcount, _WHITESPACE.sub(" ", statement).strip(),
+            redact_parameters(parameters),
+        )
+
+
+def is_admin(token) -> bool:
+    """True only when ADMIN_TOKEN is configured and ``token`` matches it"""
+    if not ADMIN_TOKEN or token is None:
+        return False
+    if isinstance(token, bytes):
+        token = token.decode("latin-1")
+    return hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def _profile_reason(scope) -> Optional[str]:
+    headers = scope.get("headers", ())
+    for name, value in headers:
+        if name == PROFILE_HEADER and value not in (b"", b"0", b"false"):
+            if not is_admin(next((v for n, v in headers if n == b"x-admin-token"), None)):
+                return None
+            return "header"
+    if PROFILE_SAMPLE_RATE and random.random() < PROFILE_SAMPLE_RATE:
+        return "sampled"
+    return None
+
+
+class ProfilingMiddleware:
+    """Profiles requests that opt in via header or are sampled"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        reason = _profile_reason(scope) if scope["type"] == "http" else None
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(scope["method"], scope["path"], reason)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                session.status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", session.id.encode())
+                ]
+            await send(message)
+
+        token = _current_session.set(session)
+        sampler = StackSampler(session)
+        sampler.start()
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            session.duration_ms = (perf_counter() - start) * 1000
+            sampler.stop(wait=False)
+            _current_session.reset(token)
+            # The sampler can take up to one interval to exit; wait for it off the event loop
+            await run_in_threadpool(sampler.join)
+            profile_store.add(session)
+
+
+add_query_observer(_observe_query)
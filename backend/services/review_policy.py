@@ -0,0 +1,283 @@
+"""
+Policy-driven review routing.
+
+A policy maps framework scores to the teams that must review a request,
+e.g. ``sox >= 40 -> Compliance``. Rules are compiled once into, per score
+column, an ascending list of thresholds and a cumulative team bitmask, so
+evaluating a request is a single pass with one bisect per column no matter
+how many rules there are. Requests that trip no rule and score below
+``auto_approve_below`` are approved without review; those that trip no rule
+but score higher go to the team owning their highest framework score, so
+no submitted request is left without a task.
+
+A request has at most one task per team (a unique constraint); routing
+inserts with ON CONFLICT DO NOTHING, so concurrent scoring, submission and
+rescoring of the same request cannot duplicate tasks.
+
+Set REVIEW_POLICY_FILE to a JSON file with the same shape as DEFAULT_POLICY
+to override the built-in rules.
+"""
+import json
+import logging
+import os
+from bisect import bisect_right
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from models.models import AuditLog, IntakeRequest, ReviewTask, RiskScore, generate_uuid
+from services.assignment import assignment_scheduler, team_for_scores, FRAMEWORK_TEAMS
+from services.cache import response_cache, INTAKE, REVIEW_TASKS
+
+logger = logging.getLogger("aigrc.review_policy")
+
+REVIEW_POLICY_FILE = os.getenv("REVIEW_POLICY_FILE")
+# Run the routing stage after every score computation
+AUTO_ROUTE_REVIEWS = os.getenv("AUTO_ROUTE_REVIEWS", "1") == "1"
+
+SCORE_COLUMNS = ("nist", "soc2", "sox", "owasp", "maestro", "total")
+
+# Statuses the routing stage may still move. Drafts wait until their requestor
+# submits them, and decided requests are left alone.
+ROUTABLE_STATUSES = ("submitted", "reviewing")
+
+DEFAULT_POLICY = {
+    "rules": [
+        {"score": "nist", "min": 50, "team": "Governance"},
+        {"score": "soc2", "min": 50, "team": "Compliance"},
+        {"score": "sox", "min": 40, "team": "Compliance"},
+        {"score": "owasp", "min": 40, "team": "Cybersecurity"},
+        {"score": "maestro", "min": 50, "team": "Architecture"},
+        # 60+ is what the dashboards show as high risk
+        {"score": "total", "min": 60, "team": "Legal"},
+    ],
+    "auto_approve_below": 25,
+}
+
+
+class RoutingDecision(NamedTuple):
+    request_id: str
+    teams: Tuple[str, ...]
+    auto_approve: bool
+    # Set when no rule matched and the request is not auto-approved
+    fallback_team: Optional[str] = None
+
+
+class CompiledPolicy:
+    """Review rules compiled for single-pass evaluation"""
+
+    def __init__(self, policy: dict):
+        rules = policy.get("rules", [])
+        self.auto_approve_below = policy.get("auto_approve_below")
+        self.teams: List[str] = []
+        by_column: Dict[str, List[Tuple[int, int]]] = {}
+        for rule in rules:
+            column = rule["score"]
+            if column not in SCORE_COLUMNS:
+                raise ValueError(f"Unknown score column in review policy: {column}")
+            if rule["team"] not in self.teams:
+                self.teams.append(rule["team"])
+            by_column.setdefault(column, []).append((rule["min"], 1 << self.teams.index(rule["team"])))
+
+        # column index -> (ascending thresholds, team mask of every rule at or below each threshold)
+        self._columns = []
+        for column, entries in by_column.items():
+            entries.sort()
+            thresholds, masks, mask = [], [], 0
+            for threshold, bit in entries:
+                mask |= bit
+                if thresholds and thresholds[-1] == threshold:
+                    masks[-1] = mask
+                else:
+                    thresholds.append(threshold)
+                    masks.append(mask)
+            self._columns.append((SCORE_COLUMNS.index(column), thresholds, masks))
+        self._team_sets: Dict[int, Tuple[str, ...]] = {}
+        self.source = policy
+
+    def teams_for_mask(self, mask: int) -> Tuple[str, ...]:
+        teams = self._team_sets.get(mask)
+        if teams is None:
+            teams = tuple(team for i, team in enumerate(self.teams) if mask & (1 << i))
+            self._team_sets[mask] = teams
+        return teams
+
+    def evaluate(self, request_id: str, scores: Tuple[Optional[int], ...]) -> RoutingDecision:
+        """``scores`` are in SCORE_COLUMNS order"""
+        mask = 0
+        for index, thresholds, masks in self._columns:
+            value = scores[index]
+            if value is None:
+                continue
+            position = bisect_right(thresholds, value)
+            if position:
+                mask |= masks[position - 1]
+        total = scores[-1]
+        auto_approve = (
+            not mask
+            and self.auto_approve_below is not None
+            and total is not None
+            and total < self.auto_approve_below
+        )
+        fallback = None
+        if not mask and not auto_approve:
+            fallback = team_for_scores({f: scores[SCORE_COLUMNS.index(f)] for f in FRAMEWORK_TEAMS})
+        return RoutingDecision(request_id, self.teams_for_mask(mask), auto_approve, fallback)
+
+    def evaluate_many(self, rows: Iterable[tuple]) -> Iterable[RoutingDecision]:
+        """``rows`` are ``(request_id, *scores)`` tuples"""
+        evaluate = self.evaluate
+        for row in rows:
+            yield evaluate(row[0], row[1:])
+
+
+def load_policy(path: Optional[str] = REVIEW_POLICY_FILE) -> CompiledPolicy:
+    if path:
+        with open(path) as f:
+            return CompiledPolicy(json.load(f))
+    return CompiledPolicy(DEFAULT_POLICY)
+
+
+def score_tuple(risk_score: RiskScore) -> Tuple[Optional[int], ...]:
+    return tuple(getattr(risk_score, f"{column}_score") for column in SCORE_COLUMNS)
+
+
+def _plan(decision: RoutingDecision, existing_teams) -> Tuple[List[str], bool]:
+    """Teams still missing a task, and whether to auto-approve instead"""
+    if decision.auto_approve and not existing_teams:
+        return [], True
+    if decision.fallback_team and not existing_teams:
+        return [decision.fallback_team], False
+    return [team for team in decision.teams if team not in existing_teams], False
+
+
+def _insert_ignoring_duplicates(db: Session, rows: List[dict]):
+    """Insert review tasks, skipping any team that already has a task on the request"""
+    dialect_insert = postgresql_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    db.execute(dialect_insert(ReviewTask).on_conflict_do_nothing(), rows)
+
+
+def _apply(db: Session, plans: List[Tuple[str, List[str], bool]]):
+    """Write a batch of plans with one insert per table and one update per status; the caller commits"""
+    approved = [request_id for request_id, _, auto_approve in plans if auto_approve]
+    task_rows = []
+    for request_id, teams, _ in plans:
+        for team in teams:
+            task_id = generate_uuid()
+            task_rows.append(dict(
+                id=task_id,
+                request_id=request_id,
+                team=team,
+                status="pending",
+                reviewer_id=assignment_scheduler.assign(db, team, task_id),
+            ))
+    if approved:
+        db.query(IntakeRequest).filter(IntakeRequest.id.in_(approved)).update({"status": "approved"})
+        db.execute(insert(AuditLog), [
+            dict(id=generate_uuid(), request_id=request_id, action="auto_approved", metadata_={"policy": "review_policy"})
+            for request_id in approved
+        ])
+    if task_rows:
+        _insert_ignoring_duplicates(db, task_rows)
+        ids = [row["id"] for row in task_rows]
+        inserted = {task_id for (task_id,) in db.query(ReviewTask.id).filter(ReviewTask.id.in_(ids))}
+        # A concurrent router got there first; its task stands and our reviewer pick must not count
+        for task_id in set(ids) - inserted:
+            assignment_scheduler.release(task_id)
+        reviewing = list({row["request_id"] for row in task_rows})
+        db.query(IntakeRequest).filter(IntakeRequest.id.in_(reviewing)).update({"status": "reviewing"})
+
+
+def _commit(db: Session, plans):
+    try:
+        _apply(db, plans)
+        db.commit()
+    except Exception:
+        db.rollback()
+        # Nothing was written, so the reviewer picks must not count
+        assignment_scheduler.rebuild(db)
+        raise
+    for request_id, _, _ in plans:
+        response_cache.invalidate(REVIEW_TASKS, request_id)
+        response_cache.invalidate(INTAKE, request_id)
+
+
+def route_request(db: Session, request: IntakeRequest, risk_score: RiskScore) -> dict:
+    """Routing stage for one freshly scored request: create its review tasks or auto-approve it"""
+    if request.status not in ROUTABLE_STATUSES:
+        return {"created": [], "auto_approved": False}
+    decision = review_policy.evaluate(request.id, score_tuple(risk_score))
+    existing = {team for (team,) in db.query(ReviewTask.team).filter(ReviewTask.request_id == request.id)}
+    teams, auto_approve = _plan(decision, existing)
+    if teams or auto_approve:
+        _commit(db, [(request.id, teams, auto_approve)])
+        logger.info("Routed request %s: teams=%s auto_approved=%s", request.id, teams, auto_approve)
+    return {"created": teams, "auto_approved": auto_approve}
+
+
+def route_backlog(db: Session, dry_run: bool = True, policy: CompiledPolicy = None,
+                  chunk_size: int = 1000, sample_size: int = 20) -> dict:
+    """
+    Evaluate every scored, undecided request against the policy and report
+    what routing would do; with ``dry_run=False`` also apply it. Requests are
+    read ``chunk_size`` at a time by id, and each chunk is applied (or
+    dropped) before the next is read, so memory stays flat however large the
+    backlog is.
+    """
+    policy = policy or review_policy
+    summary = {"evaluated": 0, "auto_approve": 0, "needs_review": 0, "tasks_by_team": {}, "sample": []}
+    after = None
+    while True:
+        query = latest_scores_query(db)
+        if after is not None:
+            query = query.filter(IntakeRequest.id > after)
+        rows = query.limit(chunk_size).all()
+        if not rows:
+            break
+        after = rows[-1][0]
+        existing: Dict[str, set] = {}
+        for request_id, team in db.query(ReviewTask.request_id, ReviewTask.team).filter(
+                ReviewTask.request_id.in_([row[0] for row in rows])):
+            existing.setdefault(request_id, set()).add(team)
+
+        plans = []
+        for decision in policy.evaluate_many(rows):
+            summary["evaluated"] += 1
+            teams, auto_approve = _plan(decision, existing.get(decision.request_id, ()))
+            if not teams and not auto_approve:
+                continue
+            if auto_approve:
+                summary["auto_approve"] += 1
+            else:
+                summary["needs_review"] += 1
+                for team in teams:
+                    summary["tasks_by_team"][team] = summary["tasks_by_team"].get(team, 0) + 1
+            if len(summary["sample"]) < sample_size:
+                summary["sample"].append({"request_id": decision.request_id, "create_tasks": teams,
+                                          "auto_approve": auto_approve})
+            plans.append((decision.request_id, teams, auto_approve))
+        if plans and not dry_run:
+            _commit(db, plans)
+        else:
+            # End the read transaction between chunks (on tuned SQLite it may hold the writer)
+            db.rollback()
+
+    summary["dry_run"] = dry_run
+    return summary
+
+
+def latest_scores_query(db: Session, statuses=ROUTABLE_STATUSES):
+    """``(request_id, *scores)`` for every routable request that has been scored"""
+    columns = [getattr(RiskScore, f"{column}_score") for column in SCORE_COLUMNS]
+    return (
+        db.query(IntakeRequest.id, *columns)
+        .join(RiskScore, RiskScore.request_id == IntakeRequest.id)
+        .filter(IntakeRequest.status.in_(statuses))
+        .order_by(IntakeRequest.id)
+    )
+
+
+review_policy = load_policy()
@@ -1,6 +1,28 @@
-from typing import Dict
-from models.models import IntakeRequest, RiskScore
+from datetime import datetime
+from typing import Callable, Dict, Optional
+from time import perf_counter
+from models.models import IntakeRequest, RiskScore, RiskScoreHistory
 from sqlalchemy.orm import Session
+from services.metrics import SCORING_DURATION
+
+# Bump whenever scorer logic or weights change, so history shows rule-driven jumps
+RULES_VERSION = 1
+
+HISTORY_SCORE_COLUMNS = ('nist_score', 'soc2_score', 'sox_score', 'owasp_score', 'maestro_score', 'total_score')
+
+FRAMEWORKS = ('nist', 'soc2', 'sox', 'owasp', 'maestro')
+
+# Weight of each framework in the total score
+DEFAULT_WEIGHTS = {
+    'nist': 0.25,
+    'soc2': 0.20,
+    'sox': 0.15,
+    'owasp': 0.25,
+    'maestro': 0.15
+}
+
+# Totals at or above this are high risk (same cut-off as the frontend)
+HIGH_RISK_SCORE = 60
 
 class RiskScoringEngine:
     """
@@ -12,15 +34,10 @@ class RiskScoringEngine:
     - MAESTRO
     """
     
-    def __init__(self):
+    def __init__(self, weights: Optional[Dict[str, float]] = None):
+        self.rule_version = RULES_VERSION
         # Configurable weights for each framework
-        self.weights = {
-            'nist': 0.25,
-            'soc2': 0.20,
-            'sox': 0.15,
-            'owasp': 0.25,
-            'maestro': 0.15
-        }
+        self.weights = dict(weights or DEFAULT_WEIGHTS)
     
     def calculate_nist_score(self, request: IntakeRequest) -> int:
         """
@@ -78,7 +95,7 @@ class RiskScoringEngine:
             score += 20
         
         # Availability concerns
-        use_case = details.get('use_case', '')
+        use_case = details.get('use_case') or ''
         if use_case in ['Chatbot', 'Chatbot / Virtual Assistant', 'Automation', 'Process Automation']:
             score += 15  # Critical services
         
@@ -87,7 +104,7 @@ class RiskScoringEngine:
             score += 30
         
         # Data volume considerations
-        data_volume = details.get('data_volume', '')
+        data_volume = details.get('data_volume') or ''
         if 'Large' in data_volume or 'Very Large' in data_volume:
             score += 20
         
@@ -121,7 +138,7 @@ class RiskScoringEngine:
         details = request.details or {}
         
         # Prompt injection risk
-        use_case = details.get('use_case', '')
+        use_case = details.get('use_case') or ''
         if 'Chatbot' in use_case or 'Virtual Assistant' in use_case:
             score += 25
         
@@ -159,7 +176,7 @@ class RiskScoringEngine:
             score += 20
         
         # Expected user base (larger = more risk)
-        expected_user_base = details.get('expected_user_base', '')
+        expected_user_base = details.get('expected_user_base') or ''
         if 'Public' in expected_user_base:
             score += 25
         elif 'Partners' in expected_user_base:
@@ -168,7 +185,7 @@ class RiskScoringEngine:
             score += 10
         
         # Monitoring requirements
-        use_case = details.get('use_case', '')
+        use_case = details.get('use_case') or ''
         if use_case in ['Chatbot', 'Chatbot / Virtual Assistant', 'Automation', 'Process Automation']:
             score += 20
         
@@ -179,14 +196,21 @@ class RiskScoringEngine:
         
         return min(score, 100)
     
+    def _timed(self, framework: str, scorer: Callable[[IntakeRequest], int], request: IntakeRequest) -> int:
+        """Run one framework scorer and record its duration"""
+        start = perf_counter()
+        score = scorer(request)
+        SCORING_DURATION.labels(framework).observe(perf_counter() - start)
+        return score
+    
     def calculate_total_score(self, request: IntakeRequest, db: Session) -> RiskScore:
         """Calculate comprehensive risk score"""
         
-        nist = self.calculate_nist_score(request)
-        soc2 = self.calculate_soc2_score(request)
-        sox = self.calculate_sox_score(request)
-        owasp = self.calculate_owasp_score(request)
-        maestro = self.calculate_maestro_score(request)
+        nist = self._timed('nist', self.calculate_nist_score, request)
+        soc2 = self._timed('soc2', self.calculate_soc2_score, request)
+        sox = self._timed('sox', self.calculate_sox_score, request)
+        owasp = self._timed('owasp', self.calculate_owasp_score, request)
+        maestro = self._timed('maestro', self.calculate_maestro_score, request)
         
         # Weighted total
         total = int(
@@ -197,6 +221,7 @@ class RiskScoringEngine:
             maestro * self.weights['maestro']
         )
         
+        scored_at = datetime.utcnow()
         # Create or update risk score
         existing_score = db.query(RiskScore).filter(
             RiskScore.request_id == request.id
@@ -209,6 +234,8 @@ class RiskScoringEngine:
             existing_score.owasp_score = owasp
             existing_score.maestro_score = maestro
             existing_score.total_score = total
+            existing_score.rule_version = self.rule_version
+            existing_score.scored_at = scored_at
             risk_score = existing_score
         else:
             risk_score = RiskScore(
@@ -218,14 +245,36 @@ class RiskScoringEngine:
                 sox_score=sox,
                 owasp_score=owasp,
                 maestro_score=maestro,
-                total_score=total
+                total_score=total,
+                rule_version=self.rule_version,
+                scored_at=scored_at
             )
             db.add(risk_score)
         
-        # Update request risk score
+        # Update request risk score. Stamping updated_at with the scoring time keeps
+        # this write from making the fresh score look older than the request
+        if request.risk_score != total or db.is_modified(request):
+            request.updated_at = scored_at
         request.risk_score = total
+        self._record_history(request.id, (nist, soc2, sox, owasp, maestro, total), db)
         
         db.commit()
         db.refresh(risk_score)
         
         return risk_score
+
+    def _record_history(self, request_id: str, scores: tuple, db: Session):
+        """Append a history row only if the scores or the rule version changed"""
+        last = (
+            db.query(RiskScoreHistory.rule_version, *[getattr(RiskScoreHistory, c) for c in HISTORY_SCORE_COLUMNS])
+            .filter(RiskScoreHistory.request_id == request_id)
+            .order_by(RiskScoreHistory.recorded_at.desc(), RiskScoreHistory.id.desc())
+            .first()
+        )
+        if last is not None and last[0] == self.rule_version and tuple(last[1:]) == scores:
+            return
+        db.add(RiskScoreHistory(
+            request_id=request_id,
+            rule_version=self.rule_version,
+            **dict(zip(HISTORY_SCORE_COLUMNS, scores))
+        ))
@@ -0,0 +1,96 @@
+"""
+Time-range and downsampled queries over ``risk_score_history``.
+
+Trends are bucketed in SQL (``date_trunc`` on PostgreSQL, ``strftime`` on
+SQLite) so a year of history comes back as at most a few hundred rows.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from models.models import RiskScoreHistory
+from services.risk_scoring import HISTORY_SCORE_COLUMNS, HIGH_RISK_SCORE
+
+TREND_BUCKETS = ("hour", "day", "week", "month")
+DEFAULT_TREND_DAYS = 90
+
+_SQLITE_BUCKETS = {
+    "hour": lambda c: func.strftime("%Y-%m-%d %H:00:00", c),
+    "day": lambda c: func.date(c),
+    # Monday of the row's week
+    "week": lambda c: func.date(c, "weekday 0", "-6 days"),
+    "month": lambda c: func.strftime("%Y-%m-01", c),
+}
+
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """``recorded_at`` holds naive UTC; convert tz-aware bounds so they compare with it"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def default_range(start: Optional[datetime], end: Optional[datetime]):
+    start, end = naive_utc(start), naive_utc(end)
+    end = end or datetime.utcnow()
+    return start or end - timedelta(days=DEFAULT_TREND_DAYS), end
+
+
+def request_history(db: Session, request_id: str, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> List[RiskScoreHistory]:
+    start, end = naive_utc(start), naive_utc(end)
+    query = db.query(RiskScoreHistory).filter(RiskScoreHistory.request_id == request_id)
+    if start:
+        query = query.filter(RiskScoreHistory.recorded_at >= start)
+    if end:
+        query = query.filter(RiskScoreHistory.recorded_at < end)
+    return query.order_by(RiskScoreHistory.recorded_at, RiskScoreHistory.id).all()
+
+
+def _bucket_expression(db: Session, bucket: str):
+    column = RiskScoreHistory.recorded_at
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc(bucket, column)
+    return _SQLITE_BUCKETS[bucket](column)
+
+
+def score_trend(db: Session, start: datetime, end: datetime, bucket: str = "day",
+                request_id: Optional[str] = None) -> List[dict]:
+    """Average scores, change counts and high-risk changes per time bucket"""
+    if bucket not in TREND_BUCKETS:
+        raise ValueError(f"bucket must be one of {', '.join(TREND_BUCKETS)}")
+    bucket_start = _bucket_expression(db, bucket).label("bucket_start")
+    averages = [func.avg(getattr(RiskScoreHistory, column)) for column in HISTORY_SCORE_COLUMNS]
+    query = (
+        db.query(
+            bucket_start,
+            func.count(RiskScoreHistory.id),
+            func.count(func.distinct(RiskScoreHistory.request_id)),
+            func.sum(case((RiskScoreHistory.total_score >= HIGH_RISK_SCORE, 1), else_=0)),
+            func.max(RiskScoreHistory.total_score),
+            *averages,
+        )
+        .filter(RiskScoreHistory.recorded_at >= start, RiskScoreHistory.recorded_at < end)
+        .group_by(bucket_start)
+        .order_by(bucket_start)
+    )
+    if request_id:
+        query = query.filter(RiskScoreHistory.request_id == request_id)
+
+    points = []
+    for row in query:
+        label, changes, requests, high_risk, max_total = row[:5]
+        points.append({
+            "start": label.isoformat() if isinstance(label, datetime) else str(label),
+            "changes": changes,
+            "requests": requests,
+            "high_risk_changes": int(high_risk or 0),
+            "max_total_score": max_total,
+            "average": {
+                column.replace("_score", ""): round(float(value), 1) if value is not None else None
+                for column, value in zip(HISTORY_SCORE_COLUMNS, row[5:])
+            },
+        })
+    return points
@@ -0,0 +1,168 @@
+"""
+What-if re-weighting over the stored portfolio.
+
+Per-framework scores from ``risk_scores`` are loaded once into an (N, 5)
+matrix and cached for SIMULATION_CACHE_SECONDS. Identical rows are collapsed
+into one row with a count; the scorers only produce a few hundred distinct
+combinations, so a real portfolio shrinks by orders of magnitude. A simulation stacks the
+current weights and every candidate into a (K, 5) matrix and scores each
+chunk of rows under all K weightings at once, as a (K, N) array. Totals are
+whole numbers in 0..100, so a single ``bincount`` gives each weighting's full
+distribution, and means, percentiles and bands all come from that.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from db.tenancy import get_current_tenant
+from models.models import RiskScore
+from services.risk_scoring import DEFAULT_WEIGHTS, FRAMEWORKS, HIGH_RISK_SCORE
+
+SIMULATION_CACHE_SECONDS = float(os.getenv("SIMULATION_CACHE_SECONDS", "300"))
+# Rows scored at a time; bounds temporary memory to CHUNK_ROWS x K float64s
+CHUNK_ROWS = 1 << 18
+MAX_SCORE = 100
+
+
+class ScoreMatrix:
+    """Distinct per-framework score rows of the portfolio, with how many requests have each"""
+
+    def __init__(self, scores: np.ndarray, loaded_at: Optional[datetime] = None):
+        scores = np.asarray(scores, dtype=np.uint8).reshape(-1, len(FRAMEWORKS))
+        # Pack each row into one integer so np.unique works on a flat array
+        packed = np.zeros(len(scores), dtype=np.int64)
+        for j in range(len(FRAMEWORKS)):
+            packed = (packed << 8) | scores[:, j]
+        keys, self.counts = np.unique(packed, return_counts=True)
+        # Framework-major (5, distinct) so each framework's column is contiguous
+        self.columns = np.empty((len(FRAMEWORKS), len(keys)), dtype=np.float64)
+        for j in reversed(range(len(FRAMEWORKS))):
+            self.columns[j] = keys & 0xFF
+            keys = keys >> 8
+        self.requests = int(self.counts.sum())
+        # Every row distinct: plain counting is cheaper than weighting by count
+        self.unweighted = bool((self.counts == 1).all())
+        self.loaded_at = loaded_at or datetime.utcnow()
+
+    def __len__(self):
+        return self.requests
+
+    @classmethod
+    def load(cls, db: Session, batch_size: int = 50000) -> "ScoreMatrix":
+        columns = [func.coalesce(getattr(RiskScore, f"{framework}_score"), 0) for framework in FRAMEWORKS]
+        result = db.execute(select(*columns).where(RiskScore.request_id.isnot(None)).execution_options(yield_per=batch_size))
+        chunks = [np.array(rows, dtype=np.uint8) for rows in result.partitions()]
+        scores = np.concatenate(chunks) if chunks else np.zeros((0, len(FRAMEWORKS)), dtype=np.uint8)
+        return cls(scores)
+
+
+class ScoreMatrixCache:
+    """Reloads each tenant's matrix at most once per ``ttl`` seconds, however many requests ask"""
+
+    def __init__(self, ttl: float = SIMULATION_CACHE_SECONDS):
+        self.ttl = ttl
+        # Guards only the dicts; loads hold their tenant's lock so one tenant never waits on another
+        self._lock = threading.Lock()
+        self._tenant_locks: Dict[str, threading.Lock] = {}
+        self._matrices: Dict[str, Tuple[ScoreMatrix, float]] = {}
+
+    def get(self, db: Session, refresh: bool = False) -> ScoreMatrix:
+        tenant_id = get_current_tenant()
+        with self._lock:
+            tenant_lock = self._tenant_locks.setdefault(tenant_id, threading.Lock())
+        with tenant_lock:
+            cached = self._matrices.get(tenant_id)
+            if refresh or cached is None or time.monotonic() - cached[1] > self.ttl:
+                cached = (ScoreMatrix.load(db), time.monotonic())
+                with self._lock:
+                    self._matrices[tenant_id] = cached
+            return cached[0]
+
+
+def _distribution(histogram: np.ndarray, threshold: int) -> dict:
+    count = int(histogram.sum())
+    if not count:
+        return {"mean": None, "p50": None, "p90": None, "high_risk": 0, "bands": {}}
+    cumulative = np.cumsum(histogram)
+    # 10-point bands, with 100 folded into 90-100
+    bands = histogram[:MAX_SCORE].reshape(10, 10).sum(axis=1)
+    bands[-1] += histogram[MAX_SCORE]
+    return {
+        "mean": round(float(np.dot(histogram, np.arange(MAX_SCORE + 1)) / count), 2),
+        "p50": int(np.searchsorted(cumulative, count * 0.5)),
+        "p90": int(np.searchsorted(cumulative, count * 0.9)),
+        "high_risk": int(histogram[threshold:].sum()),
+        "bands": {f"{i * 10}-{i * 10 + 9 if i < 9 else MAX_SCORE}": int(n) for i, n in enumerate(bands)},
+    }
+
+
+def simulate(matrix: ScoreMatrix, weight_sets: Sequence[Dict[str, float]],
+             baseline: Dict[str, float] = DEFAULT_WEIGHTS, threshold: int = HIGH_RISK_SCORE) -> dict:
+    """
+    Score every request under ``baseline`` and each candidate weighting and
+    report how the distribution and the high-risk population shift. A
+    candidate that leaves a framework out keeps its baseline weight.
+    """
+    weight_sets = [{**baseline, **w} for w in weight_sets]
+    weights = np.array([[w[f] for f in FRAMEWORKS] for w in [baseline, *weight_sets]], dtype=np.float64)
+    k = weights.shape[0]
+    offsets = (np.arange(k, dtype=np.int64) * (MAX_SCORE + 1))[:, None]
+    histograms = np.zeros(k * (MAX_SCORE + 1), dtype=np.int64)
+    crossed_up = np.zeros(k, dtype=np.int64)
+    crossed_down = np.zeros(k, dtype=np.int64)
+
+    columns, counts = matrix.columns, matrix.counts
+    for start in range(0, columns.shape[1], CHUNK_ROWS):
+        chunk = columns[:, start:start + CHUNK_ROWS]
+        # Summed framework by framework, in calculate_total_score's order, so the
+        # float64 rounding and int() truncation match stored totals exactly
+        totals = np.multiply(weights[:, :1], chunk[0])
+        term = np.empty_like(totals)
+        for j in range(1, len(FRAMEWORKS)):
+            np.multiply(weights[:, j:j + 1], chunk[j], out=term)
+            totals += term
+        np.minimum(totals, MAX_SCORE, out=totals)
+        totals = totals.astype(np.int64)
+        high = totals >= threshold
+        up = high & ~high[0]
+        down = ~high & high[0]
+        if matrix.unweighted:
+            histograms += np.bincount((totals + offsets).ravel(), minlength=k * (MAX_SCORE + 1))
+            crossed_up += np.count_nonzero(up, axis=1)
+            crossed_down += np.count_nonzero(down, axis=1)
+        else:
+            chunk_counts = counts[start:start + CHUNK_ROWS]
+            histograms += np.bincount((totals + offsets).ravel(), weights=np.tile(chunk_counts, k),
+                                      minlength=k * (MAX_SCORE + 1)).astype(np.int64)
+            crossed_up += up @ chunk_counts
+            crossed_down += down @ chunk_counts
+
+    histograms = histograms.reshape(k, MAX_SCORE + 1)
+    base = _distribution(histograms[0], threshold)
+    candidates: List[dict] = []
+    for i, weight_set in enumerate(weight_sets, start=1):
+        dist = _distribution(histograms[i], threshold)
+        candidates.append({
+            "weights": dict(weight_set),
+            **dist,
+            "high_risk_delta": dist["high_risk"] - base["high_risk"],
+            "mean_shift": round(dist["mean"] - base["mean"], 2) if dist["mean"] is not None else None,
+            "crossed_into_high_risk": int(crossed_up[i]),
+            "crossed_out_of_high_risk": int(crossed_down[i]),
+        })
+    return {
+        "requests": len(matrix),
+        "threshold": threshold,
+        "scores_loaded_at": matrix.loaded_at,
+        "baseline": {"weights": dict(baseline), **base},
+        "candidates": candidates,
+    }
+
+
+score_matrix_cache = ScoreMatrixCache()
@@ -0,0 +1,5 @@
+import os
+
+# Read once at import by db.tenancy, so it must be set before any test module
+# loads the app; the per-file setdefault only helps a file run on its own
+os.environ.setdefault("TENANT_TOKEN_SECRET", "test-tenant-secret")
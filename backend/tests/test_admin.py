@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_admin.db")
+
+from fastapi.testclient import TestClient
+from sqlalchemy.exc import OperationalError
+from db.database import Base, get_engine
+from services.metrics import DB_QUERIES
+from services.profiling import profile_store
+
+from main import app
+
+
+class TestAdminAccess(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        profile_store.clear()
+
+    def test_closed_without_configured_token(self):
+        with mock.patch("services.profiling.ADMIN_TOKEN", None):
+            self.assertEqual(self.client.get("/admin/profiles").status_code, 403)
+            self.assertEqual(self.client.get("/admin/profiles", headers={"X-Admin-Token": ""}).status_code, 403)
+            response = self.client.get("/intake/", headers={"X-Profile": "1"})
+        self.assertNotIn("x-profile-id", response.headers)
+        self.assertEqual(profile_store.list(), [])
+
+    def test_token_opens_admin_and_profiling(self):
+        admin = {"X-Admin-Token": "s3cret"}
+        with mock.patch("services.profiling.ADMIN_TOKEN", "s3cret"):
+            self.assertEqual(self.client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).status_code, 403)
+            self.assertNotIn("x-profile-id", self.client.get("/intake/", headers={"X-Profile": "1"}).headers)
+            profiled = self.client.get("/intake/", headers={"X-Profile": "1", **admin})
+            self.assertIn("x-profile-id", profiled.headers)
+            self.assertEqual(len(self.client.get("/admin/profiles", headers=admin).json()), 1)
+
+
+    def test_profiles_get_timings_from_the_shared_query_hook(self):
+        with mock.patch("services.profiling.ADMIN_TOKEN", "s3cret"):
+            profiled = self.client.get("/intake/", headers={"X-Profile": "1", "X-Admin-Token": "s3cret"})
+            detail = self.client.get(f"/admin/profiles/{profiled.headers['x-profile-id']}",
+                                     headers={"X-Admin-Token": "s3cret"}).json()
+        self.assertTrue(any("FROM intake_requests" in s["statement"] for s in detail["statements"]))
+
+    def test_failed_statement_leaves_no_timing_state(self):
+        with get_engine().connect() as conn:
+            with self.assertRaises(OperationalError):
+                conn.exec_driver_sql("SELECT * FROM no_such_table")
+            before = DB_QUERIES._value.get()
+            conn.exec_driver_sql("SELECT 1")
+            self.assertEqual(DB_QUERIES._value.get(), before + 1)
+            self.assertFalse([key for key in conn.info if key.endswith("query_start")])
+
+
+if __name__ == '__main__':
+    unittest.main()
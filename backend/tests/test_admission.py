@@ -0,0 +1,176 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_admission.db")
+os.environ.setdefault("TENANT_TOKEN_SECRET", "test-tenant-secret")
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from db.tenancy import TenantMiddleware, issue_tenant_token
+from services.admission import (
+    AdmissionMiddleware, ConcurrencyGate, LocalTokenBuckets, Overloaded, RouteRule, SharedTokenBuckets,
+    BATCH, INTERACTIVE,
+)
+
+
+class TestTokenBuckets(unittest.TestCase):
+    def test_burst_then_refill(self):
+        buckets = LocalTokenBuckets()
+        self.assertTrue(all(buckets.take("c", rate=100, burst=3)[0] for _ in range(3)))
+        allowed, retry_after = buckets.take("c", rate=100, burst=3)
+        self.assertFalse(allowed)
+        self.assertGreater(retry_after, 0)
+        time.sleep(retry_after + 0.005)
+        self.assertTrue(buckets.take("c", rate=100, burst=3)[0])
+        self.assertTrue(buckets.take("other", rate=100, burst=3)[0])
+
+    def test_shared_buckets_span_forked_workers(self):
+        buckets = SharedTokenBuckets(slots=64)
+        pid = os.fork()
+        if pid == 0:
+            for _ in range(3):
+                buckets.take("c", rate=0.001, burst=3)
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertFalse(buckets.take("c", rate=0.001, burst=3)[0])
+
+
+class TestConcurrencyGate(unittest.TestCase):
+    def test_interactive_goes_ahead_of_batch(self):
+        async def scenario():
+            gate = ConcurrencyGate(limit=1, batch_share=1.0, max_queue=10, timeout=1)
+            await gate.acquire(INTERACTIVE)
+            order = []
+
+            async def run(lane):
+                await gate.acquire(lane)
+                order.append(lane)
+                gate.release(lane, 0.0)
+
+            batch = asyncio.create_task(run(BATCH))
+            await asyncio.sleep(0)
+            interactive = asyncio.create_task(run(INTERACTIVE))
+            await asyncio.sleep(0)
+            gate.release(INTERACTIVE, 0.0)
+            await asyncio.gather(batch, interactive)
+            return order
+
+        self.assertEqual(asyncio.run(scenario()), [INTERACTIVE, BATCH])
+
+    def test_batch_capped_and_sheds_on_timeout(self):
+        async def scenario():
+            gate = ConcurrencyGate(limit=4, batch_share=0.5, max_queue=10, timeout=0.01)
+            await gate.acquire(BATCH)
+            await gate.acquire(BATCH)
+            with self.assertRaises(Overloaded) as shed:
+                await gate.acquire(BATCH)
+            self.assertEqual(shed.exception.reason, "queue_timeout")
+            # Interactive still has the slots batch may not use
+            await gate.acquire(INTERACTIVE)
+            self.assertEqual(gate.active, {INTERACTIVE: 1, BATCH: 2})
+            self.assertFalse(gate.waiters[BATCH])
+
+        asyncio.run(scenario())
+
+
+class TestAdmissionMiddleware(unittest.TestCase):
+    def setUp(self):
+        app = FastAPI()
+
+        @app.post("/intake/")
+        def create():
+            return {"ok": True}
+
+        @app.get("/intake/")
+        def list_requests():
+            return []
+
+        rules = (RouteRule("intake_create", "POST", r"/intake/?", rate=0.01, burst=2),)
+        app.add_middleware(AdmissionMiddleware, buckets=LocalTokenBuckets(), rules=rules,
+                           client_rate=100, client_burst=100, enabled=True)
+        app.add_middleware(TenantMiddleware)
+        self.client = TestClient(app)
+
+    def test_route_limit_returns_429_with_retry_after(self):
+        self.assertEqual([self.client.post("/intake/").status_code for _ in range(3)], [200, 200, 429])
+        limited = self.client.post("/intake/")
+        self.assertEqual(limited.status_code, 429)
+        self.assertGreaterEqual(int(limited.headers["retry-after"]), 1)
+        # Reads are not rate limited
+        self.assertEqual(self.client.get("/intake/").status_code, 200)
+        # Naming another tenant does not give the same client fresh buckets
+        acme = {"Authorization": f"Bearer {issue_tenant_token('acme')}"}
+        self.assertEqual(self.client.post("/intake/", headers=acme).status_code, 429)
+
+    def test_tenant_tier_spans_clients(self):
+        app = FastAPI()
+
+        @app.post("/comments")
+        def comment():
+            return {"ok": True}
+
+        app.add_middleware(AdmissionMiddleware, buckets=LocalTokenBuckets(), rules=(),
+                           client_rate=100, client_burst=100, tenant_rate=0.01, tenant_burst=2, enabled=True)
+        app.add_middleware(TenantMiddleware)
+        acme = {"Authorization": f"Bearer {issue_tenant_token('acme')}"}
+        codes = [TestClient(app, client=(f"192.0.2.{i}", 5000)).post("/comments", headers=acme).status_code
+                 for i in range(3)]
+        self.assertEqual(codes, [200, 200, 429])
+        # Other tenants have their own budget
+        self.assertEqual(TestClient(app).post("/comments").status_code, 200)
+
+    def test_rejected_requests_get_their_tokens_back(self):
+        app = FastAPI()
+
+        @app.post("/intake/")
+        def create():
+            return {"ok": True}
+
+        rules = (RouteRule("intake_create", "POST", r"/intake/?", rate=0.01, burst=5),)
+        app.add_middleware(AdmissionMiddleware, buckets=LocalTokenBuckets(), rules=rules, client_rate=100,
+                           client_burst=100, tenant_rate=0.01, tenant_burst=2, enabled=True)
+        app.add_middleware(TenantMiddleware)
+        client = TestClient(app)
+        self.assertEqual([client.post("/intake/").status_code for _ in range(4)], [200, 200, 429, 429])
+        # The tenant tier's rejections handed the route tokens back: three are left, not one
+        acme = {"Authorization": f"Bearer {issue_tenant_token('acme')}"}
+        self.assertEqual([client.post("/intake/", headers=acme).status_code for _ in range(4)], [200, 200, 429, 429])
+        globex = {"Authorization": f"Bearer {issue_tenant_token('globex')}"}
+        self.assertEqual(client.post("/intake/", headers=globex).status_code, 200)
+        self.assertEqual(client.post("/intake/", headers=globex).status_code, 429)
+
+    def test_streaming_evidence_routes_skip_the_gate(self):
+        app = FastAPI()
+
+        @app.get("/evidence/{evidence_id}/content")
+        def download(evidence_id: str):
+            return {"ok": True}
+
+        @app.get("/intake/")
+        def list_requests():
+            return []
+
+        gate = ConcurrencyGate(limit=1, max_queue=0, timeout=0.01)
+        gate.active[INTERACTIVE] = 1  # every slot taken, as by slow transfers
+        app.add_middleware(AdmissionMiddleware, buckets=LocalTokenBuckets(), gate=gate, enabled=True)
+        client = TestClient(app)
+        self.assertEqual(client.get("/evidence/abc/content").status_code, 200)
+        self.assertEqual(client.get("/intake/").status_code, 429)
+
+
+class TestMiddlewareOrder(unittest.TestCase):
+    def test_rejections_carry_cors_headers(self):
+        from main import app
+
+        origin = {"Origin": "https://grc.example.com"}
+        rejected = TestClient(app).post("/intake/", json={}, headers={**origin, "Authorization": "Bearer forged"})
+        self.assertEqual(rejected.status_code, 401)
+        self.assertEqual(rejected.headers["access-control-allow-origin"], origin["Origin"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+import os
+import tempfile
+import threading
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_assignment.db")
+
+from fastapi.testclient import TestClient
+from db.database import Base, SessionLocal, get_engine
+from models.models import ReviewTask, User
+from services.assignment import AssignmentScheduler, ReviewerLoad
+
+from main import app
+
+
+class AssignmentTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        self.db = SessionLocal()
+        self.db.query(ReviewTask).delete()
+        self.db.query(User).delete()
+        for reviewer_id, team in [("sec1", "Cybersecurity"), ("sec2", "Cybersecurity"), ("sec3", "Cybersecurity"),
+                                  ("legal1", "Legal")]:
+            self.db.add(User(id=reviewer_id, name=reviewer_id, email=f"{reviewer_id}@example.com",
+                             role="reviewer", team=team))
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+
+class TestReviewerLoad(unittest.TestCase):
+    def test_oldest_skips_removed_and_moved_tasks(self):
+        load = ReviewerLoad("sec1", "Cybersecurity")
+        self.assertEqual(load.oldest, float("inf"))
+        for task_id, created_at in [("a", 30.0), ("b", 10.0), ("c", 20.0)]:
+            load.add(task_id, created_at)
+        self.assertEqual(load.oldest, 10.0)
+        self.assertTrue(load.remove("b"))
+        self.assertFalse(load.remove("b"))
+        self.assertEqual(load.oldest, 20.0)
+        # Re-added with a newer timestamp, the old heap entry for "c" is stale
+        load.remove("c")
+        load.add("c", 40.0)
+        self.assertEqual(load.oldest, 30.0)
+        self.assertEqual(load.sort_key(), (2, -30.0))
+
+
+class TestAssignmentScheduler(AssignmentTestCase):
+    def test_picks_least_loaded_then_least_behind(self):
+        now = datetime.utcnow()
+        self.db.add_all([
+            ReviewTask(id="t1", request_id="r1", team="Cybersecurity", status="pending", reviewer_id="sec1",
+                       created_at=now - timedelta(days=5)),
+            ReviewTask(id="t2", request_id="r2", team="Cybersecurity", status="pending", reviewer_id="sec2",
+                       created_at=now - timedelta(days=1)),
+            ReviewTask(id="t3", request_id="r3", team="Cybersecurity", status="approved", reviewer_id="sec3"),
+        ])
+        self.db.commit()
+        scheduler = AssignmentScheduler()
+
+        self.assertEqual(scheduler.assign(self.db, "Cybersecurity", "n1"), "sec3")
+        # sec1 and sec2 now tie with sec3 on one open task; sec3's is the newest
+        self.assertEqual(scheduler.assign(self.db, "Cybersecurity", "n2"), "sec3")
+        self.assertEqual(scheduler.assign(self.db, "Cybersecurity", "n3"), "sec2")
+        scheduler.release("t1")
+        self.assertEqual(scheduler.assign(self.db, "Cybersecurity", "n4"), "sec1")
+        self.assertIsNone(scheduler.assign(self.db, "Architecture", "n5"))
+
+    def test_concurrent_assignment_stays_balanced(self):
+        scheduler = AssignmentScheduler()
+        scheduler.rebuild(self.db)
+        barrier = threading.Barrier(8)
+
+        def worker(n):
+            barrier.wait()
+            for i in range(30):
+                scheduler.assign(self.db, "Cybersecurity", f"task-{n}-{i}")
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        counts = [r["open_tasks"] for r in scheduler.workload()["Cybersecurity"]]
+        self.assertEqual(sum(counts), 240)
+        self.assertEqual(counts, [80, 80, 80])
+
+    def test_changes_during_a_rebuild_are_kept(self):
+        scheduler = AssignmentScheduler()
+        scheduler.rebuild(self.db)
+        scheduler.record("sec1", "old")
+        load = scheduler._load
+
+        def load_then_assign(db):
+            state = load(db)
+            # Lands after the rebuild's queries ran but before it swaps its state in
+            scheduler.record("sec2", "during")
+            scheduler.release("old")
+            return state
+
+        with patch.object(scheduler, "_load", side_effect=load_then_assign):
+            scheduler.rebuild(self.db)
+        counts = {r["reviewer_id"]: r["open_tasks"] for r in scheduler.workload()["Cybersecurity"]}
+        self.assertEqual(counts, {"sec1": 0, "sec2": 1, "sec3": 0})
+
+    def test_rebalance_moves_stale_tasks_off_overloaded_reviewer(self):
+        old = datetime.utcnow() - timedelta(days=10)
+        self.db.add_all([
+            ReviewTask(id=f"s{i}", request_id=f"r{i}", team="Cybersecurity", status="pending", reviewer_id="sec1",
+                       created_at=old + timedelta(minutes=i))
+            for i in range(6)
+        ])
+        self.db.commit()
+        scheduler = AssignmentScheduler()
+        moves = scheduler.rebalance(self.db, datetime.utcnow() - timedelta(days=3))
+        self.db.commit()
+        self.assertEqual(len(moves), 4)
+        counts = {r["reviewer_id"]: r["open_tasks"] for r in scheduler.workload()["Cybersecurity"]}
+        self.assertEqual(counts, {"sec1": 2, "sec2": 2, "sec3": 2})
+
+
+class TestCreateTaskRouting(AssignmentTestCase):
+    def test_create_task_routes_and_assigns(self):
+        created = self.client.post("/intake/", json={
+            "title": "Public chatbot",
+            "description": "Customer facing",
+            "requestor_name": "Test User",
+            "requestor_email": "test@example.com",
+            "use_case": "Chatbot",
+            "user_base": "Public",
+            "data_types": ["Public Data"],
+            "deployment_type": "Cloud",
+        })
+        request_id = created.json()["id"]
+        task = self.client.post(f"/review/{request_id}/create-task", json={}).json()
+        self.assertEqual(task["team"], "Cybersecurity")
+        self.assertIn(task["reviewer_id"], {"sec1", "sec2", "sec3"})
+
+        task = self.client.post(f"/review/{request_id}/create-task", json={"team": "Legal"}).json()
+        self.assertEqual(task["reviewer_id"], "legal1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import time
+import unittest
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_cache.db")
+
+from fastapi.testclient import TestClient
+from db.database import Base, get_engine
+from services.cache import InMemoryLRUCache, ResponseCache, SharedGenerations, response_cache, INTAKE
+
+from main import app
+
+
+class TestInMemoryLRUCache(unittest.TestCase):
+    def test_evicts_least_recently_used(self):
+        cache = InMemoryLRUCache(max_entries=2)
+        cache.set("a", {"v": 1})
+        cache.set("b", {"v": 2})
+        cache.get("a")
+        cache.set("c", {"v": 3})
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+    def test_expires_entries(self):
+        cache = InMemoryLRUCache(default_ttl=1)
+        cache.set("a", {"v": 1}, ttl=0.01)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+
+    def test_stale_fill_dropped_after_invalidation(self):
+        cache = ResponseCache(InMemoryLRUCache())
+        generation = cache.generation(INTAKE, "r1")
+        cache.invalidate(INTAKE, "r1")
+        cache.put(INTAKE, "r1", {"status": "draft"}, generation=generation)
+        self.assertIsNone(cache.get(INTAKE, "r1"))
+
+    def test_stats_do_not_count_an_uncountable_backend(self):
+        class RemoteBackend:
+            shared = True
+
+            def get(self, key):
+                return None
+
+            def set(self, key, value, ttl=None):
+                pass
+
+            def delete(self, keys):
+                pass
+
+        self.assertIsNone(ResponseCache(RemoteBackend()).stats()["entries"])
+        self.assertEqual(ResponseCache(InMemoryLRUCache()).stats()["entries"], 0)
+
+    def test_invalidation_in_forked_worker_reaches_parent(self):
+        cache = ResponseCache(InMemoryLRUCache(), generations=SharedGenerations(slots=64))
+        cache.put(INTAKE, "r1", {"status": "draft"})
+        pid = os.fork()
+        if pid == 0:
+            cache.invalidate(INTAKE, "r1")
+            os._exit(0)
+        os.waitpid(pid, 0)
+        self.assertIsNone(cache.get(INTAKE, "r1"))
+
+
+class TestCachedEndpoints(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        response_cache.clear()
+        created = self.client.post("/intake/", json={
+            "title": "Chatbot",
+            "description": "Support bot",
+            "requestor_name": "Test User",
+            "requestor_email": "test@example.com",
+        })
+        self.request_id = created.json()["id"]
+
+    def test_conditional_get_and_invalidation(self):
+        first = self.client.get(f"/intake/{self.request_id}")
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.headers["x-cache"], "MISS")
+        self.assertIn("last-modified", first.headers)
+
+        etag = first.headers["etag"]
+        second = self.client.get(f"/intake/{self.request_id}", headers={"If-None-Match": etag})
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers["x-cache"], "HIT")
+
+        self.client.post(f"/review/{self.request_id}/create-task", json={
+            "reviewer_id": "reviewer@example.com", "team": "Legal",
+        })
+        third = self.client.get(f"/intake/{self.request_id}", headers={"If-None-Match": etag})
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(third.json()["status"], "reviewing")
+
+    def test_review_tasks_invalidated_by_approve(self):
+        self.assertEqual(self.client.get(f"/review/{self.request_id}/tasks").json(), [])
+        self.client.post(f"/review/{self.request_id}/approve", json={
+            "reviewer_id": "reviewer@example.com", "team": "Legal",
+        })
+        tasks = self.client.get(f"/review/{self.request_id}/tasks").json()
+        self.assertEqual([t["status"] for t in tasks], ["approved"])
+
+    def test_stats_report_hit_ratio(self):
+        self.client.get(f"/intake/{self.request_id}")
+        self.client.get(f"/intake/{self.request_id}")
+        stats = self.client.get("/cache/stats").json()
+        self.assertEqual(stats["resources"][INTAKE]["hits"], 1)
+        self.assertEqual(stats["resources"][INTAKE]["hit_ratio"], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
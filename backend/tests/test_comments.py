@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_comments.db")
+
+from fastapi.testclient import TestClient
+from db.database import Base, get_engine
+
+from main import app
+
+
+class TestCommentThreads(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        created = self.client.post("/intake/", json={
+            "title": "Chatbot",
+            "description": "Support bot",
+            "requestor_name": "Test User",
+            "requestor_email": "test@example.com",
+        })
+        self.request_id = created.json()["id"]
+        self.tasks = {}
+        for team in ("Legal", "Compliance"):
+            task = self.client.post(f"/review/{self.request_id}/create-task", json={
+                "reviewer_id": f"{team.lower()}@example.com", "team": team,
+            })
+            self.tasks[team] = task.json()["id"]
+
+    def comment(self, **fields):
+        body = {"commenter_id": "legal@example.com", "section": "data", "text": "Looks fine"}
+        body.update(fields)
+        return self.client.post(f"/review/{self.request_id}/comment", json=body)
+
+    def test_comment_targets_team_and_replies_inherit_task(self):
+        root = self.comment(team="Compliance").json()
+        self.assertEqual(root["task_id"], self.tasks["Compliance"])
+        reply = self.comment(parent_id=root["id"], anchor="data.retention").json()
+        self.assertEqual(reply["task_id"], self.tasks["Compliance"])
+        self.assertEqual(reply["anchor"], "data.retention")
+
+    def test_threads_are_nested_and_paginated(self):
+        first = self.comment(team="Legal").json()
+        self.comment(parent_id=first["id"])
+        second = self.comment(team="Compliance").json()
+
+        page = self.client.get(f"/review/{self.request_id}/comments", params={"limit": 1}).json()
+        self.assertEqual([c["id"] for c in page["items"]], [first["id"]])
+        self.assertEqual(len(page["items"][0]["replies"]), 1)
+
+        page = self.client.get(f"/review/{self.request_id}/comments",
+                               params={"limit": 1, "cursor": page["next_cursor"]}).json()
+        self.assertEqual([c["id"] for c in page["items"]], [second["id"]])
+        self.assertIsNone(page["next_cursor"])
+
+    def test_batch_is_all_or_nothing(self):
+        response = self.client.post(f"/review/{self.request_id}/comments/batch", json={
+            "commenter_id": "legal@example.com",
+            "comments": [
+                {"section": "data", "text": "PII retention?", "team": "Legal"},
+                {"section": "model", "text": "Which model?", "parent_id": "missing"},
+            ],
+        })
+        self.assertEqual(response.status_code, 404)
+        page = self.client.get(f"/review/{self.request_id}/comments").json()
+        self.assertEqual(page["items"], [])
+
+        response = self.client.post(f"/review/{self.request_id}/comments/batch", json={
+            "commenter_id": "legal@example.com",
+            "comments": [
+                {"section": "data", "text": "PII retention?", "team": "Legal"},
+                {"section": "model", "text": "Which model?", "team": "Compliance"},
+            ],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([c["task_id"] for c in response.json()], [self.tasks["Legal"], self.tasks["Compliance"]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_evidence.db")
+
+from fastapi.testclient import TestClient
+from api import evidence as evidence_api
+from db.database import Base, SessionLocal, get_engine
+from models.models import AuditLog, ComplianceChecklist, IntakeRequest
+from services import jobs
+from services.evidence_store import LocalBlobStore, parse_range, CHUNK_SIZE
+
+from main import app
+
+MAX_BYTES = 3 * CHUNK_SIZE
+
+
+def _chunks(data: bytes, size: int = 64 * 1024):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+class TestParseRange(unittest.TestCase):
+    def test_forms(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 99))
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("items=0-1", 100))
+        with self.assertRaises(ValueError):
+            parse_range("bytes=100-", 100)
+
+
+class TestEvidence(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+        cls.store = LocalBlobStore(tempfile.mkdtemp(), max_bytes=MAX_BYTES)
+        cls.patcher = mock.patch("api.evidence.blob_store", cls.store)
+        cls.patcher.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.patcher.stop()
+
+    def setUp(self):
+        db = SessionLocal()
+        self.requests = []
+        for title in ("Chatbot", "Forecaster"):
+            request = IntakeRequest(title=title, description="", requestor_id="x", status="reviewing", details={})
+            db.add(request)
+            self.requests.append(request)
+        db.flush()
+        self.checklist = ComplianceChecklist(request_id=self.requests[0].id, framework="SOC2",
+                                             questions=[{"question": "Access reviews?"}, {"question": "Encryption?"}])
+        db.add(self.checklist)
+        db.commit()
+        self.request_ids = [r.id for r in self.requests]
+        self.checklist_id = self.checklist.id
+        db.close()
+
+    def upload(self, request_id, data, **params):
+        params.setdefault("filename", "soc2 report.pdf")
+        return self.client.post(f"/evidence/requests/{request_id}", params=params, content=_chunks(data),
+                                headers={"Content-Type": "application/pdf"})
+
+    def test_streaming_upload_is_content_addressed_and_deduplicated(self):
+        data = os.urandom(CHUNK_SIZE + 12345)
+        digest = hashlib.sha256(data).hexdigest()
+        first = self.upload(self.request_ids[0], data, checklist_id=self.checklist_id, question_index=1)
+        self.assertEqual(first.status_code, 201, first.text)
+        body = first.json()
+        self.assertEqual((body["sha256"], body["size"], body["content_type"]), (digest, len(data), "application/pdf"))
+        self.assertEqual([(l["checklist_id"], l["question_index"]) for l in body["links"]], [(self.checklist_id, 1)])
+
+        again = self.upload(self.request_ids[0], data).json()
+        self.assertEqual(again["id"], body["id"])
+        self.assertTrue(again["deduplicated"])
+        other = self.upload(self.request_ids[1], data).json()
+        self.assertNotEqual(other["id"], body["id"])
+        self.assertFalse(other["deduplicated"])
+
+        with open(self.store.path(digest), "rb") as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(os.listdir(self.store.staging), [])
+
+    def test_range_downloads(self):
+        data = os.urandom(5000)
+        evidence_id = self.upload(self.request_ids[0], data).json()["id"]
+        url = f"/evidence/{evidence_id}/content"
+
+        full = self.client.get(url)
+        self.assertEqual(full.status_code, 200)
+        self.assertEqual(full.content, data)
+        self.assertEqual(full.headers["accept-ranges"], "bytes")
+
+        partial = self.client.get(url, headers={"Range": "bytes=100-199"})
+        self.assertEqual(partial.status_code, 206)
+        self.assertEqual(partial.content, data[100:200])
+        self.assertEqual(partial.headers["content-range"], "bytes 100-199/5000")
+
+        self.assertEqual(self.client.get(url, headers={"Range": "bytes=-10"}).content, data[-10:])
+        stale = self.client.get(url, headers={"Range": "bytes=0-9", "If-Range": '"other"'})
+        self.assertEqual((stale.status_code, len(stale.content)), (200, 5000))
+        unsatisfiable = self.client.get(url, headers={"Range": "bytes=5000-"})
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable.headers["content-range"], "bytes */5000")
+
+    def test_bulk_links_validate_checklist_questions(self):
+        evidence_id = self.upload(self.request_ids[0], b"model card").json()["id"]
+        linked = self.client.post(f"/evidence/{evidence_id}/links", json={"links": [
+            {"checklist_id": self.checklist_id, "question_index": 0},
+            {"checklist_id": self.checklist_id, "question_index": 1},
+            {"checklist_id": self.checklist_id, "question_index": 0},
+        ]})
+        self.assertEqual(linked.status_code, 200, linked.text)
+        self.assertEqual(sorted(l["question_index"] for l in linked.json()["links"]), [0, 1])
+
+        out_of_range = self.client.post(f"/evidence/{evidence_id}/links", json={"links": [
+            {"checklist_id": self.checklist_id, "question_index": 7},
+        ]})
+        self.assertEqual(out_of_range.status_code, 400)
+        listed = self.client.get(f"/evidence/requests/{self.request_ids[0]}", params={"checklist_id": self.checklist_id})
+        self.assertEqual([e["id"] for e in listed.json()], [evidence_id])
+
+    def test_oversized_upload_rejected_and_discarded(self):
+        response = self.upload(self.request_ids[0], b"x" * (MAX_BYTES + 1))
+        self.assertEqual(response.status_code, 413)
+        self.assertEqual(os.listdir(self.store.staging), [])
+
+    def test_failed_insert_keeps_blob_of_overlapping_upload(self):
+        data = os.urandom(4096)
+        digest = hashlib.sha256(data).hexdigest()
+        client = TestClient(app, raise_server_exceptions=False)
+        first_stored, second_stored, first_done = threading.Event(), threading.Event(), threading.Event()
+        record_upload = evidence_api._record_upload
+        audit_upload = evidence_api._audit_upload
+
+        def record(db, request_id, *args):
+            if request_id == self.request_ids[0]:
+                # The first upload created the blob; hold its insert until the second has stored the same bytes
+                first_stored.set()
+                second_stored.wait(5)
+                try:
+                    return record_upload(db, request_id, *args)
+                finally:
+                    first_done.set()
+            second_stored.set()
+            first_done.wait(5)
+            return record_upload(db, request_id, *args)
+
+        def audit(db, request_id, *args):
+            if request_id == self.request_ids[0]:
+                raise RuntimeError("database went away")
+            return audit_upload(db, request_id, *args)
+
+        def post(request_id):
+            return client.post(f"/evidence/requests/{request_id}", params={"filename": "a.pdf"}, content=data)
+
+        with mock.patch("api.evidence._record_upload", record), mock.patch("api.evidence._audit_upload", audit), \
+                ThreadPoolExecutor(max_workers=2) as pool:
+            failed = pool.submit(post, self.request_ids[0])
+            first_stored.wait(5)
+            succeeded = pool.submit(post, self.request_ids[1])
+            self.assertEqual(failed.result().status_code, 500)
+            self.assertEqual(succeeded.result().status_code, 201)
+
+        self.assertTrue(self.store.exists(digest))
+        self.assertEqual(self.client.get(f"/evidence/{succeeded.result().json()['id']}/content").content, data)
+        self.assertEqual(self.client.get(f"/evidence/requests/{self.request_ids[0]}").json(), [])
+
+    def test_sweep_removes_only_old_unreferenced_blobs(self):
+        referenced, orphan, fresh = os.urandom(512), os.urandom(512), os.urandom(512)
+        self.assertEqual(self.upload(self.request_ids[0], referenced).status_code, 201)
+        for data in (orphan, fresh):
+            upload = self.store.stage()
+            upload.write(data)
+            self.store.commit(upload)
+        old = time.time() - 2 * jobs.EVIDENCE_ORPHAN_GRACE_SECONDS
+        for data in (referenced, orphan):
+            os.utime(self.store.path(hashlib.sha256(data).hexdigest()), (old, old))
+
+        db = SessionLocal()
+        try:
+            with mock.patch("services.jobs.blob_store", self.store):
+                jobs.sweep_orphaned_evidence(db)
+        finally:
+            db.close()
+        self.assertTrue(self.store.exists(hashlib.sha256(referenced).hexdigest()))
+        self.assertFalse(self.store.exists(hashlib.sha256(orphan).hexdigest()))
+        self.assertTrue(self.store.exists(hashlib.sha256(fresh).hexdigest()))
+
+    def test_every_upload_is_audited(self):
+        data = os.urandom(1024)
+        for _ in range(2):
+            self.assertEqual(self.upload(self.request_ids[0], data).status_code, 201)
+        db = SessionLocal()
+        audited = db.query(AuditLog).filter(AuditLog.request_id == self.request_ids[0],
+                                            AuditLog.action == "evidence_uploaded").all()
+        db.close()
+        self.assertEqual(len([a for a in audited if a.metadata_["sha256"] == hashlib.sha256(data).hexdigest()]), 2)
+
+    def test_unknown_request(self):
+        response = self.upload("00000000-0000-0000-0000-000000000000", b"data")
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,236 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_idempotency.db")
+os.environ.setdefault("TENANT_TOKEN_SECRET", "test-tenant-secret")
+
+from fastapi import FastAPI, HTTPException, Response
+from fastapi.testclient import TestClient
+from db.database import Base, SessionLocal, get_engine
+from db.tenancy import INCLUDE_ALL_TENANTS, TenantMiddleware, issue_tenant_token
+from models.models import IdempotencyKey, IntakeRequest, ReviewTask
+from services.idempotency import IN_PROGRESS, MISMATCH, IdempotencyMiddleware, IdempotencyStore, StoredResponse, idempotency_store
+from services.jobs import apply_retention
+
+from main import app
+
+JSON_HEADERS = [["content-type", "application/json"]]
+
+PAYLOAD = {
+    "title": "Retry me",
+    "description": "Client retries on timeout",
+    "requestor_name": "Test User",
+    "requestor_email": "retry@example.com",
+}
+
+
+class TestIdempotentEndpoints(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        idempotency_store.clear()
+
+    def _count(self, model, *criteria):
+        db = SessionLocal()
+        try:
+            return db.query(model).filter(*criteria).count()
+        finally:
+            db.close()
+
+    def test_retried_intake_is_created_once(self):
+        headers = {"Idempotency-Key": "intake-1"}
+        first = self.client.post("/intake/", json=PAYLOAD, headers=headers)
+        idempotency_store.clear()  # the retry lands on a worker that never saw the key
+        retry = self.client.post("/intake/", json=PAYLOAD, headers=headers)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json()["id"], first.json()["id"])
+        self.assertEqual(retry.headers["idempotent-replayed"], "true")
+        self.assertEqual(self._count(IntakeRequest, IntakeRequest.title == "Retry me"), 1)
+
+        reused = self.client.post("/intake/", json={**PAYLOAD, "title": "Other"}, headers=headers)
+        self.assertEqual(reused.status_code, 422)
+        # Keys are per tenant
+        other = self.client.post("/intake/", json=PAYLOAD, headers={**headers, "Authorization": f"Bearer {issue_tenant_token('acme')}"})
+        self.assertNotEqual(other.json()["id"], first.json()["id"])
+
+    def test_retried_approve_creates_one_task(self):
+        request_id = self.client.post("/intake/", json={**PAYLOAD, "title": "Approve me"}).json()["id"]
+        action = {"reviewer_id": "legal@example.com", "team": "Legal"}
+        headers = {"Idempotency-Key": f"approve-{request_id}"}
+        task_ids = {self.client.post(f"/review/{request_id}/approve", json=action, headers=headers).json()["task_id"]
+                    for _ in range(3)}
+        self.assertEqual(len(task_ids), 1)
+        self.assertEqual(self._count(ReviewTask, ReviewTask.request_id == request_id), 1)
+
+    def test_retention_deletes_expired_keys(self):
+        db = SessionLocal()
+        db.add(IdempotencyKey(key="stale", fingerprint="0" * 64, status_code=200, body=b"{}",
+                              expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+        self.assertEqual(apply_retention(db)["idempotency_keys_deleted"], 1)
+        db.commit()
+        self.assertEqual(db.query(IdempotencyKey).execution_options(**{INCLUDE_ALL_TENANTS: True})
+                         .filter(IdempotencyKey.key == "stale").count(), 0)
+        db.close()
+
+
+class TestClaimOwnership(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+
+    def _expire(self, key):
+        db = SessionLocal()
+        db.query(IdempotencyKey).filter(IdempotencyKey.key == key).update(
+            {"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+        db.commit()
+        db.close()
+
+    def test_stale_owner_cannot_release_or_complete(self):
+        store = IdempotencyStore()
+        first = store.claim("takeover", "f" * 64)
+        self.assertIs(store.claim("takeover", "f" * 64), IN_PROGRESS)
+        self._expire("takeover")
+        second = store.claim("takeover", "f" * 64)
+        self.assertNotEqual(first, second)
+
+        store.release("takeover", first)
+        self.assertFalse(store.extend("takeover", first))
+        self.assertFalse(store.complete("takeover", first, "f" * 64, 200, JSON_HEADERS, b'{"who":1}'))
+        self.assertIs(store.claim("takeover", "f" * 64), IN_PROGRESS)
+        self.assertTrue(store.complete("takeover", second, "f" * 64, 200, JSON_HEADERS, b'{"who":2}'))
+        store.clear()
+        self.assertEqual(store.claim("takeover", "f" * 64).body, b'{"who":2}')
+
+    def test_different_request_under_a_running_key_is_a_mismatch(self):
+        store = IdempotencyStore()
+        store.claim("running", "a" * 64)
+        self.assertIs(store.claim("running", "a" * 64), IN_PROGRESS)
+        self.assertIs(store.claim("running", "b" * 64), MISMATCH)
+
+
+class TestIdempotencyMiddleware(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+
+    def setUp(self):
+        self.calls = 0
+        mini = FastAPI()
+
+        @mini.post("/slow")
+        async def slow():
+            self.calls += 1
+            await asyncio.sleep(0.2)
+            return {"call": self.calls}
+
+        @mini.post("/flaky")
+        def flaky():
+            self.calls += 1
+            if self.calls == 1:
+                raise HTTPException(status_code=503, detail="try again")
+            return {"call": self.calls}
+
+        mini.add_middleware(IdempotencyMiddleware, store=IdempotencyStore(), enabled=True)
+        mini.add_middleware(TenantMiddleware)
+        self.app = mini
+
+    def test_concurrent_duplicates_run_once(self):
+        with TestClient(self.app) as client, ThreadPoolExecutor(max_workers=5) as pool:
+            responses = list(pool.map(
+                lambda _: client.post("/slow", headers={"Idempotency-Key": "same"}), range(5)))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual({r.json()["call"] for r in responses}, {1})
+        self.assertEqual(sum(r.headers.get("idempotent-replayed") == "true" for r in responses), 4)
+
+    def test_claim_is_extended_while_request_runs(self):
+        store = IdempotencyStore(lock_seconds=0.15)
+        mini = FastAPI()
+
+        @mini.post("/long")
+        async def long():
+            await asyncio.sleep(0.6)
+            return {"done": True}
+
+        mini.add_middleware(IdempotencyMiddleware, store=store, enabled=True)
+        with TestClient(mini) as client, ThreadPoolExecutor(max_workers=1) as pool:
+            running = pool.submit(client.post, "/long", headers={"Idempotency-Key": "long"})
+            # Well past the lock period, a retry on another worker must still see the claim
+            # (held by a request with another fingerprint, so it is a mismatch, not a takeover)
+            time.sleep(0.4)
+            self.assertIs(store.claim("long", "0" * 64), MISMATCH)
+            self.assertEqual(running.result().json(), {"done": True})
+        self.assertIsInstance(store.claim("long", "0" * 64), StoredResponse)
+
+    def test_oversized_response_is_not_run_twice(self):
+        mini = FastAPI()
+
+        @mini.post("/big")
+        def big():
+            self.calls += 1
+            return {"text": "x" * 1024}
+
+        mini.add_middleware(IdempotencyMiddleware, store=IdempotencyStore(), enabled=True)
+        client = TestClient(mini)
+        headers = {"Idempotency-Key": "big"}
+        with mock.patch("services.idempotency.IDEMPOTENCY_MAX_RESPONSE_BYTES", 512):
+            self.assertEqual(len(client.post("/big", headers=headers).json()["text"]), 1024)
+            retry = client.post("/big", headers=headers)
+        self.assertEqual(retry.status_code, 410)
+        self.assertIn("200", retry.json()["detail"])
+        self.assertEqual(self.calls, 1)
+
+    def test_replay_keeps_response_headers(self):
+        mini = FastAPI()
+
+        @mini.post("/created", status_code=201)
+        def created(response: Response):
+            response.headers["Location"] = "/things/1"
+            response.headers["X-Thing-Version"] = "3"
+            return {"id": 1}
+
+        mini.add_middleware(IdempotencyMiddleware, store=IdempotencyStore(), enabled=True)
+        client = TestClient(mini)
+        headers = {"Idempotency-Key": "created"}
+        client.post("/created", headers=headers)
+        retry = client.post("/created", headers=headers)
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.headers["idempotent-replayed"], "true")
+        self.assertEqual(retry.headers["location"], "/things/1")
+        self.assertEqual(retry.headers["x-thing-version"], "3")
+        self.assertEqual(retry.headers["content-type"], "application/json")
+        self.assertEqual(retry.headers["content-length"], str(len(retry.content)))
+
+    def test_different_body_while_running_is_refused_at_once(self):
+        with TestClient(self.app) as client, ThreadPoolExecutor(max_workers=1) as pool:
+            running = pool.submit(client.post, "/slow", json={"n": 1}, headers={"Idempotency-Key": "busy"})
+            time.sleep(0.05)
+            started = time.monotonic()
+            other = client.post("/slow", json={"n": 2}, headers={"Idempotency-Key": "busy"})
+            self.assertEqual(other.status_code, 422)
+            self.assertLess(time.monotonic() - started, 0.15)
+            self.assertEqual(running.result().status_code, 200)
+        self.assertEqual(self.calls, 1)
+
+    def test_server_errors_are_not_stored(self):
+        client = TestClient(self.app)
+        headers = {"Idempotency-Key": "flaky"}
+        self.assertEqual(client.post("/flaky", headers=headers).status_code, 503)
+        retry = client.post("/flaky", headers=headers)
+        self.assertEqual(retry.json(), {"call": 2})
+        self.assertEqual(client.post("/flaky", headers=headers).json(), {"call": 2})
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,35 @@
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEGACY_DB = os.path.join(os.path.dirname(BACKEND_DIR), "sql_app.db")
+
+
+class TestMigrations(unittest.TestCase):
+    def _alembic(self, database_path, *args):
+        # A subprocess, since db.database reads DATABASE_URL once at import
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{database_path}")
+        return subprocess.run([sys.executable, "-m", "alembic", *args], cwd=BACKEND_DIR, env=env,
+                              capture_output=True, text=True)
+
+    @unittest.skipUnless(os.path.exists(LEGACY_DB), "no checked-in sql_app.db")
+    def test_legacy_database_upgrades_to_head(self):
+        database_path = os.path.join(tempfile.mkdtemp(), "legacy.db")
+        shutil.copy(LEGACY_DB, database_path)
+
+        result = self._alembic(database_path, "upgrade", "head")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        result = self._alembic(database_path, "check")
+        self.assertEqual(result.returncode, 0, result.stderr)
+        with sqlite3.connect(database_path) as conn:
+            tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertIn("compliance_checklists", tables)
+
+
+if __name__ == '__main__':
+    unittest.main()
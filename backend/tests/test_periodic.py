@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_periodic.db")
+
+from db.database import Base, SessionLocal, get_engine
+from models.models import IntakeRequest, JobRun, RiskScore
+from services.jobs import rescore_stale_requests
+from services.periodic import PeriodicScheduler
+from services.risk_scoring import RiskScoringEngine, RULES_VERSION
+
+
+class AlwaysLeader:
+    def acquire(self):
+        return True
+
+    def release(self):
+        pass
+
+
+class TestPeriodicScheduler(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+
+    def setUp(self):
+        db = SessionLocal()
+        db.query(JobRun).delete()
+        db.commit()
+        db.close()
+        self.runs = []
+
+    def _scheduler(self):
+        scheduler = PeriodicScheduler(leader_factory=AlwaysLeader)
+        scheduler.job("nightly", interval=3600)(lambda db: self.runs.append("nightly"))
+        return scheduler
+
+    def test_new_leader_keeps_the_schedule(self):
+        self._scheduler().run_pending()
+        self.assertEqual(len(self.runs), len(self._scheduler().tenants()))
+        self.assertIn("nightly", self._scheduler().last_runs())
+
+        # Another worker takes over leadership: the job is not due yet
+        runs = len(self.runs)
+        self._scheduler().run_pending()
+        self.assertEqual(len(self.runs), runs)
+
+    def test_runs_once_the_interval_has_passed(self):
+        db = SessionLocal()
+        db.add(JobRun(name="nightly", last_run_at=datetime.utcnow() - timedelta(hours=2)))
+        db.commit()
+        db.close()
+        scheduler = self._scheduler()
+        scheduler.run_pending()
+        self.assertTrue(self.runs)
+        self.assertGreater(scheduler.last_runs()["nightly"], datetime.utcnow() - timedelta(minutes=1))
+
+    def test_failed_run_is_not_recorded(self):
+        scheduler = PeriodicScheduler(leader_factory=AlwaysLeader)
+
+        @scheduler.job("flaky", interval=3600)
+        def flaky(db):
+            self.runs.append("flaky")
+            if len(self.runs) == 1:
+                raise RuntimeError("boom")
+
+        scheduler.run_pending()
+        self.assertNotIn("flaky", scheduler.last_runs())
+
+        # Retried on the next tick, and recorded once it succeeds
+        scheduler.run_pending()
+        self.assertGreater(len(self.runs), 1)
+        self.assertIn("flaky", scheduler.last_runs())
+
+
+class TestRescoreJob(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+
+    def setUp(self):
+        self.db = SessionLocal()
+        self.request = IntakeRequest(title="Assistant", description="", requestor_id="x", status="submitted",
+                                     details={"deployment_type": "On-Premise", "data_types": ["Public Data"]})
+        self.db.add(self.request)
+        self.db.commit()
+        RiskScoringEngine().calculate_total_score(self.request, self.db)
+
+    def tearDown(self):
+        self.db.close()
+
+    def _rescored(self):
+        rescore_stale_requests(self.db)
+        self.db.commit()
+        return self.db.query(RiskScore).filter(RiskScore.request_id == self.request.id).one()
+
+    def test_fresh_score_is_left_alone(self):
+        scored_at = self._rescored().scored_at
+        self.assertEqual(self._rescored().scored_at, scored_at)
+
+    def test_score_from_older_rules_is_redone(self):
+        score = self.db.query(RiskScore).filter(RiskScore.request_id == self.request.id).one()
+        score.rule_version = RULES_VERSION - 1
+        self.db.commit()
+        self.assertEqual(self._rescored().rule_version, RULES_VERSION)
+
+    def test_request_changed_after_scoring_is_redone(self):
+        self.request.details = {"deployment_type": "Cloud", "data_types": ["PII"]}
+        self.db.commit()
+        changed_at = self.request.updated_at
+        self.assertGreaterEqual(self._rescored().scored_at, changed_at)
+
+
+if __name__ == '__main__':
+    unittest.main()
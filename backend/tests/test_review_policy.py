@@ -0,0 +1,177 @@
+import os
+import tempfile
+import unittest
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_review_policy.db")
+
+from fastapi.testclient import TestClient
+from db.database import Base, SessionLocal, get_engine
+from models.models import IntakeRequest, ReviewTask, RiskScore
+from services.review_policy import CompiledPolicy, route_backlog, _commit
+
+from main import app
+
+HIGH_RISK = {
+    "title": "Public chatbot",
+    "description": "Customer facing assistant over support tickets",
+    "requestor_name": "Test User",
+    "requestor_email": "test@example.com",
+    "model_used": "GPT-4",
+    "model_provider": "OpenAI",
+    "use_case": "Chatbot",
+    "deployment_type": "Cloud",
+    "data_types": ["PII", "Financial"],
+    "data_volume": "Large",
+    "expected_user_base": "Public",
+}
+
+
+class TestCompiledPolicy(unittest.TestCase):
+    def test_single_pass_matches_every_rule(self):
+        policy = CompiledPolicy({
+            "rules": [
+                {"score": "sox", "min": 40, "team": "Compliance"},
+                {"score": "soc2", "min": 50, "team": "Compliance"},
+                {"score": "owasp", "min": 40, "team": "Cybersecurity"},
+                {"score": "owasp", "min": 80, "team": "Architecture"},
+            ],
+            "auto_approve_below": 20,
+        })
+        # nist, soc2, sox, owasp, maestro, total
+        self.assertEqual(policy.evaluate("r", (0, 0, 40, 39, 0, 30)).teams, ("Compliance",))
+        self.assertEqual(policy.evaluate("r", (0, 0, 0, 85, 0, 30)).teams, ("Cybersecurity", "Architecture"))
+        self.assertFalse(policy.evaluate("r", (0, 0, 0, 0, 0, 30)).auto_approve)
+        self.assertTrue(policy.evaluate("r", (0, 0, 0, 0, 0, 10)).auto_approve)
+        # No rule and too risky to auto-approve: the team owning the highest score
+        self.assertEqual(policy.evaluate("r", (0, 30, 0, 10, 35, 30)).fallback_team, "Architecture")
+        self.assertIsNone(policy.evaluate("r", (0, 0, 40, 0, 0, 30)).fallback_team)
+
+    def test_rejects_unknown_score(self):
+        with self.assertRaises(ValueError):
+            CompiledPolicy({"rules": [{"score": "gdpr", "min": 1, "team": "Legal"}]})
+
+
+class TestRoutingStage(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def create(self, submit=True, **overrides):
+        body = dict(HIGH_RISK, **overrides)
+        request_id = self.client.post("/intake/", json=body).json()["id"]
+        if submit:
+            self.assertEqual(self.client.post(f"/intake/{request_id}/submit").json()["status"], "submitted")
+        return request_id
+
+    def test_drafts_are_not_routed(self):
+        request_id = self.create(submit=False)
+        self.client.post(f"/scoring/{request_id}/compute")
+        self.assertEqual(self.client.get(f"/review/{request_id}/tasks").json(), [])
+        self.assertEqual(self.client.get(f"/intake/{request_id}").json()["status"], "draft")
+        # Submitting a scored draft routes it
+        self.client.post(f"/intake/{request_id}/submit")
+        self.assertEqual(self.client.get(f"/intake/{request_id}").json()["status"], "reviewing")
+        self.assertEqual(self.client.post(f"/intake/{request_id}/submit").status_code, 409)
+
+    def test_manual_task_reuses_routed_task(self):
+        request_id = self.create()
+        self.client.post(f"/scoring/{request_id}/compute")
+        routed = {t["team"]: t["id"] for t in self.client.get(f"/review/{request_id}/tasks").json()}
+        created = self.client.post(f"/review/{request_id}/create-task",
+                                   json={"reviewer_id": "legal@example.com", "team": "Legal"}).json()
+        self.assertEqual(created["id"], routed["Legal"])
+        self.client.post(f"/review/{request_id}/approve", json={"reviewer_id": "legal@example.com", "team": "Legal"})
+        legal = [t for t in self.client.get(f"/review/{request_id}/tasks").json() if t["team"] == "Legal"]
+        self.assertEqual([t["status"] for t in legal], ["approved"])
+
+    def test_compute_fans_out_review_tasks_once(self):
+        request_id = self.create()
+        self.client.post(f"/scoring/{request_id}/compute")
+        teams = sorted(t["team"] for t in self.client.get(f"/review/{request_id}/tasks").json())
+        self.assertIn("Cybersecurity", teams)
+        self.assertIn("Legal", teams)
+        self.assertEqual(self.client.get(f"/intake/{request_id}").json()["status"], "reviewing")
+
+        self.client.post(f"/scoring/{request_id}/compute")
+        again = sorted(t["team"] for t in self.client.get(f"/review/{request_id}/tasks").json())
+        self.assertEqual(again, teams)
+
+    def test_low_risk_request_is_auto_approved(self):
+        request_id = self.create(model_used=None, model_provider=None, use_case="Translation",
+                                 deployment_type="On-Premise", data_types=["Public Data"],
+                                 data_volume="Small", expected_user_base=None)
+        self.client.post(f"/scoring/{request_id}/compute")
+        self.assertEqual(self.client.get(f"/intake/{request_id}").json()["status"], "approved")
+        self.assertEqual(self.client.get(f"/review/{request_id}/tasks").json(), [])
+
+    def test_backlog_dry_run_then_apply(self):
+        db = SessionLocal()
+        request = IntakeRequest(title="Imported", description="", requestor_id="x", status="submitted", details={})
+        db.add(request)
+        db.flush()
+        db.add(RiskScore(request_id=request.id, nist_score=0, soc2_score=0, sox_score=90,
+                         owasp_score=0, maestro_score=0, total_score=20))
+        db.commit()
+        request_id = request.id
+        db.close()
+
+        plan = self.client.post("/review/routing/backlog").json()
+        self.assertTrue(plan["dry_run"])
+        self.assertIn({"request_id": request_id, "create_tasks": ["Compliance"], "auto_approve": False}, plan["sample"])
+        self.assertEqual(self.client.get(f"/review/{request_id}/tasks").json(), [])
+
+        self.client.post("/review/routing/backlog", params={"dry_run": "false"})
+        tasks = self.client.get(f"/review/{request_id}/tasks").json()
+        self.assertEqual([t["team"] for t in tasks], ["Compliance"])
+        self.assertEqual(self.client.post("/review/routing/backlog").json()["needs_review"], 0)
+
+    def _scored(self, status="submitted", **scores):
+        db = SessionLocal()
+        request = IntakeRequest(title="Imported", description="", requestor_id="x", status=status, details={})
+        db.add(request)
+        db.flush()
+        values = dict(nist_score=0, soc2_score=0, sox_score=0, owasp_score=0, maestro_score=0, total_score=30)
+        db.add(RiskScore(request_id=request.id, **dict(values, **scores)))
+        db.commit()
+        request_id = request.id
+        db.close()
+        return request_id
+
+    def test_concurrent_routing_cannot_duplicate_tasks(self):
+        request_id = self._scored(sox_score=90)
+        db = SessionLocal()
+        try:
+            # Two routers that both read "no tasks yet" before either committed
+            _commit(db, [(request_id, ["Compliance"], False)])
+            _commit(db, [(request_id, ["Compliance", "Legal"], False)])
+            teams = sorted(team for (team,) in db.query(ReviewTask.team).filter(ReviewTask.request_id == request_id))
+        finally:
+            db.close()
+        self.assertEqual(teams, ["Compliance", "Legal"])
+
+    def test_unmatched_request_gets_a_fallback_team(self):
+        request_id = self._scored(owasp_score=30)
+        self.client.post("/review/routing/backlog", params={"dry_run": "false"})
+        tasks = self.client.get(f"/review/{request_id}/tasks").json()
+        self.assertEqual([t["team"] for t in tasks], ["Cybersecurity"])
+        self.assertEqual(self.client.get(f"/intake/{request_id}").json()["status"], "reviewing")
+
+    def test_backlog_is_applied_chunk_by_chunk(self):
+        request_ids = [self._scored(sox_score=90) for _ in range(5)]
+        db = SessionLocal()
+        try:
+            plan = route_backlog(db, dry_run=True, chunk_size=2)
+            self.assertGreaterEqual(plan["needs_review"], 5)
+            applied = route_backlog(db, dry_run=False, chunk_size=2)
+            self.assertEqual(applied["needs_review"], plan["needs_review"])
+            self.assertEqual(route_backlog(db, dry_run=True, chunk_size=2)["needs_review"], 0)
+            routed = db.query(ReviewTask.request_id).filter(ReviewTask.request_id.in_(request_ids)).distinct().count()
+        finally:
+            db.close()
+        self.assertEqual(routed, 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
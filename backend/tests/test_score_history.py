@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_score_history.db")
+
+from fastapi.testclient import TestClient
+from db.database import Base, SessionLocal, get_engine
+from models.models import IntakeRequest, RiskScoreHistory
+from services.risk_scoring import RiskScoringEngine
+
+from main import app
+
+
+class TestScoreHistory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        self.db = SessionLocal()
+        self.request = IntakeRequest(title="Assistant", description="", requestor_id="x", status="approved",
+                                     details={"deployment_type": "On-Premise", "data_types": ["Public Data"]})
+        self.db.add(self.request)
+        self.db.commit()
+
+    def tearDown(self):
+        self.db.close()
+
+    def history(self):
+        return self.client.get(f"/scoring/{self.request.id}/history").json()
+
+    def test_only_changes_are_recorded(self):
+        engine = RiskScoringEngine()
+        engine.calculate_total_score(self.request, self.db)
+        engine.calculate_total_score(self.request, self.db)
+        self.assertEqual(len(self.history()), 1)
+
+        self.request.details = dict(self.request.details, deployment_type="Cloud")
+        self.db.commit()
+        engine.calculate_total_score(self.request, self.db)
+        history = self.history()
+        self.assertEqual(len(history), 2)
+        self.assertGreater(history[1]["nist_score"], history[0]["nist_score"])
+
+        engine.rule_version += 1
+        engine.calculate_total_score(self.request, self.db)
+        self.assertEqual([h["rule_version"] for h in self.history()], [1, 1, 2])
+
+    def test_unknown_request_is_404(self):
+        self.assertEqual(self.client.get("/scoring/no-such-request/history").status_code, 404)
+
+    def test_time_range_and_trend(self):
+        now = datetime.utcnow()
+        for days_ago, total in [(40, 10), (3, 70), (2, 50)]:
+            self.db.add(RiskScoreHistory(request_id=self.request.id, total_score=total, nist_score=total,
+                                         rule_version=1, recorded_at=now - timedelta(days=days_ago)))
+        self.db.commit()
+
+        recent = self.client.get(f"/scoring/{self.request.id}/history",
+                                 params={"start": (now - timedelta(days=7)).isoformat()}).json()
+        self.assertEqual([h["total_score"] for h in recent], [70, 50])
+        # The same bound as a tz-aware time at UTC+2
+        aware_start = (now - timedelta(days=7)).replace(tzinfo=timezone(timedelta(hours=2))) + timedelta(hours=2)
+        recent = self.client.get(f"/scoring/{self.request.id}/history",
+                                 params={"start": aware_start.isoformat()}).json()
+        self.assertEqual([h["total_score"] for h in recent], [70, 50])
+
+        trend = self.client.get("/scoring/trends", params={
+            "request_id": self.request.id, "bucket": "month", "start": (now - timedelta(days=60)).isoformat(),
+        }).json()
+        self.assertEqual(sum(p["changes"] for p in trend["points"]), 3)
+        self.assertEqual(sum(p["high_risk_changes"] for p in trend["points"]), 1)
+        self.assertEqual(max(p["max_total_score"] for p in trend["points"]), 70)
+
+        self.assertEqual(self.client.get("/scoring/trends", params={"bucket": "decade"}).status_code, 422)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_simulation.db")
+
+from fastapi.testclient import TestClient
+from db.database import Base, SessionLocal, get_engine
+from models.models import RiskScore
+from services.risk_scoring import DEFAULT_WEIGHTS
+
+from main import app
+
+# nist, soc2, sox, owasp, maestro
+ROWS = [(80, 70, 60, 90, 50), (40, 30, 20, 60, 10), (10, 10, 10, 10, 10), (70, 20, 20, 95, 90)]
+
+
+def weighted_total(row, weights):
+    nist, soc2, sox, owasp, maestro = row
+    return int(nist * weights['nist'] + soc2 * weights['soc2'] + sox * weights['sox'] +
+               owasp * weights['owasp'] + maestro * weights['maestro'])
+
+
+class TestWeightSimulation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+        db = SessionLocal()
+        db.query(RiskScore).delete()
+        for i, (nist, soc2, sox, owasp, maestro) in enumerate(ROWS):
+            row = dict(nist_score=nist, soc2_score=soc2, sox_score=sox, owasp_score=owasp, maestro_score=maestro)
+            db.add(RiskScore(request_id=f"req-{i}", total_score=weighted_total(tuple(row.values()), DEFAULT_WEIGHTS), **row))
+        db.commit()
+        db.close()
+
+    def test_baseline_and_crossings_match_scalar_scoring(self):
+        owasp_heavy = {"nist": 0.1, "soc2": 0.1, "sox": 0.1, "owasp": 0.6, "maestro": 0.1}
+        result = self.client.post("/scoring/simulate", json={
+            "weight_sets": [{"name": "owasp-heavy", "weights": owasp_heavy}],
+            "refresh": True,
+        }).json()
+
+        baseline = [weighted_total(r, DEFAULT_WEIGHTS) for r in ROWS]
+        candidate = [weighted_total(r, owasp_heavy) for r in ROWS]
+        self.assertEqual(result["requests"], len(ROWS))
+        self.assertEqual(result["baseline"]["high_risk"], sum(t >= 60 for t in baseline))
+
+        simulated = result["candidates"][0]
+        self.assertEqual(simulated["name"], "owasp-heavy")
+        self.assertEqual(simulated["high_risk"], sum(t >= 60 for t in candidate))
+        self.assertEqual(simulated["crossed_into_high_risk"],
+                         sum(b < 60 <= c for b, c in zip(baseline, candidate)))
+        self.assertEqual(sum(simulated["bands"].values()), len(ROWS))
+
+    def test_partial_weight_set_keeps_the_other_weights(self):
+        client = TestClient(app, client=("192.0.2.37", 50000))
+        result = client.post("/scoring/simulate", json={"weight_sets": [{"weights": {"owasp": 0.6}}]}).json()
+
+        merged = {**DEFAULT_WEIGHTS, "owasp": 0.6}
+        simulated = result["candidates"][0]
+        self.assertEqual(simulated["weights"], merged)
+        self.assertEqual(simulated["high_risk"], sum(weighted_total(r, merged) >= 60 for r in ROWS))
+
+    def test_rejects_unknown_framework(self):
+        response = self.client.post("/scoring/simulate", json={"weight_sets": [{"weights": {"gdpr": 1.0}}]})
+        self.assertEqual(response.status_code, 422)
+
+    def test_rejects_non_finite_weights(self):
+        # Python's JSON decoder accepts NaN and Infinity literals, and overflows 1e999 to inf.
+        # From an address of its own, so the simulation rate limit does not kick in
+        client = TestClient(app, client=("192.0.2.36", 50000))
+        for value in ("NaN", "Infinity", "-Infinity", "1e999"):
+            body = '{"weight_sets": [{"weights": {"nist": %s, "owasp": 1.0}}]}' % value
+            response = client.post("/scoring/simulate", content=body,
+                                        headers={"Content-Type": "application/json"})
+            self.assertEqual(response.status_code, 422, value)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_sqlite_profile.db")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, select
+from sqlalchemy.exc import OperationalError
+from db import sqlite
+from db.batching import WriteBatcher
+from db.database import DATABASE_URL, Base, SessionLocal, get_engine, get_read_engine
+from db.json_fields import json_text
+from models.models import IntakeRequest
+
+from main import app
+
+
+@unittest.skipUnless(sqlite.is_tuned(DATABASE_URL), "tuned SQLite profile only")
+class TestTunedProfile(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def test_pragmas_and_read_only_pool(self):
+        with get_engine().connect() as conn:
+            self.assertEqual(conn.exec_driver_sql("PRAGMA journal_mode").scalar(), "wal")
+            self.assertEqual(conn.exec_driver_sql("PRAGMA synchronous").scalar(), 1)
+        with get_read_engine().connect() as conn:
+            with self.assertRaises(OperationalError):
+                conn.exec_driver_sql("DELETE FROM intake_requests")
+
+    def test_read_only_posts_do_not_need_the_writer(self):
+        weights = {"nist": 0.2, "soc2": 0.2, "sox": 0.2, "owasp": 0.2, "maestro": 0.2}
+        # Hold the single writer connection (and the write lock) like a long write would
+        with get_engine().connect() as writer, writer.begin():
+            simulated = self.client.post("/scoring/simulate", json={"weight_sets": [{"name": "flat", "weights": weights}]})
+            backlog = self.client.post("/review/routing/backlog")
+        self.assertEqual(simulated.status_code, 200)
+        self.assertEqual(backlog.status_code, 200)
+        self.assertTrue(backlog.json()["dry_run"])
+
+    def test_failing_unit_does_not_roll_back_its_batch(self):
+        batcher = WriteBatcher(enabled=True)
+        release = threading.Event()
+        results, batches, commits = {}, [], []
+        commit_batch = batcher._commit
+        batcher._commit = lambda batch: (batches.append(len(batch)), commit_batch(batch))
+
+        def insert(title, fail=False):
+            def unit(db):
+                db.add(IntakeRequest(title=title, description="", requestor_id="x", details={}))
+                db.flush()
+                if fail:
+                    raise ValueError(title)
+                return title
+            try:
+                results[title] = batcher.run(unit)
+            except ValueError as exc:
+                results[title] = exc
+
+        def block(db):
+            release.wait(5)
+            db.add(IntakeRequest(title="blocker", description="", requestor_id="x", details={}))
+            db.flush()
+
+        def count_commit(conn):
+            commits.append(conn)
+
+        event.listen(get_engine(), "commit", count_commit)
+        try:
+            # Park the batcher thread on a first unit so the next three queue up behind it
+            blocker = threading.Thread(target=batcher.run, args=(block,))
+            blocker.start()
+            self._wait_for(lambda: batches == [1])
+            threads = [threading.Thread(target=insert, args=(f"batch-{i}", i == 1)) for i in range(3)]
+            for thread in threads:
+                thread.start()
+            self._wait_for(lambda: batcher._queue.qsize() == 3)
+            release.set()
+            for thread in [blocker, *threads]:
+                thread.join()
+        finally:
+            event.remove(get_engine(), "commit", count_commit)
+
+        # One batch for the blocker, then all three units in a single transaction
+        self.assertEqual(batches, [1, 3])
+        self.assertEqual(len(commits), 2)
+
+        self.assertEqual(results["batch-0"], "batch-0")
+        self.assertIsInstance(results["batch-1"], ValueError)
+        self.assertEqual(results["batch-2"], "batch-2")
+        db = SessionLocal()
+        titles = set(db.scalars(select(IntakeRequest.title).where(IntakeRequest.title.like("batch-%"))))
+        db.close()
+        self.assertEqual(titles, {"batch-0", "batch-2"})
+
+    @staticmethod
+    def _wait_for(condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise AssertionError("timed out waiting for the batcher")
+            time.sleep(0.01)
+
+    def test_details_filter_uses_expression_index(self):
+        for provider in ("OpenAI", "Anthropic"):
+            self.client.post("/intake/", json={
+                "title": f"{provider} assistant",
+                "description": "Drafting assistant",
+                "requestor_name": "Test User",
+                "requestor_email": "filters@example.com",
+                "model_provider": provider,
+            })
+        listed = self.client.get("/intake/", params={"model_provider": "Anthropic"}).json()
+        self.assertEqual([r["title"] for r in listed], ["Anthropic assistant"])
+
+        query = select(IntakeRequest.id).where(
+            IntakeRequest.tenant_id == "default", json_text(IntakeRequest.details, "model_provider") == "x")
+        sql = str(query.compile(get_engine(), compile_kwargs={"literal_binds": True}))
+        with get_engine().connect() as conn:
+            plan = " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+        self.assertIn("ix_intake_requests_tenant_model_provider", plan)
+
+
+if __name__ == '__main__':
+    unittest.main()
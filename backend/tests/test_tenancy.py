@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+_db_dir = tempfile.mkdtemp()
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_db_dir}/test_tenancy.db")
+os.environ.setdefault("TENANT_TOKEN_SECRET", "test-tenant-secret")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+from db.database import Base, SessionLocal, get_engine
+from db.tenancy import DEFAULT_TENANT, INCLUDE_ALL_TENANTS, TenantMiddleware, issue_tenant_token, tenant_scope
+from models.models import AuditLog, IntakeRequest, User
+from services.cache import response_cache
+
+from main import app
+
+ACME = {"Authorization": f"Bearer {issue_tenant_token('acme')}"}
+GLOBEX = {"Authorization": f"Bearer {issue_tenant_token('globex')}"}
+
+
+class TestTenantIsolation(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+        cls.client = TestClient(app)
+
+    def setUp(self):
+        response_cache.clear()
+        self.request_id = self.client.post("/intake/", headers=ACME, json={
+            "title": "Chatbot",
+            "description": "Support bot",
+            "requestor_name": "Test User",
+            "requestor_email": "test@example.com",
+        }).json()["id"]
+
+    def test_rows_invisible_to_other_tenants(self):
+        acme_ids = [r["id"] for r in self.client.get("/intake/", headers=ACME).json()]
+        self.assertIn(self.request_id, acme_ids)
+        self.assertNotIn(self.request_id, [r["id"] for r in self.client.get("/intake/", headers=GLOBEX).json()])
+        self.assertEqual(self.client.get(f"/intake/{self.request_id}", headers=GLOBEX).status_code, 404)
+
+    def test_cached_response_not_served_to_other_tenant(self):
+        self.assertEqual(self.client.get(f"/intake/{self.request_id}", headers=ACME).status_code, 200)
+        self.assertEqual(self.client.get(f"/intake/{self.request_id}", headers=ACME).headers["x-cache"], "HIT")
+        self.assertEqual(self.client.get(f"/intake/{self.request_id}", headers=GLOBEX).status_code, 404)
+
+    def test_writes_cannot_reach_other_tenants(self):
+        self.client.post(f"/review/{self.request_id}/approve", headers=GLOBEX, json={
+            "reviewer_id": "reviewer@example.com", "team": "Legal",
+        })
+        self.assertEqual(self.client.get(f"/review/{self.request_id}/tasks", headers=ACME).json(), [])
+
+    def test_unauthenticated_tenant_rejected(self):
+        # A bare header from an arbitrary client cannot pick the tenant
+        self.assertEqual(self.client.get("/intake/", headers={"X-Tenant-ID": "acme"}).status_code, 403)
+        forged = issue_tenant_token("acme", secret="not-the-secret")
+        self.assertEqual(self.client.get("/intake/", headers={"Authorization": f"Bearer {forged}"}).status_code, 401)
+        expired = issue_tenant_token("acme", ttl=-1)
+        self.assertEqual(self.client.get("/intake/", headers={"Authorization": f"Bearer {expired}"}).status_code, 401)
+        mismatched = {**ACME, "X-Tenant-ID": "globex"}
+        self.assertEqual(self.client.get("/intake/", headers=mismatched).status_code, 403)
+
+
+class TestTrustedProxy(unittest.TestCase):
+    def setUp(self):
+        async def echo(scope, receive, send):
+            from db.tenancy import get_current_tenant
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": get_current_tenant().encode()})
+
+        self.app = TenantMiddleware(echo, secret=None, trusted_proxies="10.0.0.0/8")
+
+    def test_header_accepted_only_from_trusted_proxy(self):
+        proxied = TestClient(self.app, client=("10.1.2.3", 5000))
+        self.assertEqual(proxied.get("/", headers={"X-Tenant-ID": "acme"}).text, "acme")
+        self.assertEqual(proxied.get("/", headers={"X-Tenant-ID": "../etc"}).status_code, 400)
+        self.assertEqual(proxied.get("/").text, DEFAULT_TENANT)
+        direct = TestClient(self.app, client=("192.0.2.7", 5000))
+        self.assertEqual(direct.get("/", headers={"X-Tenant-ID": "acme"}).status_code, 403)
+
+
+class TestTenantStamping(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        Base.metadata.create_all(bind=get_engine())
+
+    def test_new_rows_and_bulk_inserts_take_current_tenant(self):
+        db = SessionLocal()
+        with tenant_scope("initech"):
+            db.add(User(name="A", email="a@example.com", role="reviewer"))
+            db.execute(insert(AuditLog), [{"action": "bulk"}])
+            db.commit()
+        db.add(User(name="A", email="a@example.com", role="reviewer"))
+        db.commit()
+
+        stamped = db.execute(
+            select(User.tenant_id).where(User.email == "a@example.com").execution_options(**{INCLUDE_ALL_TENANTS: True})
+        ).scalars().all()
+        self.assertEqual(sorted(stamped), sorted([DEFAULT_TENANT, "initech"]))
+        self.assertEqual(db.query(AuditLog).filter(AuditLog.action == "bulk").count(), 0)
+        with tenant_scope("initech"):
+            self.assertEqual(db.query(AuditLog).filter(AuditLog.action == "bulk").count(), 1)
+        db.close()
+
+
+if __name__ == '__main__':
+    unittest.main()